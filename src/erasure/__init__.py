@@ -1,6 +1,7 @@
-from .encoder import encode
-from .decoder import decode, DecodingError
+from .encoder import encode, encode_many
+from .decoder import decode, decode_into, DecodingError, warm_decoding_cache
 from .matrix import CodingMatrix
+from .stream import encode_stream, decode_stream
 
 DEFAULT_M: int = 3
 DEFAULT_N: int = 5
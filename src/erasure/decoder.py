@@ -1,10 +1,75 @@
 from __future__ import annotations
 
-from .encoder import Fragment
-from .matrix import CodingMatrix
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+
+import numpy as np
 
+from .encoder import Buffer, Fragment, as_byte_view
+from .matrix import CodingMatrix
+from .parallel import PARALLEL_THRESHOLD, parallel_encode_chunks, should_parallelize
+
+# Inverted sub-matrices are tiny (m x m ints), so a generous cache covers every
+# fragment subset for the coding parameters in use.
+DECODING_CACHE_SIZE: int = 1024
+
+
+def decode(
+    fragments: list[Fragment],
+    workers: int = 1,
+    use_processes: bool = False,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+) -> bytes:
+    sorted_fragments = _select_fragments(fragments)
+    m = sorted_fragments[0].threshold_m
+    original_length = sorted_fragments[0].original_length
+    chunk_size = len(sorted_fragments[0].data)
 
-def decode(fragments: list[Fragment]) -> bytes:
+    # Fast path: every data fragment is present, so the block is just their
+    # concatenation.  Padding only ever lives at the tail of the last chunk.
+    if all(fragment.index < m for fragment in sorted_fragments):
+        tail_length = original_length - (m - 1) * chunk_size
+        pieces = [fragment.data for fragment in sorted_fragments[:-1]]
+        pieces.append(memoryview(sorted_fragments[-1].data)[:max(tail_length, 0)])
+        return b"".join(pieces)[:original_length]
+
+    output = np.empty(original_length, dtype=np.uint8)
+    _decode_into(sorted_fragments, output, workers, use_processes, parallel_threshold)
+    return output.tobytes()
+
+
+def decode_into(
+    fragments: list[Fragment],
+    out: Buffer,
+    workers: int = 1,
+    use_processes: bool = False,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+) -> int:
+    """Decode directly into the caller's writable buffer; returns bytes written.
+
+    `out` must hold at least original_length bytes.  Present data chunks are
+    copied once into place and missing chunks are computed in place, so no
+    intermediate object-sized buffer is allocated.
+    """
+    sorted_fragments = _select_fragments(fragments)
+    original_length = sorted_fragments[0].original_length
+
+    target = np.frombuffer(as_byte_view(out), dtype=np.uint8)
+    if not target.flags.writeable:
+        raise ValueError("out must be a writable buffer")
+    if target.size < original_length:
+        raise ValueError(
+            f"out holds {target.size} bytes; need at least {original_length}"
+        )
+
+    _decode_into(
+        sorted_fragments, target[:original_length], workers, use_processes, parallel_threshold
+    )
+    return original_length
+
+
+def _select_fragments(fragments: list[Fragment]) -> list[Fragment]:
     if not fragments:
         raise ValueError("At least one fragment is required")
 
@@ -12,7 +77,6 @@ def decode(fragments: list[Fragment]) -> bytes:
     block_id = fragments[0].block_id
     n = fragments[0].total_n
     m = fragments[0].threshold_m
-    original_length = fragments[0].original_length
 
     seen_indices: set[int] = set()
     for fragment in fragments:
@@ -38,29 +102,88 @@ def decode(fragments: list[Fragment]) -> bytes:
         raise ValueError(f"Need at least {m} fragments to decode, got {len(fragments)}")
 
     # Decode with exactly m fragments; extra valid fragments are not needed.
-    sorted_fragments = sorted(fragments, key=lambda f: f.index)[:m]
+    # Sorting by index prefers the systematic (data) fragments 0..m-1.
+    return sorted(fragments, key=lambda f: f.index)[:m]
+
+
+def _decode_into(
+    sorted_fragments: list[Fragment],
+    target: np.ndarray,
+    workers: int,
+    use_processes: bool,
+    parallel_threshold: int,
+) -> None:
+    n = sorted_fragments[0].total_n
+    m = sorted_fragments[0].threshold_m
+    original_length = target.size
     chunk_size = len(sorted_fragments[0].data)
     fragment_indices = [fragment.index for fragment in sorted_fragments]
-
-    coding_matrix = CodingMatrix(m=m, n=n)
+    received = [np.frombuffer(fragment.data, dtype=np.uint8) for fragment in sorted_fragments]
+
+    def chunk_span(chunk_index: int) -> tuple[int, int]:
+        start = min(chunk_index * chunk_size, original_length)
+        return start, min(start + chunk_size, original_length)
+
+    # Data chunks we already hold are copied through once.
+    for row, index in enumerate(fragment_indices):
+        if index < m:
+            start, stop = chunk_span(index)
+            target[start:stop] = received[row][: stop - start]
+
+    # Only the missing chunks are rebuilt, each from one row of the inverse
+    # applied to the received fragment buffers.
+    missing_chunks = [j for j in range(m) if j not in fragment_indices]
+    if not missing_chunks:
+        return
     try:
-        decoding_matrix = coding_matrix.submatrix(fragment_indices).invert()
+        decoding_matrix = decoding_matrix_for(m, n, tuple(fragment_indices))
     except ValueError as error:
         raise DecodingError("Could not invert erasure coding sub-matrix") from error
 
-    byte_chunks = [bytearray() for _ in range(m)]
-    for byte_position in range(chunk_size):
-        received_symbols: list[int] = []
-        for fragment in sorted_fragments:
-            received_symbols.append(fragment.data[byte_position])
-
-        decoded_stripe = decoding_matrix.encode(received_symbols)
-        for chunk_index, decoded_byte in enumerate(decoded_stripe):
-            byte_chunks[chunk_index].append(decoded_byte)
-
-    # Remove zero padding added during encoding.
-    padded_data = b"".join(bytes(chunk) for chunk in byte_chunks)
-    return padded_data[:original_length]
+    if should_parallelize(original_length, workers, parallel_threshold):
+        rebuilt = parallel_encode_chunks(
+            decoding_matrix,
+            received,
+            rows=missing_chunks,
+            workers=workers,
+            use_processes=use_processes,
+        )
+        for row, chunk_index in enumerate(missing_chunks):
+            start, stop = chunk_span(chunk_index)
+            target[start:stop] = rebuilt[row, : stop - start]
+        return
+
+    for chunk_index in missing_chunks:
+        start, stop = chunk_span(chunk_index)
+        if stop - start == chunk_size:
+            # Full chunk: write the product straight into the output.
+            decoding_matrix.encode_chunks(
+                received, out=target[start:stop].reshape(1, chunk_size), rows=[chunk_index]
+            )
+        elif stop > start:
+            # Last chunk: drop the encoder's zero padding.
+            rebuilt = decoding_matrix.encode_chunks(received, rows=[chunk_index])
+            target[start:stop] = rebuilt[0, : stop - start]
+
+
+@lru_cache(maxsize=DECODING_CACHE_SIZE)
+def decoding_matrix_for(m: int, n: int, indices: tuple[int, ...]) -> CodingMatrix:
+    """Return the (cached) inverse of the coding sub-matrix for `indices`."""
+    return CodingMatrix(m=m, n=n).submatrix(list(indices)).invert()
+
+
+def warm_decoding_cache(m: int, n: int) -> int:
+    """Pre-compute inverses for every m-subset of n fragments.
+
+    Only done when all C(n, m) subsets fit in the cache; returns the number
+    of subsets warmed (0 if n is too large to enumerate).
+    """
+    subset_count = comb(n, m)
+    if subset_count > DECODING_CACHE_SIZE:
+        return 0
+    for indices in combinations(range(n), m):
+        decoding_matrix_for(m, n, indices)
+    return subset_count
 
 
 class DecodingError(Exception):
@@ -2,74 +2,183 @@ from __future__ import annotations
 
 import hashlib
 from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
 
 from .matrix import CodingMatrix
+from .parallel import PARALLEL_THRESHOLD, parallel_encode_chunks, should_parallelize
+
+
+# Anything exposing the buffer protocol: bytes, bytearray, memoryview, mmap,
+# NumPy arrays, ...
+Buffer = bytes | bytearray | memoryview
 
 
 @dataclass
 class Fragment:
     index: int
-    data: bytes
+    data: bytes | memoryview
     block_id: str
     total_n: int
     threshold_m: int
     original_length: int
 
+    def __post_init__(self) -> None:
+        # Keep non-bytes payloads as flat byte views so len() is a byte count.
+        if not isinstance(self.data, bytes):
+            self.data = as_byte_view(self.data)
+
 
 def encode(
-    data: bytes,
+    data: Buffer,
     n: int = 5,
     m: int = 3,
     block_id: str = "",
+    workers: int = 1,
+    use_processes: bool = False,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+    copy: bool = True,
 ) -> list[Fragment]:
-    if not data:
+    # With copy=False, Fragment.data is a memoryview: data fragments alias the
+    # input buffer (or its single padded copy) and parity fragments share one
+    # freshly allocated backing array.  The caller must keep `data` unchanged
+    # while the fragments are in use.
+    view = as_byte_view(data)
+    if not view.nbytes:
         raise ValueError("data must not be empty")
 
     coding_matrix = CodingMatrix(m=m, n=n)
 
     if not block_id:
-        block_id = hashlib.sha256(data).hexdigest()
-
-    # Pad data so that it splits evenly into m chunks.
-    padded_data = _pad(data, m)
-
-    # Split padded data into m equal-length chunks.
-    chunk_size = len(padded_data) // m
-    byte_chunks: list[bytes] = []
-    for chunk_index in range(m):
-        start = chunk_index * chunk_size
-        end = start + chunk_size
-        byte_chunks.append(padded_data[start:end])
-
-    fragment_outputs = [bytearray() for _ in range(n)]
-
-    for byte_position in range(chunk_size):
-        stripe: list[int] = []
-        for chunk in byte_chunks:
-            stripe.append(chunk[byte_position])
-
-        codeword = coding_matrix.encode(stripe)
-
-        for fragment_index, encoded_byte in enumerate(codeword):
-            fragment_outputs[fragment_index].append(encoded_byte)
+        block_id = hashlib.sha256(view).hexdigest()
+
+    # Pad data so that it splits evenly into m chunks, then view the padded
+    # buffer as an (m, chunk_size) array: row j is data chunk j.
+    byte_chunks = _pad(view, m)
+    chunk_size = byte_chunks.shape[1]
+
+    # Identity rows are just the data chunks, so only the parity rows are
+    # computed (whole-chunk table lookups, optionally across a pool).
+    parity_rows = list(range(m, n))
+    if not parity_rows:
+        parity_outputs = np.empty((0, chunk_size), dtype=np.uint8)
+    elif should_parallelize(view.nbytes, workers, parallel_threshold):
+        parity_outputs = parallel_encode_chunks(
+            coding_matrix,
+            byte_chunks,
+            rows=parity_rows,
+            workers=workers,
+            use_processes=use_processes,
+        )
+    else:
+        parity_outputs = coding_matrix.encode_chunks(byte_chunks, rows=parity_rows)
 
     # Collect fragment buffers into Fragment objects with shared metadata.
     fragments: list[Fragment] = []
-    for fragment_index, fragment_data in enumerate(fragment_outputs):
+    for fragment_index in range(n):
+        if fragment_index < m:
+            row = byte_chunks[fragment_index]
+        else:
+            row = parity_outputs[fragment_index - m]
         fragments.append(
             Fragment(
                 index=fragment_index,
-                data=bytes(fragment_data),
+                data=row.tobytes() if copy else memoryview(row),
                 block_id=block_id,
                 total_n=n,
                 threshold_m=m,
-                original_length=len(data),
+                original_length=view.nbytes,
             )
         )
     return fragments
 
 
-def _pad(data: bytes, m: int) -> bytes:
-    remainder = len(data) % m
+def encode_many(
+    objects: Sequence[Buffer],
+    n: int = 5,
+    m: int = 3,
+    block_ids: Sequence[str] | None = None,
+    copy: bool = True,
+) -> list[list[Fragment]]:
+    # Batch form of encode() for many (typically small) objects.  Each object
+    # is padded and split exactly as encode() would, and its m chunks are laid
+    # out side by side as a column range of one (m, total_width) array, so the
+    # parity of every object comes from a single encode_chunks() call.
+    # Fragments are byte-identical to encoding each object separately.
+    if block_ids is not None and len(block_ids) != len(objects):
+        raise ValueError("block_ids must have one entry per object")
+    if not objects:
+        return []
+
+    coding_matrix = CodingMatrix(m=m, n=n)
+    views = [as_byte_view(obj) for obj in objects]
+    lengths = np.array([view.nbytes for view in views], dtype=np.int64)
+    if (lengths == 0).any():
+        raise ValueError("data must not be empty")
+
+    chunk_sizes = -(-lengths // m)
+    column_offsets = np.cumsum(chunk_sizes) - chunk_sizes
+    total_width = int(chunk_sizes.sum())
+
+    # Scatter every input byte to (chunk row, column) in one vectorized step:
+    # byte p of object k goes to row p // cs_k, column offset_k + p % cs_k.
+    flat = np.frombuffer(b"".join(views), dtype=np.uint8)
+    object_starts = np.cumsum(lengths) - lengths
+    position = np.arange(flat.size, dtype=np.int64) - np.repeat(object_starts, lengths)
+    byte_chunk_sizes = np.repeat(chunk_sizes, lengths)
+    byte_chunks = np.zeros((m, total_width), dtype=np.uint8)
+    byte_chunks[
+        position // byte_chunk_sizes,
+        np.repeat(column_offsets, lengths) + position % byte_chunk_sizes,
+    ] = flat
+
+    parity_outputs = coding_matrix.encode_chunks(byte_chunks, rows=list(range(m, n)))
+
+    # Slice per-object fragments out of whole rows; slicing bytes/memoryview
+    # is much cheaper than slicing NumPy arrays once per fragment.
+    rows: list[bytes | memoryview] = []
+    for output in (byte_chunks, parity_outputs):
+        for row in output:
+            rows.append(row.tobytes() if copy else memoryview(row))
+
+    results: list[list[Fragment]] = []
+    for view, start, size in zip(views, column_offsets.tolist(), chunk_sizes.tolist()):
+        block_id = block_ids[len(results)] if block_ids is not None else ""
+        if not block_id:
+            block_id = hashlib.sha256(view).hexdigest()
+        results.append(
+            [
+                Fragment(
+                    index=fragment_index,
+                    data=rows[fragment_index][start : start + size],
+                    block_id=block_id,
+                    total_n=n,
+                    threshold_m=m,
+                    original_length=view.nbytes,
+                )
+                for fragment_index in range(n)
+            ]
+        )
+    return results
+
+
+def as_byte_view(data: Buffer) -> memoryview:
+    """Return a flat, unsigned-byte memoryview over any buffer (no copy)."""
+    view = memoryview(data)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+def _pad(data: memoryview, m: int) -> np.ndarray:
+    # Zero-copy when len(data) is already a multiple of m; otherwise one copy
+    # into a zero-filled buffer.
+    remainder = data.nbytes % m
     padding_needed = (m - remainder) % m
-    return data + (b"\x00" * padding_needed)
+    chunk_size = (data.nbytes + padding_needed) // m
+    if not padding_needed:
+        return np.frombuffer(data, dtype=np.uint8).reshape(m, chunk_size)
+    padded = np.zeros(m * chunk_size, dtype=np.uint8)
+    padded[: data.nbytes] = np.frombuffer(data, dtype=np.uint8)
+    return padded.reshape(m, chunk_size)
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from src.fingerprint.field import gf_add, gf_inv, gf_mul
+from typing import Sequence
+
+import numpy as np
+
+from src.fingerprint.field import MUL_TABLE, gf_add, gf_inv, gf_mul
 
 
 class CodingMatrix:
@@ -43,6 +47,45 @@ class CodingMatrix:
             result.append(acc)
         return result
 
+    def encode_chunks(
+        self,
+        chunks: Sequence[np.ndarray],
+        out: np.ndarray | None = None,
+        rows: Sequence[int] | None = None,
+    ) -> np.ndarray:
+        # Whole-buffer form of encode(): chunks[j] holds data symbol j for
+        # every byte position, and output row k is sum_j M[rows[k]][j] * chunks[j].
+        # `rows` restricts the product to a subset of matrix rows (default: all).
+        if len(chunks) != self.m:
+            raise ValueError(f"expected {self.m} chunks, got {len(chunks)}")
+        width = len(chunks[0])
+        if any(len(chunk) != width for chunk in chunks):
+            raise ValueError("chunks must all have the same length")
+
+        row_indices = range(self.n) if rows is None else rows
+        if out is None:
+            out = np.empty((len(row_indices), width), dtype=np.uint8)
+        elif out.shape != (len(row_indices), width):
+            raise ValueError(f"out must have shape ({len(row_indices)}, {width}); got {out.shape}")
+
+        for k, i in enumerate(row_indices):
+            acc = out[k]
+            written = False
+            for j, coeff in enumerate(self._matrix[i]):
+                if coeff == 0:
+                    continue
+                # Multiplying by 1 is a plain copy; anything else is one
+                # 256-entry table gather over the whole chunk.
+                term = chunks[j] if coeff == 1 else MUL_TABLE[coeff][chunks[j]]
+                if written:
+                    np.bitwise_xor(acc, term, out=acc)
+                else:
+                    acc[...] = term
+                    written = True
+            if not written:
+                acc.fill(0)
+        return out
+
     def submatrix(self, row_indices: list[int]) -> CodingMatrix:
         if len(row_indices) != self.m:
             raise ValueError(f"expected {self.m} row indices, got {len(row_indices)}")
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Sequence
+
+import numpy as np
+
+from .matrix import CodingMatrix
+
+# Objects smaller than this are encoded/decoded serially: below a few MB the
+# cost of dispatching work to a pool outweighs the per-core speedup.
+PARALLEL_THRESHOLD: int = 8 * 1024 * 1024
+
+# Each worker gets several column ranges so uneven scheduling evens out.
+_RANGES_PER_WORKER: int = 4
+_MIN_RANGE_BYTES: int = 256 * 1024
+
+_executors: dict[tuple[bool, int], Executor] = {}
+_executors_guard = threading.Lock()
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def should_parallelize(size: int, workers: int, threshold: int = PARALLEL_THRESHOLD) -> bool:
+    return workers > 1 and size >= threshold
+
+
+def parallel_encode_chunks(
+    matrix: CodingMatrix,
+    chunks: Sequence[np.ndarray],
+    rows: Sequence[int] | None = None,
+    workers: int | None = None,
+    use_processes: bool = False,
+) -> np.ndarray:
+    """CodingMatrix.encode_chunks() split across column (stripe) ranges.
+
+    Every output column depends only on the same input column, so disjoint
+    ranges are independent.  Threads work on the caller's arrays directly;
+    processes exchange data through multiprocessing.shared_memory so
+    nothing is pickled but the segment names.
+    """
+    workers = workers or default_workers()
+    row_indices = list(range(matrix.n)) if rows is None else list(rows)
+    width = len(chunks[0])
+    ranges = _column_ranges(width, workers * _RANGES_PER_WORKER)
+
+    if use_processes:
+        return _encode_in_processes(matrix, chunks, row_indices, ranges, workers)
+
+    out = np.empty((len(row_indices), width), dtype=np.uint8)
+    executor = _get_executor(False, workers)
+    futures = [
+        executor.submit(
+            matrix.encode_chunks,
+            [chunk[start:stop] for chunk in chunks],
+            out[:, start:stop],
+            row_indices,
+        )
+        for start, stop in ranges
+    ]
+    for future in futures:
+        future.result()
+    return out
+
+
+def _encode_in_processes(
+    matrix: CodingMatrix,
+    chunks: Sequence[np.ndarray],
+    rows: list[int],
+    ranges: list[tuple[int, int]],
+    workers: int,
+) -> np.ndarray:
+    width = len(chunks[0])
+    source = shared_memory.SharedMemory(create=True, size=max(1, matrix.m * width))
+    target = shared_memory.SharedMemory(create=True, size=max(1, len(rows) * width))
+    try:
+        shared_in = np.ndarray((matrix.m, width), dtype=np.uint8, buffer=source.buf)
+        for j, chunk in enumerate(chunks):
+            shared_in[j] = chunk
+        del shared_in
+
+        executor = _get_executor(True, workers)
+        futures = [
+            executor.submit(
+                _encode_shared_range, matrix, rows, source.name, target.name, width, start, stop
+            )
+            for start, stop in ranges
+        ]
+        for future in futures:
+            future.result()
+
+        shared_out = np.ndarray((len(rows), width), dtype=np.uint8, buffer=target.buf)
+        out = shared_out.copy()
+        del shared_out
+        return out
+    finally:
+        source.close()
+        source.unlink()
+        target.close()
+        target.unlink()
+
+
+def _encode_shared_range(
+    matrix: CodingMatrix,
+    rows: list[int],
+    source_name: str,
+    target_name: str,
+    width: int,
+    start: int,
+    stop: int,
+) -> None:
+    # Runs in a worker process.  Pool workers share the parent's resource
+    # tracker, and the parent owns (and unlinks) both segments.
+    source = shared_memory.SharedMemory(name=source_name)
+    target = shared_memory.SharedMemory(name=target_name)
+    try:
+        shared_in = np.ndarray((matrix.m, width), dtype=np.uint8, buffer=source.buf)
+        shared_out = np.ndarray((len(rows), width), dtype=np.uint8, buffer=target.buf)
+        matrix.encode_chunks(shared_in[:, start:stop], out=shared_out[:, start:stop], rows=rows)
+        del shared_in, shared_out
+    finally:
+        source.close()
+        target.close()
+
+
+def _column_ranges(width: int, parts: int) -> list[tuple[int, int]]:
+    span = max(_MIN_RANGE_BYTES, -(-width // max(parts, 1)))
+    return [(start, min(start + span, width)) for start in range(0, width, span)]
+
+
+def shutdown_executors() -> None:
+    """Shut down the worker pools; the next parallel call starts new ones."""
+    with _executors_guard:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+atexit.register(shutdown_executors)
+
+
+def _get_executor(use_processes: bool, workers: int) -> Executor:
+    # Pools are kept until shutdown_executors() (at the latest, interpreter
+    # exit): spinning up worker processes per call would cost more than the
+    # encode itself.
+    key = (use_processes, workers)
+    with _executors_guard:
+        executor = _executors.get(key)
+        if executor is None:
+            if use_processes:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="veri-store-erasure"
+                )
+            _executors[key] = executor
+        return executor
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import io
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, Mapping
+
+import numpy as np
+
+from .decoder import DecodingError, decoding_matrix_for
+from .matrix import CodingMatrix
+
+# Bytes of each fragment produced (or consumed) per step.  Peak memory is
+# roughly (n + m) * window_size regardless of the object size.
+DEFAULT_WINDOW_SIZE: int = 1024 * 1024
+
+Source = BinaryIO | bytes | bytearray | memoryview
+
+
+def chunk_size_for(length: int, m: int) -> int:
+    """Per-fragment byte length encode() produces for an object of `length` bytes."""
+    return -(-length // m)
+
+
+def encode_stream(
+    source: Source | Iterable[bytes],
+    n: int = 5,
+    m: int = 3,
+    length: int | None = None,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+) -> Iterator[list[bytes]]:
+    """Encode `source` window by window.
+
+    Each yielded item holds the next `window_size` bytes of every fragment
+    (index order).  Concatenating the pieces per index gives exactly the
+    Fragment.data that encode() would return for the same input.
+
+    Fragment byte k mixes input bytes k, k + chunk_size, k + 2*chunk_size, ...
+    so the input must be randomly accessible: seekable files and buffers are
+    read in place, while plain iterables of bytes are first spooled to a
+    temporary file (on disk once they outgrow one window).
+    """
+    if window_size <= 0:
+        raise ValueError("window_size must be positive")
+    coding_matrix = CodingMatrix(m=m, n=n)
+
+    spooled: BinaryIO | None = None
+    if not _is_random_access(source):
+        spooled = tempfile.SpooledTemporaryFile(max_size=window_size * m)
+        for piece in source:  # type: ignore[union-attr]
+            spooled.write(piece)
+        source = spooled
+
+    try:
+        if length is None:
+            length = _source_length(source)  # type: ignore[arg-type]
+        if length <= 0:
+            raise ValueError("data must not be empty")
+
+        chunk_size = chunk_size_for(length, m)
+        window = np.empty((m, min(window_size, chunk_size)), dtype=np.uint8)
+        for offset in range(0, chunk_size, window_size):
+            width = min(window_size, chunk_size - offset)
+            chunks = window[:, :width]
+            for j in range(m):
+                start = j * chunk_size + offset
+                _read_into(source, start, chunks[j], max(0, min(width, length - start)))  # type: ignore[arg-type]
+            encoded = coding_matrix.encode_chunks(chunks)
+            yield [encoded[i].tobytes() for i in range(n)]
+    finally:
+        if spooled is not None:
+            spooled.close()
+
+
+def decode_stream(
+    sources: Mapping[int, Source],
+    n: int,
+    m: int,
+    original_length: int,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+) -> Iterator[bytes]:
+    """Reconstruct the original object from fragment sources, in order.
+
+    `sources` maps fragment index to a seekable file or buffer holding that
+    fragment's bytes; any m distinct indices suffice.  Output is yielded in
+    pieces of at most `window_size` bytes.  Data chunks that are present are
+    streamed straight from their fragment; missing ones are rebuilt window by
+    window from m fragments.
+    """
+    if window_size <= 0:
+        raise ValueError("window_size must be positive")
+    if len(sources) < m:
+        raise ValueError(f"Need at least {m} fragments to decode, got {len(sources)}")
+    if any(index < 0 or index >= n for index in sources):
+        raise ValueError("Fragment index is out of range")
+
+    chunk_size = chunk_size_for(original_length, m)
+    for index, source in sources.items():
+        if _source_length(source) != chunk_size:
+            raise ValueError(f"Fragment {index} does not hold {chunk_size} bytes")
+
+    fragment_indices = sorted(sources)[:m]
+    decoding_matrix: CodingMatrix | None = None
+    received = np.empty((m, min(window_size, chunk_size)), dtype=np.uint8)
+    decoded = np.empty((1, min(window_size, chunk_size)), dtype=np.uint8)
+
+    remaining = original_length
+    for chunk_index in range(m):
+        for offset in range(0, chunk_size, window_size):
+            if remaining <= 0:
+                return
+            width = min(window_size, chunk_size - offset)
+
+            if chunk_index in sources:
+                piece = decoded[0, :width]
+                _read_into(sources[chunk_index], offset, piece, width)
+            else:
+                if decoding_matrix is None:
+                    try:
+                        decoding_matrix = decoding_matrix_for(m, n, tuple(fragment_indices))
+                    except ValueError as error:
+                        raise DecodingError("Could not invert erasure coding sub-matrix") from error
+                window = received[:, :width]
+                for row, index in enumerate(fragment_indices):
+                    _read_into(sources[index], offset, window[row], width)
+                decoding_matrix.encode_chunks(window, out=decoded[:, :width], rows=[chunk_index])
+                piece = decoded[0, :width]
+
+            emitted = piece[: min(width, remaining)]
+            remaining -= emitted.size
+            yield emitted.tobytes()
+
+
+def _is_random_access(source: object) -> bool:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return True
+    seekable = getattr(source, "seekable", None)
+    return callable(seekable) and bool(seekable())
+
+
+def _source_length(source: Source) -> int:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source).nbytes
+    current = source.tell()
+    end = source.seek(0, io.SEEK_END)
+    source.seek(current)
+    return end
+
+
+def _read_into(source: Source, offset: int, out: np.ndarray, size: int) -> None:
+    # Fill out[:size] from source[offset:offset + size] and zero the rest.
+    if size > 0:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            out[:size] = np.frombuffer(source, dtype=np.uint8, count=size, offset=offset)
+        else:
+            source.seek(offset)
+            view = memoryview(out[:size])
+            filled = 0
+            while filled < size:
+                read = source.readinto(view[filled:])  # type: ignore[attr-defined]
+                if not read:
+                    raise ValueError("source ended before the expected length")
+                filled += read
+    out[max(size, 0):] = 0
@@ -1,3 +1,3 @@
 from .field import GF256
 from .polynomial import Polynomial
-from .fingerprint import fingerprint, random_point
+from .fingerprint import fingerprint, fingerprint_block, fingerprint_many, random_point
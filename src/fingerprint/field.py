@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
+import numpy as np
+
 IRREDUCIBLE_POLY: int = 0x11B
 
 # Pre-compute the multiplicative inverse table for all non-zero elements.
@@ -156,3 +160,93 @@ def gf_inv(a: int) -> int:
     if a == 0:
         raise ZeroDivisionError("zero element has no multiplicative inverse in GF(2^8)")
     return _INVERSE_TABLE[a]
+
+
+# ---------------------------------------------------------------------------
+# Vectorized helpers for whole-buffer arithmetic
+# ---------------------------------------------------------------------------
+
+# The multiplicative group of GF(2^8) has order 255, so r^i repeats with
+# period 255 for every non-zero r.
+GF_ORDER: int = 255
+
+
+_EXP_ARRAY = np.array(_EXP, dtype=np.uint8)
+_LOG_ARRAY = np.array(_LOG, dtype=np.int64)
+
+
+def _build_mul_table() -> np.ndarray:
+    table = _EXP_ARRAY[(_LOG_ARRAY[:, None] + _LOG_ARRAY[None, :]) % GF_ORDER]
+    table[0, :] = 0
+    table[:, 0] = 0
+    return table
+
+
+# MUL_TABLE[a, b] == gf_mul(a, b); MUL_TABLE[a] is the 256-entry lookup row
+# for "multiply by a", which lets NumPy scale a whole buffer with one gather.
+MUL_TABLE: np.ndarray = _build_mul_table()
+
+
+def as_uint8_array(data: bytes | bytearray | memoryview | np.ndarray) -> np.ndarray:
+    """Return a read-only uint8 view of any buffer-protocol object (no copy)."""
+    if isinstance(data, np.ndarray) and data.dtype == np.uint8:
+        return data.reshape(-1)
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+# Power vectors are cached per (r, length).  Only vectors up to this length
+# are kept; longer ones are tiled from the cached 255-element period, so the
+# cache stays within a few MB however long the fingerprinted buffers are.
+POWER_VECTOR_CACHE_SIZE: int = 512
+POWER_VECTOR_CACHE_MAX_LENGTH: int = 4096
+
+
+def gf_power_vector(r: int, length: int) -> np.ndarray:
+    """Return [r^0, r^1, ..., r^(length-1)] as a read-only uint8 array."""
+    if length <= POWER_VECTOR_CACHE_MAX_LENGTH:
+        return _cached_power_vector(r, max(length, 0))
+    if r == 0:
+        return _build_power_vector(r, length)
+    powers = np.resize(_cached_power_vector(r, GF_ORDER), length)
+    powers.flags.writeable = False
+    return powers
+
+
+@lru_cache(maxsize=POWER_VECTOR_CACHE_SIZE)
+def _cached_power_vector(r: int, length: int) -> np.ndarray:
+    return _build_power_vector(r, length)
+
+
+def _build_power_vector(r: int, length: int) -> np.ndarray:
+    if length <= 0:
+        powers = np.zeros(0, dtype=np.uint8)
+    elif r == 0:
+        powers = np.zeros(length, dtype=np.uint8)
+        powers[0] = 1
+    else:
+        exponents = (np.arange(min(length, GF_ORDER), dtype=np.int64) * _LOG[r]) % GF_ORDER
+        powers = np.resize(_EXP_ARRAY[exponents], length)
+    # Cached arrays are shared between callers.
+    powers.flags.writeable = False
+    return powers
+
+
+def gf_power_segments(points: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenation of gf_power_vector(points[k], lengths[k]) for every k.
+
+    Built with a handful of whole-array operations, so the cost does not
+    depend on how many (possibly tiny) segments there are.
+    """
+    points = np.asarray(points, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    position = np.arange(int(lengths.sum()), dtype=np.int64) - np.repeat(starts, lengths)
+    segment_points = np.repeat(points, lengths)
+
+    exponents = ((position % GF_ORDER) * _LOG_ARRAY[segment_points]) % GF_ORDER
+    powers = _EXP_ARRAY[exponents]
+    # 0^0 = 1 and 0^i = 0 for i > 0.
+    zero_point = segment_points == 0
+    powers[zero_point] = (position[zero_point] == 0).astype(np.uint8)
+    return powers
+
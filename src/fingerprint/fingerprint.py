@@ -1,12 +1,79 @@
 from __future__ import annotations
 
-from .field import GF256
-from .polynomial import Polynomial
+from typing import Sequence
 
+import numpy as np
 
-def fingerprint(r: GF256, data: bytes) -> GF256:
-    poly = Polynomial.from_bytes(data)
-    return poly.evaluate(r)
+from .field import (
+    GF256,
+    GF_ORDER,
+    MUL_TABLE,
+    as_uint8_array,
+    gf_power_segments,
+    gf_power_vector,
+)
+
+
+def fingerprint(r: GF256, data: bytes | bytearray | memoryview) -> GF256:
+    # Evaluates the polynomial with coefficients data[0], data[1], ... at r,
+    # i.e. sum(data[i] * r^i).  Bit-identical to
+    # Polynomial.from_bytes(data).evaluate(r), but computed on the raw buffer.
+    return fingerprint_block(r, [data])[0]
+
+
+def fingerprint_block(
+    r: GF256,
+    buffers: Sequence[bytes | bytearray | memoryview],
+) -> list[GF256]:
+    # fingerprint(r, b) for every buffer sharing the same point r, e.g. the m
+    # data fragments of one block.
+    #
+    # r^i has period 255, so bytes whose positions agree mod 255 share the
+    # same power.  Each buffer is XOR-folded into 255 lanes (distributivity),
+    # giving a (len(buffers), 255) matrix; all fingerprints are then one
+    # matrix-vector product with the cached power vector [1, r, ..., r^254].
+    views = [as_uint8_array(b) for b in buffers]
+    if r.value == 0:
+        # 0^i = 0 for i > 0, so only the constant term survives.
+        return [GF256(int(v[0])) if v.size else GF256(0) for v in views]
+
+    folded = np.zeros((len(views), GF_ORDER), dtype=np.uint8)
+    for row, view in enumerate(views):
+        full = (view.size // GF_ORDER) * GF_ORDER
+        if full:
+            np.bitwise_xor.reduce(view[:full].reshape(-1, GF_ORDER), axis=0, out=folded[row])
+        tail = view[full:]
+        folded[row, : tail.size] ^= tail
+
+    powers = gf_power_vector(r.value, GF_ORDER)
+    products = MUL_TABLE[powers[None, :], folded]
+    return [GF256(int(v)) for v in np.bitwise_xor.reduce(products, axis=1)]
+
+
+def fingerprint_many(
+    points: Sequence[GF256],
+    buffers: Sequence[bytes | bytearray | memoryview],
+) -> list[GF256]:
+    # fingerprint(points[k], buffers[k]) for every k, computed as one pass
+    # over the concatenated buffers: a single power-vector build, one table
+    # gather and a segmented XOR-reduce, instead of per-buffer Python calls.
+    if len(points) != len(buffers):
+        raise ValueError("points and buffers must have the same length")
+    if not buffers:
+        return []
+
+    views = [as_uint8_array(b) for b in buffers]
+    lengths = np.array([v.size for v in views], dtype=np.int64)
+    flat = np.concatenate(views)
+    powers = gf_power_segments(np.array([p.value for p in points]), lengths)
+    products = MUL_TABLE[powers, flat]
+
+    results = np.zeros(len(views), dtype=np.uint8)
+    nonempty = lengths > 0
+    if nonempty.any():
+        starts = (np.cumsum(lengths) - lengths)[nonempty]
+        results[nonempty] = np.bitwise_xor.reduceat(products, starts)
+    return [GF256(int(v)) for v in results]
 
 
 def random_point(seed: bytes) -> GF256:
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+# Default memory budget for cached GET responses.
+DEFAULT_CACHE_BYTES: int = 64 * 1024 * 1024
+
+# Keys whose last invalidation is remembered individually; past this the
+# record is dropped and older reads are refused for every key.
+_MAX_TRACKED_INVALIDATIONS: int = 65536
+
+CacheKey = tuple[str, int]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+
+class FragmentCache:
+    """Byte-budgeted LRU cache of serialized GET responses, keyed by (block_id, index).
+
+    Values are the exact response bodies, so a hit skips the disk read, the
+    base64 step and JSON serialization.  A max_bytes of 0 disables caching.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative.")
+
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[CacheKey, bytes] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        # Bumped by every invalidation; _invalidated maps a key to the
+        # generation of its last one.  A value read at generation G is stale,
+        # and not stored, if its own key was invalidated after G (or G is
+        # older than _floor, the point _invalidated was last cleared from).
+        self._generation = 0
+        self._invalidated: dict[CacheKey, int] = {}
+        self._floor = 0
+
+        self._lock = Lock()
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, key: CacheKey) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: CacheKey, value: bytes, generation: int) -> bool:
+        """Cache `value` unless it is too large or was read before `key` was invalidated."""
+        size = len(value)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if generation < self._floor or self._invalidated.get(key, -1) > generation:
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+            return True
+
+    def invalidate(self, key: CacheKey) -> None:
+        with self._lock:
+            self._generation += 1
+            if key not in self._invalidated and len(self._invalidated) >= _MAX_TRACKED_INVALIDATIONS:
+                self._invalidated.clear()
+                self._floor = self._generation
+            self._invalidated[key] = self._generation
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+            )
@@ -9,7 +9,7 @@ from dataclasses import dataclass
 import httpx
 from pydantic import ValidationError
 
-from src.erasure.decoder import decode
+from src.erasure.decoder import decode, warm_decoding_cache
 from src.erasure.encoder import Fragment, encode
 from src.network.protocol import GetFragmentResponse, StoreFragmentRequest
 from src.verification.cross_checksum import FingerprintedCrossChecksum
@@ -56,6 +56,10 @@ class VeriStoreClient:
         self.timeout = timeout
         self.token = token
 
+        # Degraded reads reuse pre-inverted sub-matrices instead of running
+        # Gauss-Jordan elimination on every GET.
+        warm_decoding_cache(m, len(servers))
+
     def _request_with_retry(
         self,
         method: str,
@@ -83,7 +87,9 @@ class VeriStoreClient:
         return None
 
     def put(self, block_id: str, data: bytes) -> str:
-        fragments = encode(data, n=len(self.servers), m=self.m, block_id=block_id)
+        # Fragments are views into one backing buffer; they only live until
+        # the request bodies below are built.
+        fragments = encode(data, n=len(self.servers), m=self.m, block_id=block_id, copy=False)
         fpcc = FingerprintedCrossChecksum.generate(fragments)
         fpcc_json = fpcc.to_json()
 
@@ -52,6 +52,7 @@ class StoreFragmentResponse(BaseModel):
     index: int
     verification_status: str
     message: str
+    durability: str = "fsync"
 
 
 class GetFragmentResponse(BaseModel):
@@ -65,6 +66,7 @@ class GetFragmentResponse(BaseModel):
     original_length: int
     fpcc_json: str
     verification_status: str
+    durability: str = "fsync"
 
 
 class DeleteFragmentResponse(BaseModel):
@@ -75,12 +77,90 @@ class DeleteFragmentResponse(BaseModel):
     message: str
 
 
+class BlockEntry(BaseModel):
+    """One block in a GET /blocks page."""
+
+    block_id: str
+    indices: list[int]
+
+
+class ListBlocksResponse(BaseModel):
+    """Response body for GET /blocks."""
+
+    blocks: list[BlockEntry]
+    # Pass as `after` to fetch the next page; None on the last page.
+    next_after: str | None = None
+
+
+class UsageTotals(BaseModel):
+    """Fragment and byte totals for one verification status."""
+
+    fragments: int
+    payload_bytes: int
+    disk_bytes: int
+
+
+class StorageUsage(BaseModel):
+    """Capacity accounting reported by GET /health."""
+
+    fragments: int
+    payload_bytes: int
+    disk_bytes: int
+    invalid_fragments: int
+    by_status: dict[str, UsageTotals]
+    dedup_objects: int = 0
+    dedup_bytes: int = 0
+    disk_free_bytes: int | None = None
+    disk_total_bytes: int | None = None
+
+
 class HealthResponse(BaseModel):
     """Response body for GET /health."""
 
     server_id: int
     status: str
     fragment_count: int
+    storage: StorageUsage | None = None
+
+
+class CacheMetrics(BaseModel):
+    """Counters for the server's fragment response cache."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+
+class ScrubMetrics(BaseModel):
+    """Counters for the background integrity scrubber."""
+
+    passes: int
+    fragments: int
+    bytes: int
+    invalid: int
+    skipped: int
+
+
+class GcMetrics(BaseModel):
+    """Counters for the storage garbage collector."""
+
+    passes: int
+    invalid_removed: int
+    temp_files_removed: int
+    block_dirs_removed: int
+    objects_removed: int
+
+
+class MetricsResponse(BaseModel):
+    """Response body for GET /metrics."""
+
+    server_id: int
+    cache: CacheMetrics
+    scrubber: ScrubMetrics | None = None  # None when scrubbing is disabled
+    gc: GcMetrics | None = None  # None when garbage collection is disabled
 
 
 class ErrorResponse(BaseModel):
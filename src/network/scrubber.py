@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from ..storage.backend import StorageBackend
+from ..storage.fragment import VerificationStatus
+from ..storage.store import FragmentNotFoundError
+from ..verification.cross_checksum import FingerprintedCrossChecksum
+from ..verification.verifier import VerificationResult, Verifier
+
+_log = logging.getLogger(__name__)
+
+# Default budgets: a pass reads at most this many bytes per second and keeps
+# verification work to this share of one CPU.
+DEFAULT_SCRUB_BYTES_PER_SECOND: int = 8 * 1024 * 1024
+DEFAULT_SCRUB_CPU_SHARE: float = 0.1
+
+# Seconds between the end of one pass and the start of the next.
+DEFAULT_SCRUB_INTERVAL_SECONDS: float = 24 * 60 * 60
+
+LockFactory = Callable[[str, int], AbstractContextManager]
+
+
+@dataclass(frozen=True)
+class ScrubStats:
+    passes: int
+    fragments: int
+    bytes: int
+    invalid: int
+    skipped: int
+
+
+class Scrubber:
+    """Re-verifies stored fragments in the background.
+
+    Each pass walks every stored fragment, re-runs Verifier.check against
+    the record's own fpcc and records the outcome (status and verified_at)
+    through store.set_verification().  Between fragments it sleeps long
+    enough to stay within both budgets: `max_bytes_per_second` of fragment
+    data read, and `cpu_share` of one CPU (this thread's CPU time, so time
+    spent waiting for a fragment lock does not count).
+
+    `lock_for(block_id, index)` should return the server's per-fragment
+    lock, so a fragment is never re-verified while a PUT or DELETE of it is
+    in flight.  `on_update(block_id, index, status, verified_at)` runs after
+    each status update, still under that lock, with the values just written
+    (the server uses it to drop cached responses and keep its block catalog
+    current).
+    """
+
+    def __init__(
+        self,
+        store: StorageBackend,
+        lock_for: LockFactory | None = None,
+        max_bytes_per_second: float = DEFAULT_SCRUB_BYTES_PER_SECOND,
+        cpu_share: float = DEFAULT_SCRUB_CPU_SHARE,
+        interval: float = DEFAULT_SCRUB_INTERVAL_SECONDS,
+        on_update: Callable[[str, int, VerificationStatus, datetime], None] | None = None,
+    ) -> None:
+        if max_bytes_per_second <= 0:
+            raise ValueError("max_bytes_per_second must be positive")
+        if not 0.0 < cpu_share <= 1.0:
+            raise ValueError("cpu_share must be in (0, 1]")
+        if interval < 0:
+            raise ValueError("interval must not be negative")
+
+        self.store = store
+        self.lock_for = lock_for
+        self.max_bytes_per_second = max_bytes_per_second
+        self.cpu_share = cpu_share
+        self.interval = interval
+        self.on_update = on_update
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._guard = threading.Lock()
+        self._passes = 0
+        self._fragments = 0
+        self._bytes = 0
+        self._invalid = 0
+        self._skipped = 0
+
+    def start(self) -> threading.Thread:
+        """Run passes on a daemon thread until stop()."""
+        self._thread = threading.Thread(target=self._run, name="veri-store-scrubber", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> ScrubStats:
+        with self._guard:
+            return ScrubStats(
+                passes=self._passes,
+                fragments=self._fragments,
+                bytes=self._bytes,
+                invalid=self._invalid,
+                skipped=self._skipped,
+            )
+
+    def scrub_pass(self) -> int:
+        """Re-verify every stored fragment once; returns the number verified."""
+        verified = 0
+        started = time.monotonic()
+        bytes_read = 0
+        busy = 0.0  # CPU seconds used by this pass
+        fpcc_cache: tuple[str, FingerprintedCrossChecksum] | None = None
+
+        for block_id in self.store.list_blocks():
+            for index in self.store.list_indices(block_id):
+                if self._stop.is_set():
+                    return verified
+
+                cpu_started = time.thread_time()
+                with self.lock_for(block_id, index) if self.lock_for is not None else nullcontext():
+                    try:
+                        view = self.store.open_view(block_id, index)
+                    except FragmentNotFoundError:
+                        continue  # deleted since listing
+                    with view:
+                        fpcc_json = view.fpcc_json
+                        if not fpcc_json:
+                            with self._guard:
+                                self._skipped += 1
+                            continue
+                        # Fragments of one block share an fpcc: parse it once.
+                        if fpcc_cache is None or fpcc_cache[0] != fpcc_json:
+                            fpcc_cache = (fpcc_json, FingerprintedCrossChecksum.from_json(fpcc_json))
+                        report = Verifier.check(index, view.data, fpcc_cache[1])
+                        size = len(view.data)
+                        previous = view.verification_status
+
+                    status = (
+                        VerificationStatus.VALID
+                        if report.result == VerificationResult.CONSISTENT
+                        else VerificationStatus.INVALID
+                    )
+                    # A fragment that stays INVALID keeps the time it was found
+                    # invalid, which its GC retention is counted from.
+                    still_invalid = status is previous is VerificationStatus.INVALID
+                    if not still_invalid:
+                        verified_at = datetime.utcnow()
+                        self.store.set_verification(block_id, index, status, verified_at)
+                        if self.on_update is not None:
+                            self.on_update(block_id, index, status, verified_at)
+
+                if status is VerificationStatus.INVALID and not still_invalid:
+                    _log.warning(
+                        "Scrub found corrupt fragment (%s, %d): result=%s detail=%s",
+                        block_id,
+                        index,
+                        report.result.value,
+                        report.detail,
+                    )
+
+                verified += 1
+                bytes_read += size
+                busy += time.thread_time() - cpu_started
+                with self._guard:
+                    self._fragments += 1
+                    self._bytes += size
+                    if status is VerificationStatus.INVALID:
+                        self._invalid += 1
+
+                self._throttle(started, bytes_read, busy)
+
+        with self._guard:
+            self._passes += 1
+        return verified
+
+    def _throttle(self, started: float, bytes_read: int, busy: float) -> None:
+        # Sleep until both the byte rate and the busy share since the start
+        # of the pass are back within budget.
+        elapsed = time.monotonic() - started
+        wait = max(
+            bytes_read / self.max_bytes_per_second - elapsed,
+            busy / self.cpu_share - elapsed,
+        )
+        if wait > 0:
+            self._stop.wait(wait)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                verified = self.scrub_pass()
+                _log.info("Scrub pass verified %d fragments", verified)
+            except Exception:
+                _log.exception("Scrub pass failed")
+            if self._stop.wait(self.interval):
+                return
@@ -3,28 +3,61 @@ from __future__ import annotations
 import base64
 import logging
 import os
+import shutil
 import time
 import threading
+from datetime import datetime
 from pathlib import Path as _Path
 
-from fastapi import Depends, FastAPI, HTTPException, Path, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Path, Query, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 
-from ..storage.fragment import FragmentRecord, VerificationStatus
+from ..storage.fragment import Durability, FragmentRecord, FragmentView, VerificationStatus
 from ..storage.metadata import ObjectMetadata
+from ..storage.backend import StorageBackend
+from ..storage.catalog import CATALOG_NAME, BlockCatalog
+from ..storage.gc import DEFAULT_INVALID_RETENTION_SECONDS, GarbageCollector
+from ..storage.group_commit import DEFAULT_MAX_BATCH, DEFAULT_WINDOW_SECONDS
+from ..storage.layout import validate_block_id
+from ..storage.memory_store import MemoryStore
+from ..storage.segment_store import SegmentStore
+from ..storage.sqlite_store import SQLiteStore
 from ..storage.store import FragmentNotFoundError, FragmentStore
 from ..verification.cross_checksum import FingerprintedCrossChecksum
 from ..verification.verifier import VerificationResult, Verifier
+from .cache import DEFAULT_CACHE_BYTES, FragmentCache
 from .protocol import (
+    BlockEntry,
+    CacheMetrics,
     DeleteFragmentResponse,
+    GcMetrics,
     GetFragmentResponse,
     HealthResponse,
+    ListBlocksResponse,
+    MetricsResponse,
+    ScrubMetrics,
+    StorageUsage,
     StoreFragmentRequest,
     StoreFragmentResponse,
+    UsageTotals,
 )
 from ..verification.oracle import RandomOracle
 from .rate_limit import SlidingWindowRateLimiter
+from .scrubber import (
+    DEFAULT_SCRUB_BYTES_PER_SECOND,
+    DEFAULT_SCRUB_CPU_SHARE,
+    Scrubber,
+)
+
+# Raw fragment responses are streamed from the memory-mapped record in slices
+# of this size.
+RAW_CHUNK_SIZE: int = 1024 * 1024
+
+# Blocks per GET /blocks page: the default, and the most a client may ask for.
+DEFAULT_BLOCK_PAGE_SIZE: int = 1000
+MAX_BLOCK_PAGE_SIZE: int = 10_000
 
 # Module-level logger.  Each log message embeds server_id in the format
 # string so log lines from multiple server processes can be distinguished
@@ -44,12 +77,34 @@ def create_app(
     token: str = "",
     rate_limit_max_requests: int = 60,
     rate_limit_window_seconds: float = 60.0,
+    storage_backend: str = "filesystem",
+    group_commit_window: float | None = None,
+    group_commit_max_batch: int = DEFAULT_MAX_BATCH,
+    durability: Durability | str = Durability.FSYNC,
+    cache_max_bytes: int = DEFAULT_CACHE_BYTES,
+    shard_levels: int | None = None,
+    dedup: bool = False,
+    scrub_interval: float | None = None,
+    scrub_max_bytes_per_second: float = DEFAULT_SCRUB_BYTES_PER_SECOND,
+    scrub_cpu_share: float = DEFAULT_SCRUB_CPU_SHARE,
+    gc_interval: float | None = None,
+    invalid_retention: float = DEFAULT_INVALID_RETENTION_SECONDS,
 ) -> FastAPI:
     if not token:
         raise ValueError("API token must be provided for authentication")
 
+    # Server-wide default; a PUT may override it with an X-Durability header.
+    default_durability = Durability(durability)
+
     app = FastAPI(title=f"veri-store server {server_id}")
-    store = FragmentStore(f"{data_dir}/server_{server_id}")
+    store = open_store(
+        storage_backend,
+        f"{data_dir}/server_{server_id}",
+        group_commit_window=group_commit_window,
+        group_commit_max_batch=group_commit_max_batch,
+        shard_levels=shard_levels,
+        dedup=dedup,
+    )
     
     fragment_locks: dict[tuple[str, int], threading.Lock] = {}
     fragment_locks_guard = threading.Lock()
@@ -64,6 +119,60 @@ def create_app(
                 fragment_locks[key] = lock
             return lock
 
+    if isinstance(store, FragmentStore):
+        # Convert fragments written by older servers (JSON records) in the
+        # background; reads fall back to the JSON file until then.
+        store.start_legacy_migration(lock_for=get_fragment_lock)
+    elif isinstance(store, SegmentStore):
+        store.start_maintenance()
+
+    # Serialized GET responses for hot fragments; cache_max_bytes=0 disables it.
+    cache = FragmentCache(max_bytes=cache_max_bytes)
+
+    # Per-block metadata (indices held, n/m, created and last verified),
+    # updated under the fragment lock after every write and queryable
+    # without reading fragment files.
+    catalog = open_catalog(storage_backend, f"{data_dir}/server_{server_id}", store)
+    app.state.catalog = catalog
+
+    def on_scrubbed(block_id: str, index: int, status: VerificationStatus, verified_at: datetime) -> None:
+        cache.invalidate((block_id, index))
+        catalog.set_verification(block_id, index, status, verified_at)
+
+    def on_collected(block_id: str, index: int) -> None:
+        cache.invalidate((block_id, index))
+        catalog.remove_fragment(block_id, index)
+
+    # Re-verifies stored fragments every scrub_interval seconds (None: never),
+    # within the given I/O and CPU budgets.
+    scrubber: Scrubber | None = None
+    if scrub_interval is not None:
+        scrubber = Scrubber(
+            store,
+            lock_for=get_fragment_lock,
+            max_bytes_per_second=scrub_max_bytes_per_second,
+            cpu_share=scrub_cpu_share,
+            interval=scrub_interval,
+            on_update=on_scrubbed,
+        )
+        scrubber.start()
+    app.state.scrubber = scrubber
+
+    # Expires INVALID fragments after invalid_retention seconds and removes
+    # orphaned temp files and empty block directories, in small increments;
+    # passes start gc_interval seconds apart (None: never).
+    gc: GarbageCollector | None = None
+    if gc_interval is not None:
+        gc = GarbageCollector(
+            store,
+            lock_for=get_fragment_lock,
+            invalid_retention=invalid_retention,
+            interval=gc_interval,
+            on_delete=on_collected,
+        )
+        gc.start()
+    app.state.gc = gc
+
     rate_limiter = SlidingWindowRateLimiter(
         max_requests=rate_limit_max_requests,
         window_seconds=rate_limit_window_seconds
@@ -170,9 +279,24 @@ def create_app(
         body: StoreFragmentRequest,
         block_id: str = Path(min_length=1, description="Block identifier"),
         index: int = Path(ge=0, description="Fragment index (0-based)"),
+        x_durability: str | None = Header(
+            default=None, description="Override the server durability: fsync, batch or none"
+        ),
         _: None = Depends(verify_token),
     ) -> StoreFragmentResponse:
 
+        _check_block_id(block_id)
+
+        durability = default_durability
+        if x_durability is not None:
+            try:
+                durability = Durability(x_durability.strip().lower())
+            except ValueError:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"X-Durability must be one of: {', '.join(d.value for d in Durability)}",
+                )
+
         fragment_size = len(body.fragment_data)
         _log.info(
             "[server %d] Storing fragment: block_id=%s, index=%d, size=%d bytes",
@@ -183,7 +307,17 @@ def create_app(
         )
 
         with get_fragment_lock(block_id, index):
-            response = put_fragment(block_id, index, body, store, server_id)
+            catalog.begin_update(block_id, index)
+            try:
+                response = put_fragment(block_id, index, body, store, server_id, durability)
+            finally:
+                # INVALID fragments are stored before the 422 is raised, so
+                # catalog whatever the store holds now, not only on success.
+                if store.has(block_id, index):
+                    catalog.record_fragment(store.get_metadata(block_id, index))
+                else:
+                    catalog.remove_fragment(block_id, index)
+                cache.invalidate((block_id, index))
 
         _log.info(
             "[server %d] Stored fragment: block_id=%s, index=%d, status=%s",
@@ -195,12 +329,22 @@ def create_app(
 
         return response
 
-    @app.get("/fragments/{block_id}/{index}")
+    @app.get("/fragments/{block_id}/{index}", response_model=GetFragmentResponse)
     def _get(
         block_id: str = Path(min_length=1, description="Block identifier"),
         index: int = Path(ge=0, description="Fragment index (0-based)"),
         _: None = Depends(verify_token),
-    ) -> GetFragmentResponse:
+    ) -> Response:
+        _check_block_id(block_id)
+        if index not in byzantine_indices:
+            key = (block_id, index)
+            content = cache.get(key)
+            if content is None:
+                generation = cache.generation
+                content = get_fragment(block_id, index, store).model_dump_json().encode()
+                cache.put(key, content, generation)
+            return Response(content=content, media_type="application/json")
+
         response = get_fragment(block_id, index, store)
 
         # Byzantine fault injection: if this index is in byzantine_indices,
@@ -224,14 +368,64 @@ def create_app(
 
         return response
 
+    @app.get("/fragments/{block_id}/{index}/raw")
+    def _get_raw(
+        block_id: str = Path(min_length=1, description="Block identifier"),
+        index: int = Path(ge=0, description="Fragment index (0-based)"),
+        _: None = Depends(verify_token),
+    ) -> StreamingResponse:
+        _check_block_id(block_id)
+        # Byzantine fault injection, as for the JSON route.  Corrupting the
+        # bytes means giving up the zero-copy path for this fragment.
+        corrupt = index in byzantine_indices
+        response = get_fragment_raw(block_id, index, store, corrupt=corrupt)
+        if corrupt:
+            _log.warning(
+                "[server %d] BYZANTINE fault injected for raw fragment (%s, %d): "
+                "returning %s corrupted bytes",
+                server_id,
+                block_id,
+                index,
+                response.headers["Content-Length"],
+            )
+        return response
+
     @app.delete("/fragments/{block_id}/{index}")
     def _delete(
         block_id: str = Path(min_length=1, description="Block identifier"),
         index: int = Path(ge=0, description="Fragment index (0-based)"),
         _: None = Depends(verify_token),
     ) -> DeleteFragmentResponse:
+        _check_block_id(block_id)
 
-        return delete_fragment(block_id, index, store)
+        with get_fragment_lock(block_id, index):
+            catalog.begin_update(block_id, index)
+            try:
+                return delete_fragment(block_id, index, store)
+            finally:
+                if store.has(block_id, index):
+                    catalog.record_fragment(store.get_metadata(block_id, index))
+                else:
+                    catalog.remove_fragment(block_id, index)
+                cache.invalidate((block_id, index))
+
+    @app.get("/blocks")
+    def _list_blocks(
+        prefix: str = Query(default="", description="Only blocks whose id starts with this"),
+        after: str | None = Query(default=None, description="next_after from the previous page"),
+        limit: int = Query(default=DEFAULT_BLOCK_PAGE_SIZE, ge=1, le=MAX_BLOCK_PAGE_SIZE),
+        _: None = Depends(verify_token),
+    ) -> ListBlocksResponse:
+        return list_blocks(store, prefix, after, limit)
+
+    @app.get("/metrics")
+    def _metrics(_: None = Depends(verify_token)) -> MetricsResponse:
+        return MetricsResponse(
+            server_id=server_id,
+            cache=CacheMetrics(**vars(cache.stats())),
+            scrubber=ScrubMetrics(**vars(scrubber.stats())) if scrubber is not None else None,
+            gc=GcMetrics(**vars(gc.stats())) if gc is not None else None,
+        )
 
     @app.get("/health")
     def _health() -> HealthResponse:
@@ -247,6 +441,66 @@ def create_app(
     return app
 
 
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+# "filesystem": one file per fragment (FragmentStore).
+# "segment":    append-only segment files (SegmentStore), for stores holding
+#               very many small fragments.
+# "sqlite":     one SQLite database in WAL mode (SQLiteStore), packing small
+#               fragments into a single file.
+# "memory":     in-process only (MemoryStore), for benchmarks and tests.
+STORAGE_BACKENDS: tuple[str, ...] = ("filesystem", "segment", "sqlite", "memory")
+
+
+def open_store(
+    storage_backend: str,
+    path: str,
+    group_commit_window: float | None = None,
+    group_commit_max_batch: int = DEFAULT_MAX_BATCH,
+    shard_levels: int | None = None,
+    dedup: bool = False,
+) -> StorageBackend:
+    if storage_backend == "filesystem":
+        # group_commit_window (seconds) lets concurrent PUTs share fsyncs;
+        # shard_levels sets how deep block directories are fanned out (None:
+        # keep the store's current layout); dedup stores identical fragment
+        # data once.
+        return FragmentStore(
+            path,
+            group_commit_window=group_commit_window,
+            group_commit_max_batch=group_commit_max_batch,
+            shard_levels=shard_levels,
+            dedup=dedup,
+        )
+    if storage_backend == "segment":
+        return SegmentStore(path)
+    if storage_backend == "sqlite":
+        # Concurrent writes share a transaction, batched like group commit.
+        return SQLiteStore(
+            path,
+            batch_window=(
+                group_commit_window if group_commit_window is not None else DEFAULT_WINDOW_SECONDS
+            ),
+            max_batch=group_commit_max_batch,
+        )
+    if storage_backend == "memory":
+        return MemoryStore()
+    raise ValueError(
+        f"Unknown storage backend {storage_backend!r}; expected one of {', '.join(STORAGE_BACKENDS)}"
+    )
+
+
+def open_catalog(storage_backend: str, path: str, store: StorageBackend) -> BlockCatalog:
+    # Kept next to the store it describes; the memory backend gets an
+    # in-memory catalog.  Rebuilt from the store if it is missing or stale.
+    if storage_backend == "memory":
+        return BlockCatalog(":memory:", store)
+    _Path(path).mkdir(parents=True, exist_ok=True)
+    return BlockCatalog(_Path(path) / CATALOG_NAME, store)
+
+
 # ---------------------------------------------------------------------------
 # Route handlers
 # ---------------------------------------------------------------------------
@@ -256,15 +510,24 @@ def put_fragment(
     block_id: str,
     index: int,
     body: StoreFragmentRequest,
-    store: FragmentStore,
+    store: StorageBackend,
     server_id: int,
+    durability: Durability = Durability.FSYNC,
 ) -> StoreFragmentResponse:
     # 1. Reject duplicates before doing any I/O.
     # The store is a write-once model: re-sending the same fragment is an error rather than an idempotent update.
     # For idempotency, if a fragment has the same content -> 200 OK, if not -> 409 Conflict
     if store.has(block_id, index):
-        stored = store.get(block_id, index)
+        # Only the header is read: the stored record carries the SHA-256 of
+        # its data, so the comparison never loads the stored fragment.
+        try:
+            stored = store.get_metadata(block_id, index)
+        except FragmentNotFoundError:
+            stored = None
+    else:
+        stored = None
 
+    if stored is not None:
         # Check if all the data is the same
         # Because if someone sends the same fragment data but with different
         # erasure coding parameters, it's a completely different logical fragment
@@ -279,7 +542,10 @@ def put_fragment(
         incoming_bytes = base64.b64decode(body.fragment_data)
 
         incoming_hash = RandomOracle.hash_fragment(incoming_bytes)
-        stored_hash = RandomOracle.hash_fragment(stored.data)
+        stored_hash = stored.data_sha256
+        if stored_hash is None:
+            # Written before records carried a hash.
+            stored_hash = RandomOracle.hash_fragment(store.get(block_id, index).data)
         data_matches = incoming_hash == stored_hash
 
         if metadata_matches and fpcc_matches and data_matches:
@@ -294,6 +560,7 @@ def put_fragment(
                 index=index,
                 verification_status=stored.verification_status.value,
                 message=f"Fragment ({block_id}, {index}) already stored (idempotent).",
+                durability=stored.durability.value,
             )
         else:
             _log.warning(
@@ -373,6 +640,13 @@ def put_fragment(
         verification_status=status,
         fpcc_digest=fpcc.digest(),
         fpcc_json=body.fpcc_json,
+        verified_at=datetime.utcnow(),
+        durability=durability,
+        # A consistent fragment's hash was just checked against the fpcc,
+        # so the record reuses it instead of hashing the data again.
+        data_sha256=(
+            fpcc.hashes[index] if status == VerificationStatus.VALID else None
+        ),
     )
     store.put(record)
 
@@ -390,42 +664,101 @@ def put_fragment(
         index=index,
         verification_status=status.value,
         message=report.detail,
+        durability=durability.value,
     )
 
 
 def get_fragment(
     block_id: str,
     index: int,
-    store: FragmentStore,
+    store: StorageBackend,
 ) -> GetFragmentResponse:
-    # Fetch the record; surface a 404 if this fragment was never stored.
+    # Map the record; surface a 404 if this fragment was never stored.
+    with _open_fragment(block_id, index, store) as record:
+        # Base64-encode the raw bytes for JSON transport (matching the PUT
+        # format), reading them straight from the mapping.
+        fragment_data_b64 = base64.b64encode(record.data).decode()
+
+        return GetFragmentResponse(
+            block_id=record.block_id,
+            index=record.index,
+            fragment_data=fragment_data_b64,
+            total_n=record.total_n,
+            threshold_m=record.threshold_m,
+            original_length=record.original_length,
+            fpcc_json=record.fpcc_json or "",  # Should always be present, but default to empty string if not.
+            verification_status=record.verification_status.value,
+            durability=record.durability.value,
+        )
+
+
+def get_fragment_raw(
+    block_id: str,
+    index: int,
+    store: StorageBackend,
+    corrupt: bool = False,
+) -> StreamingResponse:
+    # The body is the fragment bytes themselves (no base64), sent as slices of
+    # the memory-mapped record; metadata travels in response headers.
+    view = _open_fragment(block_id, index, store)
+    headers = {
+        "Content-Length": str(len(view.data)),
+        "X-Total-N": str(view.total_n),
+        "X-Threshold-M": str(view.threshold_m),
+        "X-Original-Length": str(view.original_length),
+        "X-Verification-Status": view.verification_status.value,
+        "X-Durability": view.durability.value,
+        "X-Fpcc-Json": base64.b64encode((view.fpcc_json or "").encode()).decode(),
+    }
+
+    if corrupt:
+        corrupted_bytes = bytes(b ^ 0xFF for b in view.data)
+        view.close()
+        body = _iter_slices(memoryview(corrupted_bytes), None)
+    else:
+        body = _iter_slices(view.data, view)
+
+    # close() is idempotent: the generator closes the view when it finishes,
+    # and the background task covers a body that is never iterated.
+    return StreamingResponse(
+        body,
+        media_type="application/octet-stream",
+        headers=headers,
+        background=BackgroundTask(view.close),
+    )
+
+
+def _check_block_id(block_id: str) -> None:
+    # Block ids such as ".index" or ".." would name the store's own files.
+    try:
+        validate_block_id(block_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+def _open_fragment(block_id: str, index: int, store: StorageBackend) -> FragmentView:
     try:
-        record = store.get(block_id, index)
+        return store.open_view(block_id, index)
     except FragmentNotFoundError:
         raise HTTPException(
             status_code=404,
             detail=f"Fragment ({block_id}, {index}) not found.",
         )
 
-    # Base64-encode the raw bytes for JSON transport (matching the PUT format).
-    fragment_data_b64 = base64.b64encode(record.data).decode()
-
-    return GetFragmentResponse(
-        block_id=record.block_id,
-        index=record.index,
-        fragment_data=fragment_data_b64,
-        total_n=record.total_n,
-        threshold_m=record.threshold_m,
-        original_length=record.original_length,
-        fpcc_json=record.fpcc_json or "",  # Should always be present, but default to empty string if not.
-        verification_status=record.verification_status.value,
-    )
+
+def _iter_slices(data: memoryview, view: FragmentView | None):
+    try:
+        for start in range(0, len(data), RAW_CHUNK_SIZE):
+            yield data[start : start + RAW_CHUNK_SIZE]
+    finally:
+        if view is not None:
+            view.close()
 
 
 def delete_fragment(
     block_id: str,
     index: int,
-    store: FragmentStore,
+    store: StorageBackend,
 ) -> DeleteFragmentResponse:
     try:
         store.delete(
@@ -444,7 +777,19 @@ def delete_fragment(
     )
 
 
-def get_health(store: FragmentStore, server_id: int) -> HealthResponse:
+def list_blocks(store: StorageBackend, prefix: str, after: str | None, limit: int) -> ListBlocksResponse:
+    # One extra entry tells whether another page follows, so the last page
+    # reports next_after=None instead of costing the client an empty request.
+    page = store.list_blocks_page(prefix, after, limit + 1)
+    more = len(page) > limit
+    page = page[:limit]
+    return ListBlocksResponse(
+        blocks=[BlockEntry(block_id=block_id, indices=indices) for block_id, indices in page],
+        next_after=page[-1][0] if more else None,
+    )
+
+
+def get_health(store: StorageBackend, server_id: int) -> HealthResponse:
     status = "ok"
 
     try:
@@ -453,7 +798,37 @@ def get_health(store: FragmentStore, server_id: int) -> HealthResponse:
         count = 0
         status = "failed"
 
-    return HealthResponse(server_id=server_id, status=status, fragment_count=count)
+    storage = None
+    if isinstance(store, FragmentStore):
+        storage = get_storage_usage(store)
+    return HealthResponse(server_id=server_id, status=status, fragment_count=count, storage=storage)
+
+
+def get_storage_usage(store: FragmentStore) -> StorageUsage:
+    # Counters the store keeps in memory, plus one statvfs for free space.
+    stats = store.stats()
+    try:
+        disk = shutil.disk_usage(store.base_dir)
+    except OSError:
+        disk = None
+    return StorageUsage(
+        fragments=stats.fragments,
+        payload_bytes=stats.payload_bytes,
+        disk_bytes=stats.disk_bytes,
+        invalid_fragments=stats.invalid_fragments,
+        dedup_objects=stats.dedup_objects,
+        dedup_bytes=stats.dedup_bytes,
+        by_status={
+            status.value: UsageTotals(
+                fragments=totals.fragments,
+                payload_bytes=totals.payload_bytes,
+                disk_bytes=totals.disk_bytes,
+            )
+            for status, totals in stats.by_status.items()
+        },
+        disk_free_bytes=disk.free if disk is not None else None,
+        disk_total_bytes=disk.total if disk is not None else None,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -465,6 +840,18 @@ def get_health(store: FragmentStore, server_id: int) -> HealthResponse:
 #
 #   export SERVER_ID=1
 #   export DATA_DIR=./data          # optional; defaults to ./data
+#   export STORAGE_BACKEND=segment  # optional; filesystem (default), segment, sqlite or memory
+#   export GROUP_COMMIT_WINDOW_MS=2 # optional; share fsyncs between PUTs
+#   export GROUP_COMMIT_MAX_BATCH=256
+#   export DURABILITY=batch         # optional; fsync (default), batch or none
+#   export CACHE_MAX_BYTES=0        # optional; GET response cache budget (0 = off)
+#   export SHARD_LEVELS=2           # optional; migrate to this fan-out depth (0 = flat; default: keep)
+#   export DEDUP=1                  # optional; store identical fragment data once (filesystem)
+#   export SCRUB_INTERVAL_SECONDS=86400  # optional; enables scrubbing, pause between passes (default off)
+#   export SCRUB_MAX_MBPS=8         # optional; scrub read budget in MiB/s
+#   export SCRUB_CPU_SHARE=0.1      # optional; scrub CPU budget as a share of one core
+#   export GC_INTERVAL_SECONDS=600  # optional; enables GC, pause between passes (default off)
+#   export INVALID_RETENTION_SECONDS=604800  # optional; how long INVALID fragments are kept
 #   uvicorn src.network.server:app --port 5001
 
 # Where (or when) are these environment variables set?
@@ -482,12 +869,36 @@ def _create_default_fastapi_app() -> FastAPI:
     token = os.environ.get("VERI_STORE_TOKEN", "")
     if not token:
         raise ValueError("API token must be provided for authentication")
-    
+
+    group_commit_window_ms = os.environ.get("GROUP_COMMIT_WINDOW_MS", "").strip()
+    shard_levels = os.environ.get("SHARD_LEVELS", "").strip()
+    scrub_interval = os.environ.get("SCRUB_INTERVAL_SECONDS", "off").strip()
+    # GC deletes data, so it only runs when asked for, as with create_app().
+    gc_interval = os.environ.get("GC_INTERVAL_SECONDS", "off").strip()
+
     return create_app(
         server_id=int(os.environ.get("SERVER_ID", "1")),
         data_dir=os.environ.get("DATA_DIR", "./data"),
         byzantine_indices=_byzantine_indices,
         token=token,
+        storage_backend=os.environ.get("STORAGE_BACKEND", "filesystem"),
+        group_commit_window=(
+            float(group_commit_window_ms) / 1000.0 if group_commit_window_ms else None
+        ),
+        group_commit_max_batch=int(os.environ.get("GROUP_COMMIT_MAX_BATCH", DEFAULT_MAX_BATCH)),
+        durability=os.environ.get("DURABILITY", Durability.FSYNC.value),
+        cache_max_bytes=int(os.environ.get("CACHE_MAX_BYTES", DEFAULT_CACHE_BYTES)),
+        shard_levels=int(shard_levels) if shard_levels else None,
+        dedup=os.environ.get("DEDUP", "").strip().lower() in ("1", "true", "yes", "on"),
+        scrub_interval=None if scrub_interval == "off" else float(scrub_interval),
+        scrub_max_bytes_per_second=float(
+            os.environ.get("SCRUB_MAX_MBPS", DEFAULT_SCRUB_BYTES_PER_SECOND / (1024 * 1024))
+        ) * 1024 * 1024,
+        scrub_cpu_share=float(os.environ.get("SCRUB_CPU_SHARE", DEFAULT_SCRUB_CPU_SHARE)),
+        gc_interval=None if gc_interval == "off" else float(gc_interval),
+        invalid_retention=float(
+            os.environ.get("INVALID_RETENTION_SECONDS", DEFAULT_INVALID_RETENTION_SECONDS)
+        ),
     )
 
 class LazyServerApp:
@@ -1,3 +1,8 @@
 from .fragment import FragmentRecord
 from .store import FragmentStore
+from .segment_store import SegmentStore
+from .sqlite_store import SQLiteStore
+from .memory_store import MemoryStore
+from .backend import StorageBackend
 from .metadata import ObjectMetadata
+from .catalog import BlockCatalog
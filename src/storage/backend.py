@@ -0,0 +1,51 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Protocol, runtime_checkable
+
+from .fragment import FragmentRecord, FragmentView, RecordHeader, VerificationStatus
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """The interface the server uses to persist fragments.
+
+    FragmentStore (one file per fragment, the default), SegmentStore,
+    SQLiteStore and MemoryStore all implement it.  Lookups of a missing
+    fragment raise FragmentNotFoundError.
+    """
+
+    def put(self, record: FragmentRecord) -> None: ...
+
+    def get(self, block_id: str, index: int) -> FragmentRecord: ...
+
+    def open_view(self, block_id: str, index: int) -> FragmentView: ...
+
+    def get_metadata(self, block_id: str, index: int) -> RecordHeader: ...
+
+    def list_metadata(self, block_id: str) -> list[RecordHeader]: ...
+
+    def set_verification(
+        self,
+        block_id: str,
+        index: int,
+        status: VerificationStatus,
+        verified_at: datetime | None,
+    ) -> None: ...
+
+    def delete(self, block_id: str, index: int) -> None: ...
+
+    def list_fragments(self, block_id: str) -> list[FragmentRecord]: ...
+
+    def has(self, block_id: str, index: int) -> bool: ...
+
+    def fragment_count(self) -> int: ...
+
+    def list_blocks(self) -> list[str]: ...
+
+    def list_blocks_page(
+        self, prefix: str = "", after: str | None = None, limit: int = 1000
+    ) -> list[tuple[str, list[int]]]: ...
+
+    def list_indices(self, block_id: str) -> list[int]: ...
+
+    def close(self) -> None: ...
@@ -0,0 +1,292 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from pathlib import Path
+import logging
+import sqlite3
+import threading
+
+from .backend import StorageBackend
+from .fragment import RecordHeader, VerificationStatus
+from .layout import CATALOG_NAME
+from .metadata import ObjectMetadata
+from .store import FragmentNotFoundError, FragmentStore
+
+_log = logging.getLogger(__name__)
+
+# Bumped when the schema changes; a catalog with another version is dropped
+# and rebuilt from the store.
+_SCHEMA_VERSION = 2
+
+# blocks holds one ObjectMetadata row per block; block_fragments the stored
+# indices with each fragment's status and verified_at.  A block's
+# last_verified_at is the oldest of its fragments' (NULL while any is not
+# VALID), so "verified before T" means every fragment was found intact at T
+# or later, and a block holding a corrupt fragment always needs repair.
+# pending_fragments names fragments with a write in flight (begin_update).
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    block_id TEXT PRIMARY KEY,
+    total_n INTEGER NOT NULL,
+    threshold_m INTEGER NOT NULL,
+    original_length INTEGER NOT NULL,
+    fpcc TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    last_verified_at INTEGER
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS block_fragments (
+    block_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    verified_at INTEGER,
+    PRIMARY KEY (block_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pending_fragments (
+    block_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    PRIMARY KEY (block_id, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blocks_created_at ON blocks (created_at);
+CREATE INDEX IF NOT EXISTS blocks_last_verified_at ON blocks (last_verified_at);
+"""
+
+_UPSERT_BLOCK = """
+INSERT INTO blocks (block_id, total_n, threshold_m, original_length, fpcc, created_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (block_id) DO UPDATE SET
+    total_n = excluded.total_n,
+    threshold_m = excluded.threshold_m,
+    original_length = excluded.original_length,
+    fpcc = excluded.fpcc,
+    created_at = MIN(created_at, excluded.created_at)
+"""
+_UPSERT_FRAGMENT = """
+INSERT INTO block_fragments (block_id, idx, status, verified_at) VALUES (?, ?, ?, ?)
+ON CONFLICT (block_id, idx) DO UPDATE SET status = excluded.status, verified_at = excluded.verified_at
+"""
+_REFRESH_VERIFIED = """
+UPDATE blocks SET last_verified_at = (
+    SELECT CASE WHEN SUM(status != 'valid' OR verified_at IS NULL) > 0 THEN NULL ELSE MIN(verified_at) END
+    FROM block_fragments WHERE block_id = ?
+) WHERE block_id = ?
+"""
+_CLEAR_PENDING = "DELETE FROM pending_fragments WHERE block_id = ? AND idx = ?"
+_SELECT_BLOCK = (
+    "SELECT block_id, total_n, threshold_m, original_length, fpcc, created_at, last_verified_at "
+    "FROM blocks"
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_micros(value: datetime) -> int:
+    delta = value - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(value: int | None) -> datetime | None:
+    if value is None:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class BlockCatalog:
+    """Per-block ObjectMetadata kept in a small SQLite database.
+
+    Answers per-block questions (stored indices, n/m, when a block was
+    created or last verified) without reading fragment files.  The server
+    updates it under the same per-fragment lock as the fragment write, right
+    after the write succeeds.  The two cannot share one transaction, so a
+    PUT or DELETE first marks the fragment pending (begin_update, synced
+    before the fragment is touched); record_fragment or remove_fragment
+    clears the mark.  On open, fragments still marked are re-read from the
+    store, and the whole catalog is rebuilt from record headers if its
+    fragment counts (per status, for a FragmentStore) differ from the
+    store's, which covers background scrub and GC updates a crash cut off.
+    Pass ":memory:" as `path` for a catalog that is rebuilt on every start.
+    """
+
+    def __init__(self, path: str | Path, store: StorageBackend | None = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        if str(path) != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            self._conn.executescript("DROP TABLE IF EXISTS block_fragments; DROP TABLE IF EXISTS blocks;")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+        if store is None:
+            return
+        if self._diverged(store):
+            _log.info("Block catalog at %s is out of date; rebuilding it", path)
+            self.rebuild(store)
+        else:
+            self._refresh_pending(store)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def begin_update(self, block_id: str, index: int) -> None:
+        """Mark a fragment about to be written or deleted, durably, until it is recorded or removed."""
+        with self._lock:
+            self._conn.execute("PRAGMA synchronous=FULL")
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO pending_fragments (block_id, idx) VALUES (?, ?)", (block_id, index)
+                    )
+            finally:
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def record_fragment(self, header: RecordHeader) -> None:
+        """Add or refresh one stored fragment, from its record header."""
+        with self._lock, self._conn:
+            self._apply(header)
+            self._conn.execute(_CLEAR_PENDING, (header.block_id, header.index))
+
+    def remove_fragment(self, block_id: str, index: int) -> None:
+        """Forget a deleted fragment; the block goes with its last fragment."""
+        with self._lock, self._conn:
+            self._conn.execute(_CLEAR_PENDING, (block_id, index))
+            self._conn.execute("DELETE FROM block_fragments WHERE block_id = ? AND idx = ?", (block_id, index))
+            remaining = self._conn.execute(
+                "SELECT 1 FROM block_fragments WHERE block_id = ? LIMIT 1", (block_id,)
+            ).fetchone()
+            if remaining is None:
+                self._conn.execute("DELETE FROM blocks WHERE block_id = ?", (block_id,))
+            else:
+                self._conn.execute(_REFRESH_VERIFIED, (block_id, block_id))
+
+    def set_verification(
+        self,
+        block_id: str,
+        index: int,
+        status: VerificationStatus,
+        verified_at: datetime | None = None,
+    ) -> None:
+        """Record the outcome of re-verifying a stored fragment at `verified_at` (default: now)."""
+        stamp = _to_micros(verified_at or datetime.utcnow())
+        with self._lock, self._conn:
+            updated = self._conn.execute(
+                "UPDATE block_fragments SET status = ?, verified_at = ? WHERE block_id = ? AND idx = ?",
+                (status.value, stamp, block_id, index),
+            ).rowcount
+            if updated:
+                self._conn.execute(_REFRESH_VERIFIED, (block_id, block_id))
+
+    def rebuild(self, store: StorageBackend) -> int:
+        """Replace the catalog's contents with what `store` holds; returns the fragment count."""
+        headers: list[RecordHeader] = []
+        for block_id in store.list_blocks():
+            headers.extend(store.list_metadata(block_id))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pending_fragments")
+            self._conn.execute("DELETE FROM block_fragments")
+            self._conn.execute("DELETE FROM blocks")
+            for header in headers:
+                self._apply(header)
+        return len(headers)
+
+    def _diverged(self, store: StorageBackend) -> bool:
+        if not isinstance(store, FragmentStore):
+            return self.fragment_count() != store.fragment_count()
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM block_fragments GROUP BY status"))
+        expected = {
+            status.value: totals.fragments for status, totals in store.stats().by_status.items() if totals.fragments
+        }
+        return counts != expected
+
+    def _refresh_pending(self, store: StorageBackend) -> None:
+        # Writes a crash interrupted: catalog each fragment as the store has it.
+        with self._lock:
+            pending = self._conn.execute("SELECT block_id, idx FROM pending_fragments").fetchall()
+        for block_id, index in pending:
+            try:
+                self.record_fragment(store.get_metadata(block_id, index))
+            except FragmentNotFoundError:
+                self.remove_fragment(block_id, index)
+        if pending:
+            _log.info("Refreshed %d block catalog entries left pending by an interrupted write", len(pending))
+
+    def _apply(self, header: RecordHeader) -> None:
+        self._conn.execute(
+            _UPSERT_BLOCK,
+            (
+                header.block_id,
+                header.total_n,
+                header.threshold_m,
+                header.original_length,
+                header.fpcc_json or "",
+                _to_micros(header.received_at),
+            ),
+        )
+        verified_at = _to_micros(header.verified_at) if header.verified_at is not None else None
+        self._conn.execute(
+            _UPSERT_FRAGMENT, (header.block_id, header.index, header.verification_status.value, verified_at)
+        )
+        self._conn.execute(_REFRESH_VERIFIED, (header.block_id, header.block_id))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def get(self, block_id: str) -> ObjectMetadata:
+        with self._lock:
+            row = self._conn.execute(f"{_SELECT_BLOCK} WHERE block_id = ?", (block_id,)).fetchone()
+            if row is None:
+                raise FragmentNotFoundError(block_id)
+            return self._metadata(row)
+
+    def created_between(self, start: datetime, end: datetime, limit: int = 1000) -> list[ObjectMetadata]:
+        """Blocks created in [start, end), oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"{_SELECT_BLOCK} WHERE created_at >= ? AND created_at < ? ORDER BY created_at LIMIT ?",
+                (_to_micros(start), _to_micros(end), limit),
+            ).fetchall()
+            return [self._metadata(row) for row in rows]
+
+    def verified_before(self, cutoff: datetime, limit: int = 1000) -> list[ObjectMetadata]:
+        """Blocks not fully verified since `cutoff`, least recently verified first."""
+        with self._lock:
+            # NULL (never verified) sorts first.
+            rows = self._conn.execute(
+                f"{_SELECT_BLOCK} WHERE last_verified_at IS NULL OR last_verified_at < ? "
+                f"ORDER BY last_verified_at LIMIT ?",
+                (_to_micros(cutoff), limit),
+            ).fetchall()
+            return [self._metadata(row) for row in rows]
+
+    def block_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+
+    def fragment_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM block_fragments").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _metadata(self, row: tuple) -> ObjectMetadata:
+        block_id, total_n, threshold_m, original_length, fpcc, created_at, last_verified_at = row
+        indices = [
+            idx
+            for (idx,) in self._conn.execute(
+                "SELECT idx FROM block_fragments WHERE block_id = ? ORDER BY idx", (block_id,)
+            )
+        ]
+        return ObjectMetadata(
+            block_id=block_id,
+            total_n=total_n,
+            threshold_m=threshold_m,
+            original_length=original_length,
+            fpcc=fpcc,
+            stored_indices=indices,
+            created_at=_from_micros(created_at),
+            last_verified_at=_from_micros(last_verified_at),
+        )
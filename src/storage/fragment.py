@@ -1,8 +1,12 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from enum import Enum
+from typing import Callable
 import base64
+import hashlib
+import mmap
+import struct
 
 
 class VerificationStatus(Enum):
@@ -11,6 +15,13 @@ class VerificationStatus(Enum):
     INVALID = "invalid"
 
 
+class Durability(Enum):
+    # How far a put was synced before it was acknowledged.
+    FSYNC = "fsync"  # fsynced (data, rename and index) before returning
+    BATCH = "batch"  # fsynced by a periodic background flush
+    NONE = "none"    # left to the OS page cache
+
+
 @dataclass
 class FragmentRecord:
     index: int
@@ -23,6 +34,17 @@ class FragmentRecord:
     verification_status: VerificationStatus = VerificationStatus.UNVERIFIED
     fpcc_digest: str | None = None
     fpcc_json: str | None = None
+    verified_at: datetime | None = None
+    durability: Durability = Durability.FSYNC
+    # SHA-256 of `data`, filled in when the record is serialized.  Derived
+    # from `data`, so it takes no part in equality.
+    data_sha256: bytes | None = field(default=None, compare=False)
+
+    def content_hash(self) -> bytes:
+        """ Return the SHA-256 of the fragment bytes, computing it at most once. """
+        if self.data_sha256 is None:
+            self.data_sha256 = hashlib.sha256(self.data).digest()
+        return self.data_sha256
 
     def to_dict(self) -> dict:
         """ Serialize the fragment record to a JSON-compatible dictionary. """
@@ -37,6 +59,13 @@ class FragmentRecord:
             "verification_status": self.verification_status.value,
             "fpcc_digest": self.fpcc_digest,
             "fpcc_json": self.fpcc_json,
+            "verified_at": (
+                self.verified_at.isoformat()
+                if self.verified_at is not None
+                else None
+            ),
+            "durability": self.durability.value,
+            "data_sha256": self.content_hash().hex(),
         }
 
     @classmethod
@@ -54,6 +83,15 @@ class FragmentRecord:
         if fpcc_json is not None and not isinstance(fpcc_json, str):
             raise ValueError("fpcc_json must be a string or None")
 
+        verified_raw = d.get("verified_at")
+        verified_at = (
+            datetime.fromisoformat(verified_raw)
+            if isinstance(verified_raw, str)
+            else None
+        )
+
+        sha_raw = d.get("data_sha256")
+        data_sha256 = bytes.fromhex(sha_raw) if isinstance(sha_raw, str) else None
 
         return cls(
             index=int(d["index"]),
@@ -66,4 +104,420 @@ class FragmentRecord:
             verification_status=verification_status,
             fpcc_digest=fpcc_digest,
             fpcc_json=fpcc_json,
+            verified_at=verified_at,
+            durability=Durability(d.get("durability", Durability.FSYNC.value)),
+            data_sha256=data_sha256,
+        )
+
+    def to_bytes(self) -> bytes:
+        """ Serialize to the compact binary record format (see _HEADER). """
+        return self._encode(with_data=True)
+
+    def to_reference_bytes(self) -> bytes:
+        """ Serialize without the data, which is stored elsewhere under data_sha256. """
+        return self._encode(with_data=False)
+
+    def _encode(self, with_data: bool) -> bytes:
+        block_id = self.block_id.encode("utf-8")
+        digest = (self.fpcc_digest or "").encode("ascii")
+        fpcc_json = (self.fpcc_json or "").encode("utf-8")
+
+        data_sha256 = self.content_hash()
+
+        flags = _FLAG_HAS_SHA256
+        if not with_data:
+            flags |= _FLAG_DATA_REFERENCE
+        if self.fpcc_digest is not None:
+            flags |= _FLAG_HAS_DIGEST
+        if self.fpcc_json is not None:
+            flags |= _FLAG_HAS_FPCC
+        if self.verified_at is not None:
+            flags |= _FLAG_HAS_VERIFIED_AT
+        flags |= _DURABILITY_CODES[self.durability] << _DURABILITY_SHIFT
+
+        header = _HEADER.pack(
+            RECORD_MAGIC,
+            RECORD_VERSION,
+            _STATUS_CODES[self.verification_status],
+            flags,
+            self.index,
+            self.total_n,
+            self.threshold_m,
+            self.original_length,
+            _to_micros(self.received_at),
+            _to_micros(self.verified_at) if self.verified_at is not None else 0,
+            len(block_id),
+            len(digest),
+            len(fpcc_json),
+            len(self.data),
+        )
+        if not with_data:
+            return b"".join((header, block_id, digest, fpcc_json, data_sha256))
+        return b"".join((header, block_id, digest, fpcc_json, data_sha256, self.data))
+
+    @classmethod
+    def from_bytes(cls, raw: bytes | memoryview) -> FragmentRecord:
+        """ Deserialize a FragmentRecord from the binary record format. """
+        header = RecordHeader.unpack(raw)
+        if header.is_reference:
+            raise ValueError("reference record has no data; see attach_data()")
+        view = memoryview(raw)
+        offset = header.payload_offset
+        return cls(
+            index=header.index,
+            data=bytes(view[offset : offset + header.data_length]),
+            block_id=header.block_id,
+            total_n=header.total_n,
+            threshold_m=header.threshold_m,
+            original_length=header.original_length,
+            received_at=header.received_at,
+            verification_status=header.verification_status,
+            fpcc_digest=header.fpcc_digest,
+            fpcc_json=header.fpcc_json,
+            verified_at=header.verified_at,
+            durability=header.durability,
+            data_sha256=header.data_sha256,
+        )
+
+
+class FragmentView:
+    """A stored fragment whose bytes are a view over the record buffer.
+
+    `data` points straight into the (usually memory-mapped) record, so nothing
+    is copied until a caller asks for it.  The other fields are decoded from
+    the header on first access.  Close the view, or use it as a context
+    manager, to release the mapping.
+    """
+
+    def __init__(self, buffer: bytes | memoryview | mmap.mmap, mapping: mmap.mmap | None = None) -> None:
+        self._buffer = memoryview(buffer)
+        self._mapping = mapping
+        self._header: RecordHeader | None = None
+        offset, length = record_payload_span(self._buffer)
+        self.data: memoryview = self._buffer[offset : offset + length]
+
+    @property
+    def header(self) -> RecordHeader:
+        if self._header is None:
+            self._header = RecordHeader.unpack(self._buffer)
+        return self._header
+
+    @property
+    def index(self) -> int:
+        return self.header.index
+
+    @property
+    def block_id(self) -> str:
+        return self.header.block_id
+
+    @property
+    def total_n(self) -> int:
+        return self.header.total_n
+
+    @property
+    def threshold_m(self) -> int:
+        return self.header.threshold_m
+
+    @property
+    def original_length(self) -> int:
+        return self.header.original_length
+
+    @property
+    def verification_status(self) -> VerificationStatus:
+        return self.header.verification_status
+
+    @property
+    def fpcc_digest(self) -> str | None:
+        return self.header.fpcc_digest
+
+    @property
+    def fpcc_json(self) -> str | None:
+        return self.header.fpcc_json
+
+    @property
+    def durability(self) -> Durability:
+        return self.header.durability
+
+    @property
+    def data_sha256(self) -> bytes | None:
+        return self.header.data_sha256
+
+    def to_record(self) -> FragmentRecord:
+        """ Copy the view into a standalone FragmentRecord. """
+        return FragmentRecord.from_bytes(self._buffer)
+
+    def close(self) -> None:
+        self.data.release()
+        self._buffer.release()
+        if self._mapping is not None:
+            try:
+                self._mapping.close()
+            except BufferError:
+                # A caller still holds a slice of `data`; the mapping is
+                # unmapped once that last reference goes away.
+                pass
+            self._mapping = None
+
+    def __enter__(self) -> FragmentView:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+# ---------------------------------------------------------------------------
+# Binary record format
+#
+#   fixed header (_HEADER, big-endian)
+#   block_id     (utf-8,  block_id_length bytes)
+#   fpcc_digest  (ascii,  digest_length bytes)
+#   fpcc_json    (utf-8,  fpcc_length bytes)
+#   data_sha256  (raw,    32 bytes, only if _FLAG_HAS_SHA256 is set)
+#   data         (raw,    data_length bytes, absent if _FLAG_DATA_REFERENCE)
+#
+# Timestamps are microseconds since the Unix epoch (UTC).
+# ---------------------------------------------------------------------------
+
+RECORD_MAGIC: bytes = b"VSF1"
+RECORD_VERSION: int = 1
+
+_HEADER = struct.Struct(">4sBBHIIIQqqHHIQ")
+FIXED_HEADER_SIZE: int = _HEADER.size
+
+_FLAG_HAS_DIGEST = 0x1
+_FLAG_HAS_FPCC = 0x2
+_FLAG_HAS_VERIFIED_AT = 0x4
+# Bit 5: the record carries the SHA-256 of its data.  Records written before
+# it existed have no hash, and readers fall back to hashing the data.
+_FLAG_HAS_SHA256 = 0x20
+_SHA256_LENGTH = 32
+# Bit 6: a reference record.  The data is stored separately (deduplicated),
+# keyed by data_sha256; data_length is still its length.
+_FLAG_DATA_REFERENCE = 0x40
+
+# Flag bits 3-4 hold the durability level; records written before it existed
+# have them clear, which reads as FSYNC (the only level there was).
+_DURABILITY_SHIFT = 3
+_DURABILITY_MASK = 0x3
+_DURABILITY_CODES = {
+    Durability.FSYNC: 0,
+    Durability.BATCH: 1,
+    Durability.NONE: 2,
+}
+_DURABILITY_BY_CODE = {code: level for level, code in _DURABILITY_CODES.items()}
+
+_STATUS_CODES = {
+    VerificationStatus.UNVERIFIED: 0,
+    VerificationStatus.VALID: 1,
+    VerificationStatus.INVALID: 2,
+}
+_STATUS_BY_CODE = {code: status for status, code in _STATUS_CODES.items()}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+@dataclass
+class RecordHeader:
+    """Everything in a binary record except the fragment bytes."""
+
+    index: int
+    block_id: str
+    total_n: int
+    threshold_m: int
+    original_length: int
+    received_at: datetime
+    verification_status: VerificationStatus
+    fpcc_digest: str | None
+    fpcc_json: str | None
+    verified_at: datetime | None
+    durability: Durability
+    data_length: int
+    payload_offset: int
+    data_sha256: bytes | None = None
+    is_reference: bool = False
+
+    @classmethod
+    def from_record(cls, record: FragmentRecord) -> RecordHeader:
+        """ Build the header a record would have, without its payload offset. """
+        return cls(
+            index=record.index,
+            block_id=record.block_id,
+            total_n=record.total_n,
+            threshold_m=record.threshold_m,
+            original_length=record.original_length,
+            received_at=record.received_at,
+            verification_status=record.verification_status,
+            fpcc_digest=record.fpcc_digest,
+            fpcc_json=record.fpcc_json,
+            verified_at=record.verified_at,
+            durability=record.durability,
+            data_length=len(record.data),
+            payload_offset=0,
+            data_sha256=record.content_hash(),
         )
+
+    @classmethod
+    def read(cls, read_at: Callable[[int, int], bytes]) -> RecordHeader:
+        """ Decode the header of a record using `read_at(offset, size)`.
+
+        Reads the fixed header, then the variable-length metadata; the
+        fragment bytes themselves are never read.
+        """
+        fixed = read_at(0, _HEADER.size)
+        fields = _unpack_fixed_header(fixed)
+        metadata = read_at(_HEADER.size, _metadata_length(fields))
+        return cls._decode(fields, fixed + metadata, check_length=False)
+
+    @classmethod
+    def unpack(cls, raw: bytes | memoryview) -> RecordHeader:
+        return cls._decode(_unpack_fixed_header(raw), raw, check_length=True)
+
+    @classmethod
+    def _decode(cls, fields: tuple, raw: bytes | memoryview, check_length: bool) -> RecordHeader:
+        (
+            _magic,
+            _version,
+            status_code,
+            flags,
+            index,
+            total_n,
+            threshold_m,
+            original_length,
+            received_micros,
+            verified_micros,
+            block_id_length,
+            digest_length,
+            fpcc_length,
+            data_length,
+        ) = fields
+
+        if len(raw) < _HEADER.size + _metadata_length(fields):
+            raise ValueError("record is truncated")
+        view = memoryview(raw)
+        offset = _HEADER.size
+        block_id = bytes(view[offset : offset + block_id_length]).decode("utf-8")
+        offset += block_id_length
+        digest = bytes(view[offset : offset + digest_length]).decode("ascii")
+        offset += digest_length
+        fpcc_json = bytes(view[offset : offset + fpcc_length]).decode("utf-8")
+        offset += fpcc_length
+        data_sha256 = None
+        if flags & _FLAG_HAS_SHA256:
+            data_sha256 = bytes(view[offset : offset + _SHA256_LENGTH])
+            offset += _SHA256_LENGTH
+        is_reference = bool(flags & _FLAG_DATA_REFERENCE)
+        if is_reference and data_sha256 is None:
+            raise ValueError("reference record without a data hash")
+        if check_length and not is_reference and len(raw) < offset + data_length:
+            raise ValueError("record is truncated")
+
+        return cls(
+            index=index,
+            block_id=block_id,
+            total_n=total_n,
+            threshold_m=threshold_m,
+            original_length=original_length,
+            received_at=_from_micros(received_micros),
+            verification_status=_STATUS_BY_CODE[status_code],
+            fpcc_digest=digest if flags & _FLAG_HAS_DIGEST else None,
+            fpcc_json=fpcc_json if flags & _FLAG_HAS_FPCC else None,
+            verified_at=_from_micros(verified_micros) if flags & _FLAG_HAS_VERIFIED_AT else None,
+            durability=_DURABILITY_BY_CODE[(flags >> _DURABILITY_SHIFT) & _DURABILITY_MASK],
+            data_length=data_length,
+            payload_offset=offset,
+            data_sha256=data_sha256,
+            is_reference=is_reference,
+        )
+
+
+def is_reference_record(raw: bytes | memoryview) -> bool:
+    """True if the record's data is stored separately (see to_reference_bytes)."""
+    return bool(_unpack_fixed_header(raw)[3] & _FLAG_DATA_REFERENCE)
+
+
+def attach_data(reference: bytes | memoryview, data: bytes | memoryview) -> bytes:
+    """Turn a reference record and its data back into a complete record."""
+    fields = list(_unpack_fixed_header(reference))
+    if not fields[3] & _FLAG_DATA_REFERENCE:
+        raise ValueError("not a reference record")
+    if len(data) != fields[13]:
+        raise ValueError("data length does not match the reference record")
+    end = _HEADER.size + _metadata_length(fields)
+    if len(reference) < end:
+        raise ValueError("record is truncated")
+    fields[3] &= ~_FLAG_DATA_REFERENCE
+    return b"".join((_HEADER.pack(*fields), reference[_HEADER.size : end], data))
+
+
+def record_payload_span(raw: bytes | memoryview) -> tuple[int, int]:
+    """Return (offset, length) of the fragment bytes without decoding metadata."""
+    fields = _unpack_fixed_header(raw)
+    if fields[3] & _FLAG_DATA_REFERENCE:
+        raise ValueError("reference record has no data; see attach_data()")
+    offset = _HEADER.size + _metadata_length(fields)
+    data_length = fields[13]
+    if len(raw) < offset + data_length:
+        raise ValueError("record is truncated")
+    return offset, data_length
+
+
+def peek_header(fixed_header: bytes | memoryview) -> tuple[VerificationStatus, int]:
+    """Return (verification_status, data_length) from the fixed header alone."""
+    fields = _unpack_fixed_header(fixed_header)
+    return _STATUS_BY_CODE[fields[2]], fields[13]
+
+
+def patch_verification(
+    fixed_header: bytes,
+    status: VerificationStatus,
+    verified_at: datetime | None,
+) -> bytes:
+    """Return a record's fixed header with its verification status and time replaced.
+
+    Both live in the fixed-size header, so a store can update them in place
+    without rewriting the record.
+    """
+    fields = list(_unpack_fixed_header(fixed_header))
+    fields[2] = _STATUS_CODES[status]
+    if verified_at is None:
+        fields[3] &= ~_FLAG_HAS_VERIFIED_AT
+        fields[9] = 0
+    else:
+        fields[3] |= _FLAG_HAS_VERIFIED_AT
+        fields[9] = _to_micros(verified_at)
+    return _HEADER.pack(*fields)
+
+
+def _metadata_length(fields: tuple) -> int:
+    # Bytes between the fixed header and the fragment data.
+    length = fields[10] + fields[11] + fields[12]
+    if fields[3] & _FLAG_HAS_SHA256:
+        length += _SHA256_LENGTH
+    return length
+
+
+def _unpack_fixed_header(raw: bytes | memoryview) -> tuple:
+    if len(raw) < _HEADER.size:
+        raise ValueError("record is shorter than the fixed header")
+    fields = _HEADER.unpack_from(raw, 0)
+    magic, version, status_code = fields[0], fields[1], fields[2]
+    if magic != RECORD_MAGIC:
+        raise ValueError("not a veri-store fragment record")
+    if version != RECORD_VERSION:
+        raise ValueError(f"unsupported record version {version}")
+    if status_code not in _STATUS_BY_CODE:
+        raise ValueError(f"unknown verification status code {status_code}")
+    durability_code = (fields[3] >> _DURABILITY_SHIFT) & _DURABILITY_MASK
+    if durability_code not in _DURABILITY_BY_CODE:
+        raise ValueError(f"unknown durability code {durability_code}")
+    return fields
@@ -0,0 +1,287 @@
+from __future__ import annotations
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator
+import logging
+import os
+import threading
+import time
+
+from .backend import StorageBackend
+from .fragment import VerificationStatus
+from .layout import INDEX_DIR_NAME, iter_block_dirs
+from .store import REFERENCE_SUFFIX, FragmentNotFoundError, FragmentStore
+
+_log = logging.getLogger(__name__)
+
+# INVALID fragments are kept this long after they were found invalid, for
+# forensics, and then deleted.
+DEFAULT_INVALID_RETENTION_SECONDS: float = 7 * 24 * 60 * 60
+
+# A temp file older than this belongs to no write still in flight.
+DEFAULT_TMP_MAX_AGE_SECONDS: float = 60 * 60
+
+# Each tick examines at most this many fragments, files or directories.
+DEFAULT_MAX_WORK_PER_TICK: int = 256
+DEFAULT_TICK_SECONDS: float = 1.0
+
+# Seconds between the end of one pass over the store and the next.
+DEFAULT_GC_INTERVAL_SECONDS: float = 10 * 60
+
+LockFactory = Callable[[str, int], AbstractContextManager]
+
+_TMP_SUFFIX = ".tmp"
+_MTIME_SLACK_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class GcStats:
+    passes: int
+    invalid_removed: int
+    temp_files_removed: int
+    block_dirs_removed: int
+    objects_removed: int
+
+
+class GarbageCollector:
+    """Incrementally removes what the store no longer needs.
+
+    A pass walks the store and
+      - deletes INVALID fragments once `invalid_retention` seconds have
+        passed since they were found invalid (their verified_at),
+      - removes *.tmp files left by interrupted writes: any written before
+        the collector started, or older than `tmp_max_age`,
+      - removes block directories left empty (FragmentStore),
+      - in a deduplicating FragmentStore, drops object references and
+        objects that no record uses, left behind by interrupted puts.
+
+    Work is split into ticks of at most `max_work_per_tick` fragments,
+    files or directories, `tick` seconds apart, so a pass over a large
+    store never holds up requests.  Fragments are deleted under
+    `lock_for(block_id, index)`, the server's per-fragment lock, and
+    `on_delete(block_id, index)` runs after each deletion.
+    """
+
+    def __init__(
+        self,
+        store: StorageBackend,
+        lock_for: LockFactory | None = None,
+        invalid_retention: float = DEFAULT_INVALID_RETENTION_SECONDS,
+        tmp_max_age: float = DEFAULT_TMP_MAX_AGE_SECONDS,
+        max_work_per_tick: int = DEFAULT_MAX_WORK_PER_TICK,
+        tick: float = DEFAULT_TICK_SECONDS,
+        interval: float = DEFAULT_GC_INTERVAL_SECONDS,
+        on_delete: Callable[[str, int], None] | None = None,
+    ) -> None:
+        if invalid_retention < 0 or tmp_max_age < 0:
+            raise ValueError("retention times must not be negative")
+        if max_work_per_tick < 1:
+            raise ValueError("max_work_per_tick must be at least 1")
+        if tick < 0 or interval < 0:
+            raise ValueError("tick and interval must not be negative")
+
+        self.store = store
+        self.lock_for = lock_for
+        self.invalid_retention = invalid_retention
+        self.tmp_max_age = tmp_max_age
+        self.max_work_per_tick = max_work_per_tick
+        self.tick = tick
+        self.interval = interval
+        self.on_delete = on_delete
+
+        # Temp files older than this were left by an earlier process.  File
+        # timestamps are coarser than time.time(), hence the margin.
+        self._started_at = time.time() - _MTIME_SLACK_SECONDS
+        self._pass: Iterator[None] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._guard = threading.Lock()
+        self._passes = 0
+        self._invalid_removed = 0
+        self._temp_files_removed = 0
+        self._block_dirs_removed = 0
+        self._objects_removed = 0
+
+    def start(self) -> threading.Thread:
+        """Run ticks on a daemon thread until stop()."""
+        self._thread = threading.Thread(target=self._run, name="veri-store-gc", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> GcStats:
+        with self._guard:
+            return GcStats(
+                passes=self._passes,
+                invalid_removed=self._invalid_removed,
+                temp_files_removed=self._temp_files_removed,
+                block_dirs_removed=self._block_dirs_removed,
+                objects_removed=self._objects_removed,
+            )
+
+    def run_tick(self) -> bool:
+        """Do up to max_work_per_tick units of work; returns True when a pass just finished."""
+        if self._pass is None:
+            self._pass = self._collect()
+        done = sum(1 for _ in islice(self._pass, self.max_work_per_tick))
+        if done < self.max_work_per_tick:
+            self._pass = None
+            with self._guard:
+                self._passes += 1
+            return True
+        return False
+
+    def run_pass(self) -> None:
+        """Finish the current pass (or run a whole new one) without pausing."""
+        while not self.run_tick():
+            pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                finished = self.run_tick()
+            except Exception:
+                _log.exception("Garbage collection tick failed")
+                self._pass = None
+                finished = True
+            if self._stop.wait(self.interval if finished else self.tick):
+                return
+
+    # ------------------------------------------------------------------
+    # One pass; yields once per unit of work
+    # ------------------------------------------------------------------
+
+    def _collect(self) -> Iterator[None]:
+        base_dir = getattr(self.store, "base_dir", None)
+        if base_dir is not None:
+            # Snapshot, layout and checkpoint temp files.
+            for directory in (Path(base_dir), Path(base_dir) / INDEX_DIR_NAME):
+                yield from self._remove_stale_temp_files(directory)
+
+        if isinstance(self.store, FragmentStore):
+            for block_path in map(Path, iter_block_dirs(self.store.base_dir, self.store.shard_levels)):
+                block_id = block_path.name
+                # Judged before this pass touches it: removing files below
+                # updates the directory's mtime.
+                try:
+                    idle = self._is_stale(block_path.stat().st_mtime)
+                except FileNotFoundError:
+                    continue
+                yield from self._remove_stale_temp_files(block_path)
+                yield from self._expire_invalid(block_id)
+                yield from self._prune_references(block_id, block_path)
+                if idle:
+                    self._remove_if_empty(block_id, block_path)
+                yield
+            yield from self._collect_objects()
+        else:
+            for block_id in self.store.list_blocks():
+                yield from self._expire_invalid(block_id)
+
+    def _expire_invalid(self, block_id: str) -> Iterator[None]:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.invalid_retention)
+        for index in self.store.list_indices(block_id):
+            try:
+                header = self.store.get_metadata(block_id, index)
+            except FragmentNotFoundError:
+                continue
+            if header.verification_status is VerificationStatus.INVALID:
+                found_invalid_at = header.verified_at or header.received_at
+                if found_invalid_at <= cutoff:
+                    self._delete_invalid(block_id, index, cutoff)
+            yield
+
+    def _delete_invalid(self, block_id: str, index: int, cutoff: datetime) -> None:
+        with self.lock_for(block_id, index) if self.lock_for is not None else nullcontext():
+            # Re-check under the lock: the fragment may have been replaced.
+            try:
+                header = self.store.get_metadata(block_id, index)
+            except FragmentNotFoundError:
+                return
+            found_invalid_at = header.verified_at or header.received_at
+            if header.verification_status is not VerificationStatus.INVALID or found_invalid_at > cutoff:
+                return
+            try:
+                self.store.delete(block_id, index)
+            except FragmentNotFoundError:
+                return
+        _log.info("Deleted INVALID fragment (%s, %d) past its retention", block_id, index)
+        with self._guard:
+            self._invalid_removed += 1
+        if self.on_delete is not None:
+            self.on_delete(block_id, index)
+
+    def _prune_references(self, block_id: str, block_path: Path) -> Iterator[None]:
+        try:
+            with os.scandir(block_path) as entries:
+                names = [entry.name for entry in entries if entry.name.endswith(REFERENCE_SUFFIX)]
+        except FileNotFoundError:
+            return
+        indices: set[int] = set()
+        for name in names:
+            try:
+                indices.add(int(name.split(".")[0].removeprefix("fragment_")))
+            except ValueError:
+                continue
+        for index in sorted(indices):
+            with self.lock_for(block_id, index) if self.lock_for is not None else nullcontext():
+                released = self.store.prune_references(block_id, index)
+            if released:
+                with self._guard:
+                    self._objects_removed += released
+            yield
+
+    def _collect_objects(self) -> Iterator[None]:
+        # Objects nothing links to: stored by a put that never linked them.
+        for directory, _, files in os.walk(self.store.objects_dir):
+            yield from self._remove_stale_temp_files(Path(directory))
+            for name in files:
+                if name.endswith(_TMP_SUFFIX):
+                    continue
+                try:
+                    digest = bytes.fromhex(name)
+                    stale = self._is_stale(os.stat(os.path.join(directory, name)).st_mtime)
+                except (ValueError, FileNotFoundError):
+                    continue
+                if stale and self.store.release_object(digest):
+                    with self._guard:
+                        self._objects_removed += 1
+                yield
+
+    def _remove_stale_temp_files(self, directory: Path) -> Iterator[None]:
+        try:
+            with os.scandir(directory) as entries:
+                temps = [entry for entry in entries if entry.name.endswith(_TMP_SUFFIX)]
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        for entry in temps:
+            try:
+                if self._is_stale(entry.stat(follow_symlinks=False).st_mtime):
+                    os.unlink(entry.path)
+                    with self._guard:
+                        self._temp_files_removed += 1
+            except FileNotFoundError:
+                pass  # published or cleaned up by its writer meanwhile
+            yield
+
+    def _remove_if_empty(self, block_id: str, block_path: Path) -> None:
+        # Only called for directories nobody has touched recently: one that
+        # was may be about to receive a put.
+        if self.store.list_indices(block_id):
+            return
+        try:
+            block_path.rmdir()
+        except OSError:
+            return  # not empty, or already gone
+        with self._guard:
+            self._block_dirs_removed += 1
+
+    def _is_stale(self, mtime: float) -> bool:
+        return mtime < self._started_at or time.time() - mtime > self.tmp_max_age
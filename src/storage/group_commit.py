@@ -0,0 +1,254 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Sequence, TypeVar
+import logging
+import os
+import threading
+import time
+
+_log = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# How long the flusher waits after the first write of a batch for others to
+# join it, and how many writes one batch may hold.
+DEFAULT_WINDOW_SECONDS: float = 0.002
+DEFAULT_MAX_BATCH: int = 256
+
+# Threads issuing one batch's fsyncs side by side.
+DEFAULT_SYNC_WORKERS: int = 16
+
+# Seconds between background flushes of Durability.BATCH writes.
+DEFAULT_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+
+@dataclass
+class _PendingWrite:
+    fd: int
+    publish: Callable[[], None]
+    directory: Path
+    done: threading.Event = field(default_factory=threading.Event)
+    error: BaseException | None = None
+
+
+class GroupCommitter:
+    """Shares fsyncs between concurrent writers.
+
+    A writer hands over an open, written (not yet synced) temp file, the
+    `publish` step that makes it visible (the rename), and the directory it
+    is published in.  A flusher thread collects writes for up to `window`
+    seconds or `max_batch` writes, then for the whole batch:
+
+      1. fsyncs every temp file, then runs `on_batch_synced` (the store
+         syncs its index journal here, before anything is renamed),
+      2. publishes each one whose fsync succeeded,
+      3. fsyncs each parent directory once,
+
+    and only then wakes the writers.  The fsyncs of steps 1 and 3 are issued
+    concurrently from up to `sync_workers` threads, so the filesystem can
+    commit them together rather than one device flush after another.  Each write is durable when commit()
+    returns, exactly as with a private fsync + rename + directory fsync.
+    """
+
+    def __init__(
+        self,
+        window: float = DEFAULT_WINDOW_SECONDS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        on_batch_synced: Callable[[], None] | None = None,
+        sync_workers: int = DEFAULT_SYNC_WORKERS,
+    ) -> None:
+        if window < 0:
+            raise ValueError("window must not be negative")
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        if sync_workers < 1:
+            raise ValueError("sync_workers must be at least 1")
+        self.window = window
+        self.max_batch = max_batch
+        self.on_batch_synced = on_batch_synced
+        self.sync_workers = sync_workers
+        self._sync_pool: ThreadPoolExecutor | None = None
+
+        self._pending: list[_PendingWrite] = []
+        self._cond = threading.Condition()
+        self._flusher: threading.Thread | None = None
+
+        self.batches = 0
+        self.writes = 0
+
+    def commit(self, fd: int, publish: Callable[[], None], directory: Path) -> None:
+        """Block until `fd` is synced, published and its directory synced."""
+        write = _PendingWrite(fd, publish, directory)
+        with self._cond:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run, name="veri-store-group-commit", daemon=True
+                )
+                self._flusher.start()
+            self._pending.append(write)
+            self._cond.notify_all()
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+            self._flush(batch)
+
+    def _flush(self, batch: Sequence[_PendingWrite]) -> None:
+        try:
+            synced: list[_PendingWrite] = []
+            for write, error in zip(batch, self._sync_each(os.fsync, [write.fd for write in batch])):
+                if error is None:
+                    synced.append(write)
+                else:
+                    write.error = error
+            if self.on_batch_synced is not None and synced:
+                try:
+                    self.on_batch_synced()
+                except BaseException as error:
+                    for write in synced:
+                        write.error = error
+                    synced = []
+
+            published: list[_PendingWrite] = []
+            for write in synced:
+                try:
+                    write.publish()
+                    published.append(write)
+                except BaseException as error:
+                    write.error = error
+
+            directories = list({write.directory for write in published})
+            directory_error = next(
+                (error for error in self._sync_each(fsync_directory, directories) if error is not None), None
+            )
+            if directory_error is not None:
+                for write in published:
+                    write.error = directory_error
+
+            self.batches += 1
+            self.writes += len(batch)
+        finally:
+            for write in batch:
+                write.done.set()
+
+    def _sync_each(self, sync: Callable[[_T], None], targets: Sequence[_T]) -> list[BaseException | None]:
+        # Runs sync on every target at once; returns each one's error, or None.
+        def run(target: _T) -> BaseException | None:
+            try:
+                sync(target)
+            except BaseException as error:
+                return error
+            return None
+
+        if len(targets) <= 1:
+            return [run(target) for target in targets]
+        if self._sync_pool is None:
+            # Only the flusher thread gets here.
+            self._sync_pool = ThreadPoolExecutor(
+                max_workers=self.sync_workers, thread_name_prefix="veri-store-group-sync"
+            )
+        return list(self._sync_pool.map(run, targets))
+
+
+def fsync_directory(path: Path) -> None:
+    # Directories cannot be opened for fsync on some platforms (Windows);
+    # there the rename is as durable as the OS makes it.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except (PermissionError, IsADirectoryError):
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class BackgroundFlusher:
+    """Periodically fsyncs files that were written without a sync.
+
+    Used for Durability.BATCH puts: the write is acknowledged at once and
+    becomes durable within about `interval` seconds, when the flusher fsyncs
+    every file (and parent directory) registered since its last pass.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        on_flushed: Callable[[], None] | None = None,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.on_flushed = on_flushed
+        self._pending: set[Path] = set()
+        self._guard = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, path: Path) -> None:
+        with self._guard:
+            self._pending.add(path)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="veri-store-batch-flush", daemon=True
+                )
+                self._thread.start()
+
+    def pending(self) -> int:
+        with self._guard:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Sync everything registered so far; returns the number of files synced."""
+        with self._guard:
+            paths, self._pending = self._pending, set()
+        if not paths:
+            return 0
+
+        synced = 0
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue  # replaced or deleted since it was written
+            try:
+                os.fsync(fd)
+                synced += 1
+            finally:
+                os.close(fd)
+        for directory in {path.parent for path in paths}:
+            try:
+                fsync_directory(directory)
+            except FileNotFoundError:
+                pass
+        if self.on_flushed is not None:
+            self.on_flushed()
+        return synced
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                _log.exception("Background flush failed")
@@ -0,0 +1,386 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import NamedTuple
+import base64
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import zlib
+
+from .fragment import FIXED_HEADER_SIZE, VerificationStatus, peek_header
+from .layout import list_block_dirs
+from .stats import FragmentInfo, ObjectTotals
+
+_log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Persistent FragmentStore index
+#
+# index.snapshot is the full {block_id: {index: FragmentInfo}} map as of a
+# journal generation G; index.journal.<g> files (g >= G) record every
+# add/remove made since, in order.  Startup loads the snapshot and replays
+# the journals instead of walking the whole store.
+#
+# snapshot: header | object_count, object_bytes | per block: block_id_length,
+#           index_count, block_id, (index, status, data_length,
+#           disk_bytes)... | crc32 of everything before it
+# journal:  entries of crc32 (of the rest) | op | index | block_id_length |
+#           block_id | (status, data_length, disk_bytes) for OP_ADD
+#
+# Dedup objects are journaled too, so their totals need no walk of the
+# object tree: OP_OBJECT entries put the hex digest in block_id, 1 (stored)
+# or 0 (deleted) in index, and the object's size after it.
+#
+# A journal entry is written before the file change it describes, so after a
+# crash the change may or may not have happened; replay re-reads each
+# journaled fragment from disk (read_fragment_info) rather than trusting the
+# entry.  OP_CHECK names a fragment whose change was still in flight when
+# the journal was rotated, and only asks for that re-read; OP_OBJECT_CHECK
+# does the same for an object.
+#
+# Version 1 snapshots held bare indices; they are treated as missing, so the
+# first startup after an upgrade rescans once.  Version 2 snapshots have no
+# object totals, which are then counted once from the object tree.
+# ---------------------------------------------------------------------------
+
+_SNAPSHOT_NAME = "index.snapshot"
+_SNAPSHOT_MAGIC = b"VSIS"
+_SNAPSHOT_VERSION = 3
+_SNAPSHOT_HEADER = struct.Struct(">4sBQQI")
+_SNAPSHOT_OBJECTS = struct.Struct(">QQ")
+_SNAPSHOT_BLOCK = struct.Struct(">HI")
+_SNAPSHOT_FRAGMENT = struct.Struct(">IBQQ")
+_CRC = struct.Struct(">I")
+
+_JOURNAL_PREFIX = "index.journal."
+_JOURNAL_ENTRY = struct.Struct(">IBIH")
+_JOURNAL_INFO = struct.Struct(">BQQ")
+_JOURNAL_SIZE = struct.Struct(">Q")
+OP_ADD = 1
+OP_REMOVE = 2
+OP_CHECK = 3
+OP_OBJECT = 4
+OP_OBJECT_CHECK = 5
+
+_STATUS_CODES = {
+    VerificationStatus.UNVERIFIED: 0,
+    VerificationStatus.VALID: 1,
+    VerificationStatus.INVALID: 2,
+}
+_STATUS_BY_CODE = {code: status for status, code in _STATUS_CODES.items()}
+
+# Bytes following the block_id in a journal entry, by op.
+_ENTRY_EXTRA = {OP_ADD: _JOURNAL_INFO.size, OP_OBJECT: _JOURNAL_SIZE.size, OP_OBJECT_CHECK: _JOURNAL_SIZE.size}
+
+# Blocks per unit of work in a parallel rescan.
+_SCAN_BATCH = 512
+
+Index = dict[str, dict[int, FragmentInfo]]
+
+
+class Snapshot(NamedTuple):
+    generation: int
+    index: Index
+    legacy_count: int
+    objects: ObjectTotals | None = None  # None: not recorded (version 2)
+
+
+@dataclass
+class Replay:
+    """What replaying journals changed, for the caller to check against the disk."""
+
+    fragments: set[tuple[str, int]] = field(default_factory=set)
+    # Hex digest -> (journaled as stored, size), for every object logged.
+    objects: dict[str, tuple[bool, int]] = field(default_factory=dict)
+    object_count: int = 0
+    object_bytes: int = 0
+
+
+class ScanResult(NamedTuple):
+    index: Index
+    legacy_count: int
+
+
+def load_snapshot(index_dir: Path) -> Snapshot | None:
+    """Return the saved snapshot, or None if it is missing or corrupt."""
+    try:
+        raw = (index_dir / _SNAPSHOT_NAME).read_bytes()
+    except FileNotFoundError:
+        return None
+    try:
+        if len(raw) < _SNAPSHOT_HEADER.size + _CRC.size:
+            raise ValueError("snapshot is truncated")
+        (crc,) = _CRC.unpack_from(raw, len(raw) - _CRC.size)
+        if zlib.crc32(memoryview(raw)[: -_CRC.size]) != crc:
+            raise ValueError("snapshot checksum mismatch")
+        magic, version, generation, legacy_count, block_count = _SNAPSHOT_HEADER.unpack_from(raw, 0)
+        if magic != _SNAPSHOT_MAGIC or version not in (2, _SNAPSHOT_VERSION):
+            raise ValueError("not an index snapshot")
+
+        index: Index = {}
+        cursor = _SNAPSHOT_HEADER.size
+        objects: ObjectTotals | None = None
+        if version == _SNAPSHOT_VERSION:
+            objects = ObjectTotals(*_SNAPSHOT_OBJECTS.unpack_from(raw, cursor))
+            cursor += _SNAPSHOT_OBJECTS.size
+        for _ in range(block_count):
+            block_id_length, index_count = _SNAPSHOT_BLOCK.unpack_from(raw, cursor)
+            cursor += _SNAPSHOT_BLOCK.size
+            block_id = raw[cursor : cursor + block_id_length].decode("utf-8")
+            cursor += block_id_length
+            infos: dict[int, FragmentInfo] = {}
+            for _ in range(index_count):
+                fragment_index, status_code, data_length, disk_bytes = _SNAPSHOT_FRAGMENT.unpack_from(raw, cursor)
+                cursor += _SNAPSHOT_FRAGMENT.size
+                infos[fragment_index] = FragmentInfo(data_length, disk_bytes, _STATUS_BY_CODE[status_code])
+            index[block_id] = infos
+        return Snapshot(generation, index, legacy_count, objects)
+    except (ValueError, KeyError, struct.error, UnicodeDecodeError) as error:
+        _log.warning("Ignoring index snapshot in %s (%s)", index_dir, error)
+        return None
+
+
+def write_snapshot(index_dir: Path, snapshot: Snapshot) -> None:
+    """Atomically replace the snapshot, then drop the journals it covers."""
+    parts = [
+        _SNAPSHOT_HEADER.pack(
+            _SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, snapshot.generation, snapshot.legacy_count, len(snapshot.index)
+        ),
+        _SNAPSHOT_OBJECTS.pack(snapshot.objects.count, snapshot.objects.bytes),
+    ]
+    for block_id, infos in snapshot.index.items():
+        encoded = block_id.encode("utf-8")
+        parts.append(_SNAPSHOT_BLOCK.pack(len(encoded), len(infos)))
+        parts.append(encoded)
+        for fragment_index in sorted(infos):
+            info = infos[fragment_index]
+            parts.append(
+                _SNAPSHOT_FRAGMENT.pack(fragment_index, _STATUS_CODES[info.status], info.data_length, info.disk_bytes)
+            )
+    payload = b"".join(parts)
+    payload += _CRC.pack(zlib.crc32(payload))
+
+    tmp_path: Path | None = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            mode="wb", dir=index_dir, prefix=f"{_SNAPSHOT_NAME}.", suffix=".tmp", delete=False
+        ) as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            tmp_path = Path(f.name)
+        os.replace(tmp_path, index_dir / _SNAPSHOT_NAME)
+        tmp_path = None
+    finally:
+        if tmp_path is not None:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    for generation, path in journal_paths(index_dir):
+        if generation < snapshot.generation:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def journal_paths(index_dir: Path) -> list[tuple[int, Path]]:
+    """Return (generation, path) for every journal file, oldest first."""
+    journals: list[tuple[int, Path]] = []
+    for p in index_dir.glob(f"{_JOURNAL_PREFIX}*"):
+        try:
+            journals.append((int(p.name.removeprefix(_JOURNAL_PREFIX)), p))
+        except ValueError:
+            continue
+    return sorted(journals)
+
+
+def replay_journal(path: Path, index: Index, replay: Replay | None = None) -> int:
+    """Apply a journal's entries to `index`; returns the number applied.
+
+    Replay stops at the first torn or corrupt entry: everything after it was
+    never acknowledged as durable.  Every fragment and object logged, and
+    the change in object totals, are collected in `replay`.
+    """
+    replay = replay if replay is not None else Replay()
+    raw = path.read_bytes()
+    applied = 0
+    cursor = 0
+    while cursor + _JOURNAL_ENTRY.size <= len(raw):
+        crc, op, fragment_index, block_id_length = _JOURNAL_ENTRY.unpack_from(raw, cursor)
+        block_id_end = cursor + _JOURNAL_ENTRY.size + block_id_length
+        end = block_id_end + _ENTRY_EXTRA.get(op, 0)
+        if end > len(raw) or zlib.crc32(memoryview(raw)[cursor + _CRC.size : end]) != crc:
+            break
+        block_id = raw[cursor + _JOURNAL_ENTRY.size : block_id_end].decode("utf-8")
+        if op == OP_ADD:
+            status_code, data_length, disk_bytes = _JOURNAL_INFO.unpack_from(raw, block_id_end)
+            if status_code not in _STATUS_BY_CODE:
+                break
+            index.setdefault(block_id, {})[fragment_index] = FragmentInfo(
+                data_length, disk_bytes, _STATUS_BY_CODE[status_code]
+            )
+        elif op == OP_REMOVE:
+            infos = index.get(block_id)
+            if infos is not None:
+                infos.pop(fragment_index, None)
+                if not infos:
+                    index.pop(block_id, None)
+        elif op in (OP_OBJECT, OP_OBJECT_CHECK):
+            (size,) = _JOURNAL_SIZE.unpack_from(raw, block_id_end)
+            stored = bool(fragment_index)
+            if op == OP_OBJECT:
+                replay.object_count += 1 if stored else -1
+                replay.object_bytes += size if stored else -size
+            replay.objects[block_id] = (stored, size)
+        elif op != OP_CHECK:
+            break
+        if op in (OP_ADD, OP_REMOVE, OP_CHECK):
+            replay.fragments.add((block_id, fragment_index))
+        applied += 1
+        cursor = end
+    return applied
+
+
+class IndexJournal:
+    """Append-only log of index changes for one generation."""
+
+    def __init__(self, index_dir: Path, generation: int) -> None:
+        self.generation = generation
+        self.path = index_dir / f"{_JOURNAL_PREFIX}{generation}"
+        self.entries = 0
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._closed = False
+        self._guard = threading.Lock()
+
+    def append(self, op: int, block_id: str, index: int, info: FragmentInfo | None = None) -> None:
+        encoded = block_id.encode("utf-8")
+        body = _JOURNAL_ENTRY.pack(0, op, index, len(encoded))[_CRC.size :] + encoded
+        if op == OP_ADD:
+            body += _JOURNAL_INFO.pack(_STATUS_CODES[info.status], info.data_length, info.disk_bytes)
+        self._write(body)
+
+    def append_object(self, op: int, digest: bytes, stored: bool, size: int) -> None:
+        """Log a dedup object being stored or deleted (OP_OBJECT), or restate one (OP_OBJECT_CHECK)."""
+        encoded = digest.hex().encode("ascii")
+        body = _JOURNAL_ENTRY.pack(0, op, int(stored), len(encoded))[_CRC.size :] + encoded
+        self._write(body + _JOURNAL_SIZE.pack(size))
+
+    def _write(self, body: bytes) -> None:
+        os.write(self._fd, _CRC.pack(zlib.crc32(body)) + body)
+        self.entries += 1
+
+    def sync(self) -> None:
+        # A journal rotated out from under a writer was fsynced when it was
+        # closed, and stays on disk until the snapshot replacing it is.
+        with self._guard:
+            if not self._closed:
+                os.fsync(self._fd)
+
+    def close(self) -> None:
+        with self._guard:
+            if self._closed:
+                return
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._closed = True
+
+
+def scan_store(base_dir: Path, workers: int | None = None, shard_levels: int = 0) -> ScanResult:
+    """Rebuild the index by listing every block directory under base_dir.
+
+    Block directories are split into batches listed concurrently with
+    os.scandir (directory reads release the GIL), which keeps a cold rescan
+    of a large store bounded by the disk rather than by one thread.  Each
+    record's fixed header is read for its status and payload length.
+    """
+    block_dirs = list_block_dirs(base_dir, shard_levels)
+
+    batches = [block_dirs[i : i + _SCAN_BATCH] for i in range(0, len(block_dirs), _SCAN_BATCH)]
+    index: Index = {}
+    legacy_count = 0
+    if len(batches) <= 1:
+        results = [_scan_block_dirs(batch) for batch in batches]
+    else:
+        workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="veri-store-scan") as executor:
+            results = list(executor.map(_scan_block_dirs, batches))
+    for batch_index, batch_legacy in results:
+        index.update(batch_index)
+        legacy_count += batch_legacy
+    return ScanResult(index, legacy_count)
+
+
+def _scan_block_dirs(block_dirs: list[str]) -> tuple[Index, int]:
+    index: Index = {}
+    legacy_count = 0
+    for block_dir in block_dirs:
+        block_id = os.path.basename(block_dir)
+        try:
+            with os.scandir(block_dir) as entries:
+                for entry in entries:
+                    stem, dot, suffix = entry.name.rpartition(".")
+                    if not dot or not stem.startswith("fragment_") or suffix not in ("bin", "json"):
+                        continue
+                    try:
+                        fragment_index = int(stem.removeprefix("fragment_"))
+                    except ValueError:
+                        continue
+                    infos = index.setdefault(block_id, {})
+                    if suffix == "json":
+                        legacy_count += 1
+                        if fragment_index in infos:
+                            continue  # a binary record wins over a leftover legacy copy
+                        infos[fragment_index] = _legacy_info(entry.path)
+                    else:
+                        infos[fragment_index] = _record_info(entry.path)
+        except OSError:
+            continue
+    return index, legacy_count
+
+
+def read_fragment_info(record_path: Path, legacy_path: Path) -> FragmentInfo | None:
+    """Index entry for one fragment as its files stand, or None if it has none."""
+    if os.path.exists(record_path):
+        return _record_info(os.fspath(record_path))
+    if os.path.exists(legacy_path):
+        return _legacy_info(os.fspath(legacy_path))
+    return None
+
+
+def _record_info(path: str) -> FragmentInfo:
+    try:
+        with open(path, "rb") as f:
+            disk_bytes = os.fstat(f.fileno()).st_size
+            status, data_length = peek_header(f.read(FIXED_HEADER_SIZE))
+    except (OSError, ValueError):
+        return _unreadable_info(path)
+    return FragmentInfo(data_length, disk_bytes, status)
+
+
+def _legacy_info(path: str) -> FragmentInfo:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        d = json.loads(raw)
+        data_length = len(base64.b64decode(d["data"]))
+        status = VerificationStatus(d.get("verification_status", VerificationStatus.UNVERIFIED.value))
+    except (OSError, ValueError, KeyError, TypeError):
+        return _unreadable_info(path)
+    return FragmentInfo(data_length, len(raw), status)
+
+
+def _unreadable_info(path: str) -> FragmentInfo:
+    # Still listed, as before; it holds no payload anyone can read.
+    try:
+        disk_bytes = os.stat(path).st_size
+    except OSError:
+        disk_bytes = 0
+    return FragmentInfo(0, disk_bytes, VerificationStatus.UNVERIFIED)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterator
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+_log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Block directory layout
+#
+# With shard_levels = L, a block lives at
+#
+#   base_dir / h[0:2] / h[2:4] / ... (L levels) / block_id
+#
+# where h is the hex SHA-256 of the block_id.  Each level fans out 256 ways,
+# so two levels keep every directory to a few hundred entries up to tens of
+# millions of blocks.  L = 0 is the original flat layout.
+#
+# The layout in use is recorded in base_dir/.layout.  Stores without that
+# file predate sharding and are flat.  A store keeps its layout unless it is
+# opened with another shard_levels; only then are its blocks moved.
+# ---------------------------------------------------------------------------
+
+DEFAULT_SHARD_LEVELS: int = 2
+MAX_SHARD_LEVELS: int = 4
+
+INDEX_DIR_NAME = ".index"
+LAYOUT_FILE_NAME = ".layout"
+# Blocks are parked here while a store moves between layouts.
+STAGING_DIR_NAME = ".relayout"
+
+# Deduplicated payloads, one file per distinct SHA-256 (dedup mode).
+OBJECTS_DIR_NAME = ".objects"
+
+# The server's block catalog (catalog.py) and SQLite's files beside it.
+CATALOG_NAME = ".catalog.sqlite3"
+_CATALOG_FILES = (CATALOG_NAME, f"{CATALOG_NAME}-wal", f"{CATALOG_NAME}-shm", f"{CATALOG_NAME}-journal")
+
+RESERVED_NAMES = frozenset(
+    {INDEX_DIR_NAME, LAYOUT_FILE_NAME, STAGING_DIR_NAME, OBJECTS_DIR_NAME, *_CATALOG_FILES}
+)
+
+
+def validate_block_id(block_id: str) -> None:
+    # In the flat layout a block directory sits next to the store's own
+    # files, and "." or ".." would name a directory that is not the block's.
+    if block_id in RESERVED_NAMES or block_id in (".", ".."):
+        raise ValueError(f"{block_id!r} is reserved and cannot be used as a block id")
+
+
+_SHARD_WIDTH = 2
+
+
+def validate_shard_levels(shard_levels: int) -> None:
+    if not 0 <= shard_levels <= MAX_SHARD_LEVELS:
+        raise ValueError(f"shard_levels must be between 0 and {MAX_SHARD_LEVELS}")
+
+
+def shard_parts(block_id: str, shard_levels: int) -> tuple[str, ...]:
+    """Return the shard directory names a block lives under."""
+    if not shard_levels:
+        return ()
+    digest = hashlib.sha256(block_id.encode("utf-8")).hexdigest()
+    return tuple(digest[i * _SHARD_WIDTH : (i + 1) * _SHARD_WIDTH] for i in range(shard_levels))
+
+
+def block_dir(base_dir: Path, block_id: str, shard_levels: int) -> Path:
+    return base_dir.joinpath(*shard_parts(block_id, shard_levels), block_id)
+
+
+def existing_shard_levels(base_dir: Path) -> int:
+    """Return the layout the store at base_dir is in (DEFAULT_SHARD_LEVELS for a new, empty one)."""
+    recorded = read_layout(base_dir)
+    if recorded is not None:
+        return recorded
+    # No layout file: either written before sharding existed (flat), or new.
+    return 0 if next(iter_block_dirs(base_dir, 0), None) is not None else DEFAULT_SHARD_LEVELS
+
+
+def read_layout(base_dir: Path) -> int | None:
+    """Return the recorded shard_levels, or None if the store predates the layout file."""
+    try:
+        raw = (base_dir / LAYOUT_FILE_NAME).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    return int(json.loads(raw)["shard_levels"])
+
+
+def write_layout(base_dir: Path, shard_levels: int) -> None:
+    tmp_path = base_dir / f"{LAYOUT_FILE_NAME}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"shard_levels": shard_levels}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, base_dir / LAYOUT_FILE_NAME)
+
+
+def list_block_dirs(base_dir: Path, shard_levels: int) -> list[str]:
+    """Return the path of every block directory in a store with the given layout."""
+    return list(iter_block_dirs(base_dir, shard_levels))
+
+
+def iter_block_dirs(base_dir: Path, shard_levels: int, depth: int = 0) -> Iterator[str]:
+    """Yield block directory paths lazily, one shard directory listing at a time."""
+    try:
+        with os.scandir(base_dir) as entries:
+            subdirs = [
+                entry.path
+                for entry in entries
+                if not (depth == 0 and entry.name in RESERVED_NAMES)
+                and entry.is_dir(follow_symlinks=False)
+            ]
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    if depth == shard_levels:
+        yield from subdirs
+        return
+    for subdir in subdirs:
+        yield from iter_block_dirs(Path(subdir), shard_levels, depth + 1)
+
+
+def ensure_layout(base_dir: Path, shard_levels: int) -> int:
+    """Bring the store at base_dir to `shard_levels`, moving block directories if needed.
+
+    Blocks are moved with directory renames: first all of them into the
+    staging directory, then the new layout is recorded, then each one into
+    its new place.  A run interrupted at any point is finished by the next
+    call.  Returns the number of blocks moved into place.
+    """
+    validate_shard_levels(shard_levels)
+    staging = base_dir / STAGING_DIR_NAME
+    recorded = read_layout(base_dir)
+    current = 0 if recorded is None else recorded  # no file: written before sharding existed
+    if current == shard_levels and not staging.exists():
+        if recorded is None:
+            write_layout(base_dir, shard_levels)
+        return 0
+
+    if current != shard_levels:
+        staging.mkdir(exist_ok=True)
+        for path in list_block_dirs(base_dir, current):
+            _move_block(Path(path), staging / os.path.basename(path))
+        if current:
+            _remove_empty_shards(base_dir)
+        write_layout(base_dir, shard_levels)
+
+    moved = 0
+    for path in list_block_dirs(staging, 0):
+        name = os.path.basename(path)
+        target = block_dir(base_dir, name, shard_levels)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        _move_block(Path(path), target)
+        moved += 1
+    shutil.rmtree(staging, ignore_errors=True)
+    if moved:
+        _log.info("Moved %d block directories in %s to %d-level layout", moved, base_dir, shard_levels)
+    return moved
+
+
+def _move_block(source: Path, target: Path) -> None:
+    try:
+        os.rename(source, target)
+        return
+    except OSError:
+        if not target.is_dir():
+            raise
+    # The target already exists (a run interrupted mid-move): merge into it,
+    # keeping the copy that is already in place.
+    for entry in source.iterdir():
+        destination = target / entry.name
+        if destination.exists():
+            entry.unlink()
+        else:
+            os.rename(entry, destination)
+    source.rmdir()
+
+
+def _remove_empty_shards(base_dir: Path) -> None:
+    with os.scandir(base_dir) as entries:
+        top = [entry.path for entry in entries if entry.name not in RESERVED_NAMES and entry.is_dir()]
+    for shard in top:
+        for directory, _, _ in sorted(os.walk(shard), key=lambda item: -len(item[0])):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from datetime import datetime
+import threading
+
+from .fragment import (
+    FIXED_HEADER_SIZE,
+    FragmentRecord,
+    FragmentView,
+    RecordHeader,
+    VerificationStatus,
+    patch_verification,
+)
+from .sorted_keys import SortedKeySet
+from .store import FragmentNotFoundError
+
+
+class MemoryStore:
+    """Keeps fragment records in memory; nothing survives the process.
+
+    For benchmarks that should not be bound by disk I/O, tests, and caching
+    tiers.  Records are held in the binary record format, so views and
+    metadata reads behave exactly as they do on disk.
+    """
+
+    def __init__(self) -> None:
+        self._records: dict[tuple[str, int], bytes] = {}
+        self._index: dict[str, set[int]] = {}
+        self._block_ids = SortedKeySet()
+        self._lock = threading.Lock()
+
+    def put(self, record: FragmentRecord) -> None:
+        raw = record.to_bytes()
+        with self._lock:
+            self._records[(record.block_id, record.index)] = raw
+            if record.block_id not in self._index:
+                self._block_ids.add(record.block_id)
+            self._index.setdefault(record.block_id, set()).add(record.index)
+
+    def get(self, block_id: str, index: int) -> FragmentRecord:
+        return FragmentRecord.from_bytes(self._raw(block_id, index))
+
+    def open_view(self, block_id: str, index: int) -> FragmentView:
+        return FragmentView(self._raw(block_id, index))
+
+    def get_metadata(self, block_id: str, index: int) -> RecordHeader:
+        return RecordHeader.unpack(self._raw(block_id, index))
+
+    def list_metadata(self, block_id: str) -> list[RecordHeader]:
+        headers: list[RecordHeader] = []
+        for index in self.list_indices(block_id):
+            try:
+                headers.append(self.get_metadata(block_id, index))
+            except FragmentNotFoundError:
+                continue  # deleted since listing
+        return headers
+
+    def set_verification(
+        self,
+        block_id: str,
+        index: int,
+        status: VerificationStatus,
+        verified_at: datetime | None,
+    ) -> None:
+        """Record the outcome of re-verifying a stored fragment."""
+        key = (block_id, index)
+        with self._lock:
+            raw = self._records.get(key)
+            if raw is None:
+                raise FragmentNotFoundError(key)
+            header = patch_verification(raw[:FIXED_HEADER_SIZE], status, verified_at)
+            self._records[key] = header + raw[FIXED_HEADER_SIZE:]
+
+    def delete(self, block_id: str, index: int) -> None:
+        with self._lock:
+            if self._records.pop((block_id, index), None) is None:
+                raise FragmentNotFoundError((block_id, index))
+            indices = self._index[block_id]
+            indices.discard(index)
+            if not indices:
+                del self._index[block_id]
+                self._block_ids.discard(block_id)
+
+    def list_fragments(self, block_id: str) -> list[FragmentRecord]:
+        records: list[FragmentRecord] = []
+        for index in self.list_indices(block_id):
+            try:
+                records.append(self.get(block_id, index))
+            except FragmentNotFoundError:
+                continue  # deleted since listing
+        return records
+
+    def has(self, block_id: str, index: int) -> bool:
+        with self._lock:
+            return (block_id, index) in self._records
+
+    def fragment_count(self) -> int:
+        """Return the number of stored fragments (fast path)."""
+        with self._lock:
+            return len(self._records)
+
+    def list_blocks(self) -> list[str]:
+        """Return the ids of all blocks with at least one stored fragment."""
+        with self._lock:
+            return list(self._block_ids)
+
+    def list_blocks_page(
+        self, prefix: str = "", after: str | None = None, limit: int = 1000
+    ) -> list[tuple[str, list[int]]]:
+        """Return up to `limit` (block_id, indices) pairs after `after`, in block_id order."""
+        with self._lock:
+            return [
+                (block_id, sorted(self._index[block_id]))
+                for block_id in self._block_ids.page(prefix, after, limit)
+            ]
+
+    def list_indices(self, block_id: str) -> list[int]:
+        """Return stored indices for a block from in-memory state."""
+        with self._lock:
+            return sorted(self._index.get(block_id, set()))
+
+    def close(self) -> None:
+        pass
+
+    def _raw(self, block_id: str, index: int) -> bytes:
+        with self._lock:
+            raw = self._records.get((block_id, index))
+        if raw is None:
+            raise FragmentNotFoundError((block_id, index))
+        return raw
@@ -0,0 +1,653 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, NamedTuple
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+
+from .fragment import (
+    FIXED_HEADER_SIZE,
+    RECORD_MAGIC,
+    Durability,
+    FragmentRecord,
+    FragmentView,
+    RecordHeader,
+    VerificationStatus,
+    patch_verification,
+)
+from .group_commit import DEFAULT_FLUSH_INTERVAL_SECONDS, BackgroundFlusher
+from .sorted_keys import SortedKeySet
+from .store import FragmentNotFoundError
+
+_log = logging.getLogger(__name__)
+
+# Segments are rolled once they reach this size.
+DEFAULT_SEGMENT_SIZE: int = 64 * 1024 * 1024
+
+# Sealed segments whose live bytes fall below this share are compacted.
+DEFAULT_COMPACTION_THRESHOLD: float = 0.5
+
+# Seconds between background checkpoint/compaction passes.
+DEFAULT_MAINTENANCE_INTERVAL: float = 30.0
+
+# ---------------------------------------------------------------------------
+# On-disk format
+#
+# segment_<id>.log is a sequence of entries:
+#
+#   crc32 (of kind + body) | kind | body_length | body
+#
+# PUT bodies are FragmentRecord.to_bytes(); DELETE bodies are a tombstone
+# (index, then the utf-8 block_id).  Replaying segments in id order, last
+# entry wins, reproduces the index.
+#
+# index.checkpoint holds the index as of a (segment, offset) position, so
+# startup only replays what was appended after it.
+# ---------------------------------------------------------------------------
+
+_ENTRY = struct.Struct(">IBI")
+_KIND_PUT = 1
+_KIND_DELETE = 2
+_TOMBSTONE = struct.Struct(">I")
+
+_CHECKPOINT_NAME = "index.checkpoint"
+_CHECKPOINT_MAGIC = b"VSIX"
+_CHECKPOINT_VERSION = 1
+_CHECKPOINT_HEADER = struct.Struct(">4sBIQI")
+_CHECKPOINT_ENTRY = struct.Struct(">IIQIH")
+_CRC = struct.Struct(">I")
+
+# Live entries are copied forward in batches so compaction never holds the
+# write lock for more than a short burst.
+_COMPACTION_BATCH = 256
+
+
+class _Location(NamedTuple):
+    segment: int
+    offset: int
+    length: int
+
+
+class _Entry(NamedTuple):
+    kind: int
+    block_id: str
+    index: int
+    location: _Location
+    body: bytes
+
+
+class SegmentStore:
+    """Persists fragment records by appending them to large segment files.
+
+    Drop-in alternative to FragmentStore for stores with very many small
+    fragments: a put is one append (and one fsync) to the active segment
+    instead of a new file, temp file, rename and directory per fragment.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        compaction_threshold: float = DEFAULT_COMPACTION_THRESHOLD,
+        sync: bool = True,
+        batch_flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        if segment_size <= 0:
+            raise ValueError("segment_size must be positive")
+        if not 0.0 < compaction_threshold <= 1.0:
+            raise ValueError("compaction_threshold must be in (0, 1]")
+
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.compaction_threshold = compaction_threshold
+        self.sync = sync
+
+        # Lock order: _write_lock, then _lock.  _write_lock serializes appends
+        # (and the fsync that goes with them); _lock guards the in-memory
+        # index and is only ever held briefly, so reads never wait on a flush.
+        self._write_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+
+        self._locations: dict[tuple[str, int], _Location] = {}
+        self._index: dict[str, set[int]] = {}
+        self._block_ids = SortedKeySet()
+        self._segment_bytes: dict[int, int] = {}
+        self._live_bytes: dict[int, int] = {}
+        self._writes_since_checkpoint = 0
+
+        # Read descriptors, pinned while a pread is in flight so compaction
+        # never closes (and the OS never reuses) a descriptor under a reader.
+        self._readers: dict[int, int] = {}
+        self._pins: dict[int, int] = {}
+        self._retired: set[int] = set()
+
+        self._maintenance: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._flusher = BackgroundFlusher(interval=batch_flush_interval)
+
+        self._recover()
+
+    # ------------------------------------------------------------------
+    # FragmentStore interface
+    # ------------------------------------------------------------------
+
+    def put(self, record: FragmentRecord) -> None:
+        key = (record.block_id, record.index)
+        body = record.to_bytes()
+        sync = self.sync and record.durability is Durability.FSYNC
+        with self._write_lock:
+            location = self._append(_KIND_PUT, body, sync=sync)
+            with self._lock:
+                self._set_location(key, location)
+                self._writes_since_checkpoint += 1
+        if record.durability is Durability.BATCH:
+            self._flusher.add(self._segment_path(location.segment))
+
+    def get(self, block_id: str, index: int) -> FragmentRecord:
+        return FragmentRecord.from_bytes(self._read(block_id, index))
+
+    def open_view(self, block_id: str, index: int) -> FragmentView:
+        return FragmentView(self._read(block_id, index))
+
+    def get_metadata(self, block_id: str, index: int) -> RecordHeader:
+        """Return a fragment's metadata, reading only the record header."""
+        with self._pinned_record(block_id, index) as (fd, location):
+            def read_at(offset: int, size: int) -> bytes:
+                size = max(0, min(size, location.length - offset))
+                return os.pread(fd, size, location.offset + offset)
+
+            return RecordHeader.read(read_at)
+
+    def list_metadata(self, block_id: str) -> list[RecordHeader]:
+        headers: list[RecordHeader] = []
+        for index in self.list_indices(block_id):
+            try:
+                headers.append(self.get_metadata(block_id, index))
+            except FragmentNotFoundError:
+                continue  # deleted since listing
+        return headers
+
+    def set_verification(
+        self,
+        block_id: str,
+        index: int,
+        status: VerificationStatus,
+        verified_at: datetime | None,
+    ) -> None:
+        """Record the outcome of re-verifying a stored fragment.
+
+        Entries are checksummed and never modified once written, so this
+        appends a full copy of the record with the new header: a scrub pass
+        that re-stamps every fragment rewrites the whole store, and the old
+        copies wait for compaction.  Holding the write lock throughout keeps
+        a concurrent put from being replaced by the older record.
+        """
+        key = (block_id, index)
+        with self._write_lock:
+            raw = self._read(block_id, index)
+            body = patch_verification(raw[:FIXED_HEADER_SIZE], status, verified_at) + raw[FIXED_HEADER_SIZE:]
+            location = self._append(_KIND_PUT, body, sync=self.sync)
+            with self._lock:
+                self._set_location(key, location)
+                self._writes_since_checkpoint += 1
+
+    def delete(self, block_id: str, index: int) -> None:
+        key = (block_id, index)
+        with self._write_lock:
+            with self._lock:
+                if key not in self._locations:
+                    raise FragmentNotFoundError(key)
+            self._append(_KIND_DELETE, _tombstone(block_id, index), sync=self.sync)
+            with self._lock:
+                self._drop_location(key)
+                self._writes_since_checkpoint += 1
+
+    def list_fragments(self, block_id: str) -> list[FragmentRecord]:
+        records: list[FragmentRecord] = []
+        for index in self.list_indices(block_id):
+            try:
+                records.append(self.get(block_id, index))
+            except FragmentNotFoundError:
+                continue  # deleted since listing
+        return records
+
+    def has(self, block_id: str, index: int) -> bool:
+        with self._lock:
+            return (block_id, index) in self._locations
+
+    def fragment_count(self) -> int:
+        """Return the number of stored fragments (fast path)."""
+        with self._lock:
+            return len(self._locations)
+
+    def list_blocks(self) -> list[str]:
+        """Return the ids of all blocks with at least one stored fragment."""
+        with self._lock:
+            return list(self._block_ids)
+
+    def list_blocks_page(
+        self, prefix: str = "", after: str | None = None, limit: int = 1000
+    ) -> list[tuple[str, list[int]]]:
+        """Return up to `limit` (block_id, indices) pairs after `after`, in block_id order."""
+        with self._lock:
+            return [
+                (block_id, sorted(self._index[block_id]))
+                for block_id in self._block_ids.page(prefix, after, limit)
+            ]
+
+    def list_indices(self, block_id: str) -> list[int]:
+        """Return stored indices for a block from in-memory state."""
+        with self._lock:
+            return sorted(self._index.get(block_id, set()))
+
+    # ------------------------------------------------------------------
+    # Checkpoints and compaction
+    # ------------------------------------------------------------------
+
+    def checkpoint(self) -> None:
+        """Persist the index so the next startup replays only newer entries."""
+        with self._checkpoint_lock:
+            with self._write_lock:
+                if self._active is None:
+                    return  # closed
+                # Everything before this position is reflected in the index,
+                # and must be on disk before the checkpoint says so.
+                os.fsync(self._active.fileno())
+                position = (self._active_id, self._active_size)
+                with self._lock:
+                    locations = dict(self._locations)
+                    self._writes_since_checkpoint = 0
+            self._write_checkpoint(position, locations)
+
+    def compact(self) -> int:
+        """Rewrite mostly-dead sealed segments; returns the number reclaimed."""
+        with self._lock:
+            victims = [
+                segment
+                for segment, size in self._segment_bytes.items()
+                if segment != self._active_id
+                and size > 0
+                and self._live_bytes.get(segment, 0) / size < self.compaction_threshold
+            ]
+        if not victims:
+            return 0
+
+        for segment in sorted(victims):
+            self._copy_live_entries(segment)
+
+        # The copies must be durable, and the checkpoint must no longer point
+        # into the victims, before their files go away.
+        self.checkpoint()
+        with self._lock:
+            for segment in victims:
+                self._retire(segment)
+        return len(victims)
+
+    def start_maintenance(self, interval: float = DEFAULT_MAINTENANCE_INTERVAL) -> threading.Thread:
+        """Checkpoint and compact on a daemon thread every `interval` seconds."""
+        if self._maintenance is not None:
+            return self._maintenance
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    if self.compact() == 0 and self._writes_since_checkpoint:
+                        self.checkpoint()
+                except Exception:
+                    _log.exception("Segment store maintenance failed")
+
+        self._maintenance = threading.Thread(target=run, name="veri-store-segments", daemon=True)
+        self._maintenance.start()
+        return self._maintenance
+
+    def close(self) -> None:
+        if self._active is None:
+            return
+        self._stop.set()
+        if self._maintenance is not None:
+            self._maintenance.join()
+            self._maintenance = None
+        self._flusher.close()
+        self.checkpoint()
+        with self._write_lock, self._lock:
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+            for fd in self._readers.values():
+                os.close(fd)
+            self._readers.clear()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.base_dir / f"segment_{segment:08d}.log"
+
+    def _segment_ids(self) -> list[int]:
+        ids: list[int] = []
+        for p in self.base_dir.glob("segment_*.log"):
+            try:
+                ids.append(int(p.stem.removeprefix("segment_")))
+            except ValueError:
+                continue
+        return sorted(ids)
+
+    def _recover(self) -> None:
+        segment_ids = self._segment_ids()
+        checkpoint = self._load_checkpoint(segment_ids)
+        if checkpoint is not None:
+            (start_segment, start_offset), self._locations = checkpoint
+        else:
+            start_segment, start_offset = (segment_ids[0] if segment_ids else 1), 0
+
+        for segment in segment_ids:
+            self._segment_bytes[segment] = self._segment_path(segment).stat().st_size
+            if segment < start_segment:
+                continue
+            offset = start_offset if segment == start_segment else 0
+            end = offset
+            # Only the last segment can end in a torn append.  Damage in a
+            # sealed one is skipped so the entries after it survive.
+            sealed = segment != segment_ids[-1]
+            for entry in _scan_segment(self._segment_path(segment), segment, offset, skip_corrupt=sealed):
+                key = (entry.block_id, entry.index)
+                if entry.kind == _KIND_PUT:
+                    self._locations[key] = entry.location
+                else:
+                    self._locations.pop(key, None)
+                end = entry.location.offset + entry.location.length
+            if not sealed and end < self._segment_bytes[segment]:
+                # A torn write at the tail (crash mid-append); drop it.
+                _log.warning("Truncating segment %d at %d (was %d bytes)", segment, end, self._segment_bytes[segment])
+                os.truncate(self._segment_path(segment), end)
+                self._segment_bytes[segment] = end
+
+        for (block_id, index), location in self._locations.items():
+            self._index.setdefault(block_id, set()).add(index)
+            self._live_bytes[location.segment] = (
+                self._live_bytes.get(location.segment, 0) + location.length + _ENTRY.size
+            )
+        self._block_ids = SortedKeySet(self._index)
+
+        self._active = None
+        if segment_ids and self._segment_bytes[segment_ids[-1]] < self.segment_size:
+            self._open_active(segment_ids[-1])
+        else:
+            self._open_active((segment_ids[-1] + 1) if segment_ids else 1)
+
+    def _open_active(self, segment: int) -> None:
+        path = self._segment_path(segment)
+        created = not path.exists()
+        self._active = open(path, "ab")
+        self._active_id = segment
+        self._active_size = self._active.tell()
+        self._segment_bytes.setdefault(segment, self._active_size)
+        if created:
+            _fsync_dir(self.base_dir)
+
+    def _append(self, kind: int, body: bytes, sync: bool) -> _Location:
+        # Caller holds _write_lock.
+        if self._active_size >= self.segment_size:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+            self._active.close()
+            self._open_active(self._active_id + 1)
+
+        crc = zlib.crc32(body, zlib.crc32(bytes((kind,))))
+        offset = self._active_size
+        self._active.write(_ENTRY.pack(crc, kind, len(body)))
+        self._active.write(body)
+        self._active.flush()
+        if sync:
+            os.fsync(self._active.fileno())
+
+        self._active_size += _ENTRY.size + len(body)
+        with self._lock:
+            self._segment_bytes[self._active_id] = self._active_size
+        return _Location(self._active_id, offset + _ENTRY.size, len(body))
+
+    def _set_location(self, key: tuple[str, int], location: _Location) -> None:
+        # Caller holds _lock.
+        self._drop_location(key)
+        self._locations[key] = location
+        if key[0] not in self._index:
+            self._block_ids.add(key[0])
+        self._index.setdefault(key[0], set()).add(key[1])
+        self._live_bytes[location.segment] = (
+            self._live_bytes.get(location.segment, 0) + location.length + _ENTRY.size
+        )
+
+    def _drop_location(self, key: tuple[str, int]) -> None:
+        # Caller holds _lock.
+        old = self._locations.pop(key, None)
+        if old is None:
+            return
+        self._live_bytes[old.segment] -= old.length + _ENTRY.size
+        indices = self._index.get(key[0])
+        if indices is not None:
+            indices.discard(key[1])
+            if not indices:
+                self._index.pop(key[0], None)
+                self._block_ids.discard(key[0])
+
+    def _read(self, block_id: str, index: int) -> bytes:
+        with self._pinned_record(block_id, index) as (fd, location):
+            return os.pread(fd, location.length, location.offset)
+
+    @contextmanager
+    def _pinned_record(self, block_id: str, index: int) -> Iterator[tuple[int, _Location]]:
+        # Yields a read descriptor for the record's segment and its location,
+        # pinned so compaction cannot close it until the caller is done.
+        with self._lock:
+            location = self._locations.get((block_id, index))
+            if location is None:
+                raise FragmentNotFoundError((block_id, index))
+            fd = self._readers.get(location.segment)
+            if fd is None:
+                fd = os.open(self._segment_path(location.segment), os.O_RDONLY)
+                self._readers[location.segment] = fd
+            self._pins[location.segment] = self._pins.get(location.segment, 0) + 1
+        try:
+            yield fd, location
+        finally:
+            with self._lock:
+                self._pins[location.segment] -= 1
+                if location.segment in self._retired:
+                    self._close_reader(location.segment)
+
+    def _copy_live_entries(self, segment: int) -> None:
+        with self._lock:
+            older_segment_exists = any(s < segment for s in self._segment_bytes)
+        entries = _scan_segment(self._segment_path(segment), segment, 0, skip_corrupt=True)
+        while True:
+            batch = [entry for _, entry in zip(range(_COMPACTION_BATCH), entries)]
+            if not batch:
+                return
+            with self._write_lock:
+                for entry in batch:
+                    key = (entry.block_id, entry.index)
+                    with self._lock:
+                        current = self._locations.get(key)
+                    if entry.kind == _KIND_PUT and current == entry.location:
+                        location = self._append(_KIND_PUT, entry.body, sync=False)
+                        with self._lock:
+                            self._set_location(key, location)
+                    elif entry.kind == _KIND_DELETE and current is None and older_segment_exists:
+                        # Keep the tombstone while an older segment may still
+                        # hold a PUT it cancels out on a full replay.
+                        self._append(_KIND_DELETE, _tombstone(entry.block_id, entry.index), sync=False)
+
+    def _retire(self, segment: int) -> None:
+        # Caller holds _lock.  The file can go at once; the descriptor stays
+        # open until no reader has it pinned.
+        try:
+            self._segment_path(segment).unlink()
+        except FileNotFoundError:
+            pass
+        self._segment_bytes.pop(segment, None)
+        self._live_bytes.pop(segment, None)
+        self._retired.add(segment)
+        self._close_reader(segment)
+
+    def _close_reader(self, segment: int) -> None:
+        # Caller holds _lock.
+        if self._pins.get(segment, 0):
+            return
+        fd = self._readers.pop(segment, None)
+        if fd is not None:
+            os.close(fd)
+        self._pins.pop(segment, None)
+        self._retired.discard(segment)
+
+    def _write_checkpoint(self, position: tuple[int, int], locations: dict[tuple[str, int], _Location]) -> None:
+        parts = [_CHECKPOINT_HEADER.pack(_CHECKPOINT_MAGIC, _CHECKPOINT_VERSION, position[0], position[1], len(locations))]
+        for (block_id, index), location in locations.items():
+            encoded = block_id.encode("utf-8")
+            parts.append(_CHECKPOINT_ENTRY.pack(index, location.segment, location.offset, location.length, len(encoded)))
+            parts.append(encoded)
+        payload = b"".join(parts)
+        payload += _CRC.pack(zlib.crc32(payload))
+
+        final_path = self.base_dir / _CHECKPOINT_NAME
+        tmp_path: Path | None = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                mode="wb", dir=self.base_dir, prefix=f"{_CHECKPOINT_NAME}.", suffix=".tmp", delete=False
+            ) as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+                tmp_path = Path(f.name)
+            os.replace(tmp_path, final_path)
+            _fsync_dir(self.base_dir)
+        finally:
+            if tmp_path is not None and tmp_path.exists():
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+
+    def _load_checkpoint(
+        self, segment_ids: list[int]
+    ) -> tuple[tuple[int, int], dict[tuple[str, int], _Location]] | None:
+        path = self.base_dir / _CHECKPOINT_NAME
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            if len(raw) < _CHECKPOINT_HEADER.size + _CRC.size:
+                raise ValueError("checkpoint is truncated")
+            (crc,) = _CRC.unpack_from(raw, len(raw) - _CRC.size)
+            if zlib.crc32(raw[: -_CRC.size]) != crc:
+                raise ValueError("checkpoint checksum mismatch")
+            magic, version, segment, offset, count = _CHECKPOINT_HEADER.unpack_from(raw, 0)
+            if magic != _CHECKPOINT_MAGIC or version != _CHECKPOINT_VERSION:
+                raise ValueError("not a segment index checkpoint")
+
+            present = set(segment_ids)
+            locations: dict[tuple[str, int], _Location] = {}
+            cursor = _CHECKPOINT_HEADER.size
+            for _ in range(count):
+                index, entry_segment, entry_offset, length, block_id_length = _CHECKPOINT_ENTRY.unpack_from(raw, cursor)
+                cursor += _CHECKPOINT_ENTRY.size
+                block_id = raw[cursor : cursor + block_id_length].decode("utf-8")
+                cursor += block_id_length
+                if entry_segment not in present:
+                    raise ValueError(f"checkpoint refers to missing segment {entry_segment}")
+                locations[(block_id, index)] = _Location(entry_segment, entry_offset, length)
+            if segment_ids and segment not in present and segment <= segment_ids[-1]:
+                raise ValueError(f"checkpoint position is in missing segment {segment}")
+            return (segment, offset), locations
+        except (ValueError, struct.error, UnicodeDecodeError) as error:
+            _log.warning("Ignoring segment index checkpoint (%s); replaying all segments", error)
+            return None
+
+
+def _tombstone(block_id: str, index: int) -> bytes:
+    return _TOMBSTONE.pack(index) + block_id.encode("utf-8")
+
+
+def _scan_segment(path: Path, segment: int, offset: int, skip_corrupt: bool = False) -> Iterator[_Entry]:
+    # Yields entries from `offset` until the end of the segment.  The first
+    # entry that is incomplete or fails its checksum ends the scan, unless
+    # skip_corrupt is set: then the damaged range is logged and the scan
+    # resumes at the next record that checks out.
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        while offset < size:
+            entry = _read_entry(f, segment, offset)
+            if entry is None:
+                if not skip_corrupt:
+                    return
+                resume = _next_put_entry(f, segment, offset + 1, size)
+                _log.error(
+                    "Skipping damaged bytes %d-%d of segment %d; entries in that range are lost",
+                    offset,
+                    resume,
+                    segment,
+                )
+                offset = resume
+                continue
+            yield entry
+            offset = entry.location.offset + entry.location.length
+
+
+def _read_entry(f, segment: int, offset: int) -> _Entry | None:
+    # The entry at `offset`, or None if it is incomplete or does not check out.
+    f.seek(offset)
+    frame = f.read(_ENTRY.size)
+    if len(frame) < _ENTRY.size:
+        return None
+    crc, kind, length = _ENTRY.unpack(frame)
+    body = f.read(length)
+    if len(body) < length or zlib.crc32(body, zlib.crc32(bytes((kind,)))) != crc:
+        return None
+    location = _Location(segment, offset + _ENTRY.size, length)
+    try:
+        if kind == _KIND_PUT:
+            header = RecordHeader.unpack(body)
+            return _Entry(kind, header.block_id, header.index, location, body)
+        if kind == _KIND_DELETE:
+            (index,) = _TOMBSTONE.unpack_from(body, 0)
+            return _Entry(kind, body[_TOMBSTONE.size :].decode("utf-8"), index, location, body)
+    except (ValueError, struct.error, UnicodeDecodeError):
+        return None
+    return None
+
+
+def _next_put_entry(f, segment: int, start: int, size: int) -> int:
+    # Offset of the first intact PUT entry at or after `start` (else `size`).
+    # PUT bodies open with RECORD_MAGIC, so only those positions are tried;
+    # tombstones inside a damaged range cannot be told apart and are lost.
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        hit = data.find(RECORD_MAGIC, start + _ENTRY.size)
+        while hit != -1:
+            if _read_entry(f, segment, hit - _ENTRY.size) is not None:
+                return hit - _ENTRY.size
+            hit = data.find(RECORD_MAGIC, hit + 1)
+    return size
+
+
+def _fsync_dir(path: Path) -> None:
+    # Make a created or renamed directory entry durable (no-op where
+    # directories cannot be opened, e.g. Windows).
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, Iterator
+
+# Keys per chunk.  Chunks are split when they reach twice this size, so an
+# insert or removal shifts at most that many references, however many keys
+# the set holds.
+_CHUNK_SIZE = 1000
+
+
+class SortedKeySet:
+    """A set of strings kept in sorted order, for cursor-paginated listing.
+
+    Keys live in a list of sorted chunks with each chunk's last key in
+    `_maxes`: add and discard bisect to the right chunk and touch only it,
+    and a page is a bisect followed by a walk, so paging through tens of
+    millions of block ids never sorts or copies the whole set.  Not
+    thread-safe: callers guard it with their index lock.
+    """
+
+    def __init__(self, keys: Iterable[str] = ()) -> None:
+        ordered = sorted(set(keys))
+        self._chunks = [ordered[i : i + _CHUNK_SIZE] for i in range(0, len(ordered), _CHUNK_SIZE)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(ordered)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, key: str) -> bool:
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return False
+        chunk = self._chunks[pos]
+        i = bisect_left(chunk, key)
+        return i < len(chunk) and chunk[i] == key
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def add(self, key: str) -> None:
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            return
+        pos = min(bisect_left(self._maxes, key), len(self._maxes) - 1)
+        chunk = self._chunks[pos]
+        i = bisect_left(chunk, key)
+        if i < len(chunk) and chunk[i] == key:
+            return
+        insort(chunk, key)
+        self._maxes[pos] = chunk[-1]
+        self._len += 1
+        if len(chunk) >= 2 * _CHUNK_SIZE:
+            self._chunks[pos : pos + 1] = [chunk[:_CHUNK_SIZE], chunk[_CHUNK_SIZE:]]
+            self._maxes[pos : pos + 1] = [chunk[_CHUNK_SIZE - 1], chunk[-1]]
+
+    def discard(self, key: str) -> None:
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return
+        chunk = self._chunks[pos]
+        i = bisect_left(chunk, key)
+        if i == len(chunk) or chunk[i] != key:
+            return
+        del chunk[i]
+        self._len -= 1
+        if chunk:
+            self._maxes[pos] = chunk[-1]
+        else:
+            del self._chunks[pos]
+            del self._maxes[pos]
+
+    def page(self, prefix: str = "", after: str | None = None, limit: int = 1000) -> list[str]:
+        """Return up to `limit` keys starting with `prefix`, in order, all greater than `after`."""
+        # Start just past the cursor, or at the first key >= prefix.
+        if after is not None and after >= prefix:
+            find, bound = bisect_right, after
+        else:
+            find, bound = bisect_left, prefix
+
+        keys: list[str] = []
+        pos = find(self._maxes, bound)
+        if pos == len(self._chunks) or limit <= 0:
+            return keys
+        i = find(self._chunks[pos], bound)
+        while pos < len(self._chunks):
+            chunk = self._chunks[pos]
+            for key in chunk[i : i + limit - len(keys)]:
+                if not key.startswith(prefix):
+                    return keys
+                keys.append(key)
+            if len(keys) >= limit:
+                return keys
+            pos += 1
+            i = 0
+        return keys
@@ -0,0 +1,313 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from .fragment import (
+    FIXED_HEADER_SIZE,
+    Durability,
+    FragmentRecord,
+    FragmentView,
+    RecordHeader,
+    VerificationStatus,
+    patch_verification,
+)
+from .group_commit import DEFAULT_MAX_BATCH, DEFAULT_WINDOW_SECONDS
+from .sorted_keys import SortedKeySet
+from .store import FragmentNotFoundError
+
+DATABASE_NAME = "fragments.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fragments (
+    block_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    record BLOB NOT NULL,
+    PRIMARY KEY (block_id, idx)
+)
+"""
+
+_UPSERT = (
+    "INSERT INTO fragments (block_id, idx, record) VALUES (?, ?, ?) "
+    "ON CONFLICT (block_id, idx) DO UPDATE SET record = excluded.record"
+)
+_DELETE = "DELETE FROM fragments WHERE block_id = ? AND idx = ?"
+_ROWID = "SELECT rowid FROM fragments WHERE block_id = ? AND idx = ?"
+
+# PRAGMA synchronous used for a transaction, by the strongest durability
+# any write in it asked for.  In WAL mode FULL syncs the log on commit,
+# NORMAL leaves it to the next checkpoint and OFF to the OS.
+_SYNCHRONOUS = {
+    Durability.FSYNC: "FULL",
+    Durability.BATCH: "NORMAL",
+    Durability.NONE: "OFF",
+}
+_STRENGTH = {Durability.NONE: 0, Durability.BATCH: 1, Durability.FSYNC: 2}
+
+
+@dataclass
+class _PendingWrite:
+    block_id: str
+    index: int
+    record: bytes | None  # None for a delete or a verification update
+    durability: Durability
+    verification: tuple[VerificationStatus, datetime | None] | None = None
+    done: threading.Event = field(default_factory=threading.Event)
+    error: BaseException | None = None
+
+
+class SQLiteStore:
+    """Packs fragment records into a single SQLite database (WAL mode).
+
+    Suited to many small fragments: no per-fragment file, directory entry or
+    inode.  A writer thread gathers concurrent puts and deletes for up to
+    `batch_window` seconds (or `max_batch` writes) and applies them in one
+    transaction, so writers share the commit; each put returns once its
+    transaction has committed.  Reads use per-thread connections and never
+    wait for the writer.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path,
+        batch_window: float = DEFAULT_WINDOW_SECONDS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ) -> None:
+        if batch_window < 0:
+            raise ValueError("batch_window must not be negative")
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.base_dir / DATABASE_NAME
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute(_SCHEMA)
+        self._writer.commit()
+
+        self._lock = threading.Lock()
+        self._index: dict[str, set[int]] = {}
+        for block_id, index in self._writer.execute("SELECT block_id, idx FROM fragments"):
+            self._index.setdefault(block_id, set()).add(index)
+        self._block_ids = SortedKeySet(self._index)
+
+        self._readers = threading.local()
+        self._reader_connections: list[sqlite3.Connection] = []
+
+        self._pending: list[_PendingWrite] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="veri-store-sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+    # ------------------------------------------------------------------
+    # FragmentStore interface
+    # ------------------------------------------------------------------
+
+    def put(self, record: FragmentRecord) -> None:
+        self._submit(_PendingWrite(record.block_id, record.index, record.to_bytes(), record.durability))
+
+    def get(self, block_id: str, index: int) -> FragmentRecord:
+        return FragmentRecord.from_bytes(self._read(block_id, index))
+
+    def open_view(self, block_id: str, index: int) -> FragmentView:
+        return FragmentView(self._read(block_id, index))
+
+    def get_metadata(self, block_id: str, index: int) -> RecordHeader:
+        """Return a fragment's metadata, reading only the record header."""
+        conn = self._reader()
+        row = conn.execute(_ROWID, (block_id, index)).fetchone()
+        if row is None:
+            raise FragmentNotFoundError((block_id, index))
+        try:
+            with conn.blobopen("fragments", "record", row[0], readonly=True) as blob:
+                def read_at(offset: int, size: int) -> bytes:
+                    blob.seek(offset)
+                    return blob.read(size)
+
+                return RecordHeader.read(read_at)
+        except sqlite3.OperationalError:
+            # The row was replaced or deleted since the lookup.
+            return RecordHeader.unpack(self._read(block_id, index))
+
+    def list_metadata(self, block_id: str) -> list[RecordHeader]:
+        headers: list[RecordHeader] = []
+        for index in self.list_indices(block_id):
+            try:
+                headers.append(self.get_metadata(block_id, index))
+            except FragmentNotFoundError:
+                continue  # deleted since listing
+        return headers
+
+    def set_verification(
+        self,
+        block_id: str,
+        index: int,
+        status: VerificationStatus,
+        verified_at: datetime | None,
+    ) -> None:
+        """Record the outcome of re-verifying a stored fragment.
+
+        The header is patched in place by the writer, inside its
+        transaction, so a concurrent put is never overwritten with an old copy.
+        """
+        self._submit(_PendingWrite(block_id, index, None, Durability.FSYNC, (status, verified_at)))
+
+    def delete(self, block_id: str, index: int) -> None:
+        self._submit(_PendingWrite(block_id, index, None, Durability.FSYNC))
+
+    def list_fragments(self, block_id: str) -> list[FragmentRecord]:
+        rows = self._reader().execute(
+            "SELECT record FROM fragments WHERE block_id = ? ORDER BY idx", (block_id,)
+        )
+        return [FragmentRecord.from_bytes(raw) for (raw,) in rows]
+
+    def has(self, block_id: str, index: int) -> bool:
+        with self._lock:
+            return index in self._index.get(block_id, ())
+
+    def fragment_count(self) -> int:
+        """Return the number of stored fragments (fast path)."""
+        with self._lock:
+            return sum(len(v) for v in self._index.values())
+
+    def list_blocks(self) -> list[str]:
+        """Return the ids of all blocks with at least one stored fragment."""
+        with self._lock:
+            return list(self._block_ids)
+
+    def list_blocks_page(
+        self, prefix: str = "", after: str | None = None, limit: int = 1000
+    ) -> list[tuple[str, list[int]]]:
+        """Return up to `limit` (block_id, indices) pairs after `after`, in block_id order."""
+        with self._lock:
+            return [
+                (block_id, sorted(self._index[block_id]))
+                for block_id in self._block_ids.page(prefix, after, limit)
+            ]
+
+    def list_indices(self, block_id: str) -> list[int]:
+        """Return stored indices for a block from in-memory state."""
+        with self._lock:
+            return sorted(self._index.get(block_id, set()))
+
+    def close(self) -> None:
+        """Apply pending writes, checkpoint the WAL and close every connection."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._writer.close()
+        with self._lock:
+            for conn in self._reader_connections:
+                conn.close()
+            self._reader_connections.clear()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._readers.conn = conn
+            with self._lock:
+                self._reader_connections.append(conn)
+        return conn
+
+    def _read(self, block_id: str, index: int) -> bytes:
+        row = self._reader().execute(
+            "SELECT record FROM fragments WHERE block_id = ? AND idx = ?", (block_id, index)
+        ).fetchone()
+        if row is None:
+            raise FragmentNotFoundError((block_id, index))
+        return row[0]
+
+    def _submit(self, write: _PendingWrite) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("store is closed")
+            self._pending.append(write)
+            self._cond.notify_all()
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return  # closed and drained
+                deadline = time.monotonic() + self.batch_window
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+            self._apply(batch)
+
+    def _apply(self, batch: list[_PendingWrite]) -> None:
+        durability = max((write.durability for write in batch), key=_STRENGTH.__getitem__)
+        conn = self._writer
+        try:
+            conn.execute(f"PRAGMA synchronous={_SYNCHRONOUS[durability]}")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for write in batch:
+                    if write.verification is not None:
+                        row = conn.execute(_ROWID, (write.block_id, write.index)).fetchone()
+                        if row is None:
+                            write.error = FragmentNotFoundError((write.block_id, write.index))
+                            continue
+                        with conn.blobopen("fragments", "record", row[0]) as blob:
+                            header = patch_verification(blob.read(FIXED_HEADER_SIZE), *write.verification)
+                            blob.seek(0)
+                            blob.write(header)
+                    elif write.record is not None:
+                        conn.execute(_UPSERT, (write.block_id, write.index, write.record))
+                    elif conn.execute(_DELETE, (write.block_id, write.index)).rowcount == 0:
+                        write.error = FragmentNotFoundError((write.block_id, write.index))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            with self._lock:
+                for write in batch:
+                    if write.error is not None or write.verification is not None:
+                        continue
+                    if write.record is not None:
+                        if write.block_id not in self._index:
+                            self._block_ids.add(write.block_id)
+                        self._index.setdefault(write.block_id, set()).add(write.index)
+                    else:
+                        indices = self._index.get(write.block_id)
+                        if indices is not None:
+                            indices.discard(write.index)
+                            if not indices:
+                                self._index.pop(write.block_id, None)
+                                self._block_ids.discard(write.block_id)
+        except BaseException as error:
+            for write in batch:
+                write.error = write.error or error
+        finally:
+            for write in batch:
+                write.done.set()
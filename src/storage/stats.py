@@ -0,0 +1,88 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from .fragment import VerificationStatus
+
+
+class FragmentInfo(NamedTuple):
+    """What the FragmentStore index keeps per fragment."""
+
+    data_length: int
+    disk_bytes: int
+    status: VerificationStatus
+
+
+@dataclass(frozen=True)
+class UsageTotals:
+    fragments: int = 0
+    payload_bytes: int = 0
+    disk_bytes: int = 0
+
+
+@dataclass
+class ObjectTotals:
+    """Distinct deduplicated objects and their size on disk."""
+
+    count: int = 0
+    bytes: int = 0
+
+
+@dataclass(frozen=True)
+class StoreStats:
+    fragments: int
+    payload_bytes: int
+    disk_bytes: int
+    by_status: dict[VerificationStatus, UsageTotals]
+    # Dedup mode: distinct data objects, and their size on disk (not part of
+    # disk_bytes, which counts the records referencing them).
+    dedup_objects: int = 0
+    dedup_bytes: int = 0
+
+    @property
+    def invalid_fragments(self) -> int:
+        return self.by_status[VerificationStatus.INVALID].fragments
+
+
+class UsageCounters:
+    """Running totals over a set of fragments, kept per verification status.
+
+    Every update is O(1), so the totals can be read without walking the
+    store.  Not thread-safe: the owner serialises updates with its index.
+    """
+
+    def __init__(self) -> None:
+        # status -> [fragments, payload bytes, disk bytes]
+        self._totals = {status: [0, 0, 0] for status in VerificationStatus}
+
+    @classmethod
+    def from_index(cls, index: dict[str, dict[int, FragmentInfo]]) -> UsageCounters:
+        counters = cls()
+        for infos in index.values():
+            for info in infos.values():
+                counters.add(info)
+        return counters
+
+    def add(self, info: FragmentInfo) -> None:
+        totals = self._totals[info.status]
+        totals[0] += 1
+        totals[1] += info.data_length
+        totals[2] += info.disk_bytes
+
+    def remove(self, info: FragmentInfo) -> None:
+        totals = self._totals[info.status]
+        totals[0] -= 1
+        totals[1] -= info.data_length
+        totals[2] -= info.disk_bytes
+
+    def fragments(self) -> int:
+        return sum(totals[0] for totals in self._totals.values())
+
+    def snapshot(self) -> StoreStats:
+        by_status = {status: UsageTotals(*totals) for status, totals in self._totals.items()}
+        return StoreStats(
+            fragments=sum(t.fragments for t in by_status.values()),
+            payload_bytes=sum(t.payload_bytes for t in by_status.values()),
+            disk_bytes=sum(t.disk_bytes for t in by_status.values()),
+            by_status=by_status,
+        )
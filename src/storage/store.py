@@ -1,47 +1,387 @@
 from __future__ import annotations
+from contextlib import AbstractContextManager, nullcontext
+from datetime import datetime
 from pathlib import Path
+from typing import Callable
+import dataclasses
 import json
+import logging
+import mmap
 import os
 import tempfile
+import threading
 import uuid
 
-from .fragment import FragmentRecord
+from .fragment import (
+    FIXED_HEADER_SIZE,
+    Durability,
+    FragmentRecord,
+    FragmentView,
+    RecordHeader,
+    VerificationStatus,
+    attach_data,
+    is_reference_record,
+    patch_verification,
+    peek_header,
+)
+from .group_commit import (
+    DEFAULT_FLUSH_INTERVAL_SECONDS,
+    DEFAULT_MAX_BATCH,
+    BackgroundFlusher,
+    GroupCommitter,
+    fsync_directory,
+)
+from .index import (
+    OP_ADD,
+    OP_CHECK,
+    OP_OBJECT,
+    OP_OBJECT_CHECK,
+    OP_REMOVE,
+    IndexJournal,
+    Replay,
+    Snapshot,
+    journal_paths,
+    load_snapshot,
+    read_fragment_info,
+    replay_journal,
+    scan_store,
+    write_snapshot,
+)
+from .layout import (
+    INDEX_DIR_NAME,
+    OBJECTS_DIR_NAME,
+    ensure_layout,
+    existing_shard_levels,
+    shard_parts,
+    validate_block_id,
+)
+from .sorted_keys import SortedKeySet
+from .stats import FragmentInfo, ObjectTotals, StoreStats, UsageCounters
+
+_log = logging.getLogger(__name__)
+
+# Records are written as fragment_<index>.bin (FragmentRecord.to_bytes()).
+# fragment_<index>.json files from older servers are still read, and are
+# converted in place by migrate_legacy_records().
+RECORD_SUFFIX = ".bin"
+LEGACY_SUFFIX = ".json"
+
+# In dedup mode each fragment_<index>.bin is a reference record and the data
+# lives once per distinct SHA-256 in .objects/h[0:2]/h[2:4]/<h>.  Every
+# fragment referencing an object holds a hard link to it,
+# fragment_<index>.<h>.ref, so the object's link count is its reference
+# count (plus one for the .objects entry), kept by the file system.
+REFERENCE_SUFFIX = ".ref"
+_OBJECT_LOCK_STRIPES = 64
+
+LockFactory = Callable[[str, int], AbstractContextManager]
+
+# The index journal is folded into a fresh snapshot once it holds this many
+# entries, which bounds how much startup has to replay.
+DEFAULT_SNAPSHOT_THRESHOLD: int = 100_000
 
 
 class FragmentStore:
-    """Persists fragment records on disk."""
+    """Persists fragment records on disk.
+
+    Each block gets a directory, placed under `shard_levels` levels of
+    hash-derived shard directories (see layout.py) so no directory grows
+    with the number of blocks.  By default a store keeps the layout it has
+    (a flat one if it predates sharding; DEFAULT_SHARD_LEVELS if it is new).
+    Passing another `shard_levels` migrates it: every block directory is
+    moved before the constructor returns.
 
-    def __init__(self, base_dir: str | Path) -> None:
+    With `dedup` set, identical fragment data is stored once however many
+    (block_id, index) records hold it; an object is deleted when the last
+    record referencing it is.  Records written either way are always
+    readable, so dedup can be switched on or off for an existing store.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path,
+        snapshot_threshold: int = DEFAULT_SNAPSHOT_THRESHOLD,
+        scan_workers: int | None = None,
+        group_commit_window: float | None = None,
+        group_commit_max_batch: int = DEFAULT_MAX_BATCH,
+        batch_flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        shard_levels: int | None = None,
+        dedup: bool = False,
+    ) -> None:
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
-        self._index: dict[str, set[int]] = {}
-        self._rebuild_index_from_disk()
+        if shard_levels is None:
+            shard_levels = existing_shard_levels(self.base_dir)
+        ensure_layout(self.base_dir, shard_levels)
+        self.shard_levels = shard_levels
+        self.snapshot_threshold = snapshot_threshold
+        self._index_dir = self.base_dir / INDEX_DIR_NAME
+        self._index_dir.mkdir(exist_ok=True)
+        self._index: dict[str, dict[int, FragmentInfo]] = {}
+        self._usage = UsageCounters()
+        self._block_ids = SortedKeySet()
+        self._legacy_count = 0
+        self._index_lock = threading.Lock()
+        # Fragments with a journaled change not yet made on disk -> count,
+        # and likewise objects -> (being stored, size).
+        self._pending: dict[tuple[str, int], int] = {}
+        self._pending_objects: dict[bytes, tuple[bool, int]] = {}
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread: threading.Thread | None = None
+        self.objects_dir = self.base_dir / OBJECTS_DIR_NAME
+        self._objects = ObjectTotals()
+        self._load_index(scan_workers)
+
+        self.dedup = dedup
+        self._object_locks = [threading.Lock() for _ in range(_OBJECT_LOCK_STRIPES)]
+        # Only stores that ever held objects pay for reference bookkeeping.
+        self._has_objects = dedup or self.objects_dir.exists()
 
-    def _rebuild_index_from_disk(self) -> None:
+        # With a window set, concurrent puts share their fsyncs (see
+        # GroupCommitter); otherwise each put syncs on its own.
+        self._group_commit: GroupCommitter | None = None
+        if group_commit_window is not None:
+            self._group_commit = GroupCommitter(
+                window=group_commit_window,
+                max_batch=group_commit_max_batch,
+                on_batch_synced=self._sync_active_journal,
+            )
+
+        # Syncs Durability.BATCH puts in the background.
+        self._flusher = BackgroundFlusher(
+            interval=batch_flush_interval, on_flushed=self._sync_active_journal
+        )
+
+    def _load_index(self, scan_workers: int | None = None) -> None:
+        """Load the index snapshot and replay its journal; rescan only if it is unusable."""
+        snapshot = load_snapshot(self._index_dir)
+        journals = journal_paths(self._index_dir)
+        replayed = 0
+        if snapshot is not None:
+            self._index = snapshot.index
+            self._legacy_count = snapshot.legacy_count
+            replay = Replay()
+            for generation, path in journals:
+                if generation >= snapshot.generation:
+                    replayed += replay_journal(path, self._index, replay)
+            # Journal entries are written before the change they describe,
+            # which a crash may have cut short: trust the files for those.
+            for block_id, index in replay.fragments:
+                info = read_fragment_info(self._fragment_path(block_id, index), self._legacy_path(block_id, index))
+                infos = self._index.setdefault(block_id, {})
+                if info is None:
+                    infos.pop(index, None)
+                else:
+                    infos[index] = info
+                if not infos:
+                    del self._index[block_id]
+            if snapshot.objects is None:
+                self._objects = self._scan_objects()
+            else:
+                self._objects = snapshot.objects
+                self._objects.count += replay.object_count
+                self._objects.bytes += replay.object_bytes
+                for digest, (stored, size) in replay.objects.items():
+                    try:
+                        on_disk = os.stat(self.object_path(bytes.fromhex(digest))).st_size
+                    except (FileNotFoundError, ValueError):
+                        on_disk = None
+                    if stored and on_disk is None:
+                        self._objects.count -= 1
+                        self._objects.bytes -= size
+                    elif not stored and on_disk is not None:
+                        self._objects.count += 1
+                        self._objects.bytes += on_disk
+        else:
+            self._rebuild_index_from_disk(scan_workers)
+            self._objects = self._scan_objects()
+        self._usage = UsageCounters.from_index(self._index)
+        self._block_ids = SortedKeySet(self._index)
+
+        # Start a fresh journal (an old one may end in a torn entry) and, if
+        # anything had to be replayed or rescanned, fold it into a snapshot.
+        last_generation = max([g for g, _ in journals] + [snapshot.generation if snapshot else 0])
+        self._journal = IndexJournal(self._index_dir, last_generation + 1)
+        if snapshot is None or snapshot.objects is None or replayed:
+            write_snapshot(
+                self._index_dir,
+                Snapshot(self._journal.generation, self._index, self._legacy_count, dataclasses.replace(self._objects)),
+            )
+
+    def _rebuild_index_from_disk(self, workers: int | None = None) -> None:
         """Best-effort rebuild of the in-memory index by scanning base_dir."""
-        self._index.clear()
         try:
-            for p in self.base_dir.rglob("fragment_*.json"):
-                if not p.is_file():
-                    continue
-                block_id = p.parent.name
-                try:
-                    idx = int(p.stem.removeprefix("fragment_"))
-                except Exception:
-                    continue
-                self._index.setdefault(block_id, set()).add(idx)
+            self._index, self._legacy_count = scan_store(self.base_dir, workers, self.shard_levels)
         except OSError:
-            pass
+            self._index, self._legacy_count = {}, 0
+
+    def _journal_change(self, block_id: str, index: int, info: FragmentInfo | None) -> IndexJournal | None:
+        # Log a put (info) or delete (None) *before* it is made on disk, and
+        # mark the fragment pending until _finish_change().  Replay re-reads
+        # every journaled fragment from its files, so a crash on either side
+        # of the change leaves the index matching the disk.  Returns the
+        # journal written to (still to be synced), or None for a put that
+        # changes nothing the index holds.
+        with self._index_lock:
+            if info is not None and self._index.get(block_id, {}).get(index) == info:
+                return None
+            journal = self._journal
+            if info is None:
+                journal.append(OP_REMOVE, block_id, index)
+            else:
+                journal.append(OP_ADD, block_id, index, info)
+            key = (block_id, index)
+            self._pending[key] = self._pending.get(key, 0) + 1
+        return journal
+
+    def _finish_change(self, block_id: str, index: int, journal: IndexJournal | None) -> None:
+        if journal is None:
+            return
+        key = (block_id, index)
+        with self._index_lock:
+            self._pending[key] -= 1
+            if not self._pending[key]:
+                del self._pending[key]
+
+    def _index_set(self, block_id: str, index: int, info: FragmentInfo) -> None:
+        # Caller holds _index_lock.
+        infos = self._index.get(block_id)
+        if infos is None:
+            infos = self._index[block_id] = {}
+            self._block_ids.add(block_id)
+        previous = infos.get(index)
+        if previous is not None:
+            self._usage.remove(previous)
+        infos[index] = info
+        self._usage.add(info)
+
+    def _index_pop(self, block_id: str, index: int) -> None:
+        # Caller holds _index_lock.
+        infos = self._index.get(block_id)
+        if infos is None or index not in infos:
+            return
+        self._usage.remove(infos.pop(index))
+        if not infos:
+            self._index.pop(block_id, None)
+            self._block_ids.discard(block_id)
+
+    def _reconcile(self, block_id: str, index: int) -> None:
+        # Bring one fragment's index entry in line with its files.
+        info = read_fragment_info(self._fragment_path(block_id, index), self._legacy_path(block_id, index))
+        with self._index_lock:
+            if (block_id, index) in self._pending or self._index.get(block_id, {}).get(index) == info:
+                return
+            journal = self._journal
+            if info is None:
+                self._index_pop(block_id, index)
+                journal.append(OP_REMOVE, block_id, index)
+            else:
+                self._index_set(block_id, index, info)
+                journal.append(OP_ADD, block_id, index, info)
+        _log.warning("Index entry for fragment (%s, %d) did not match its files; repaired", block_id, index)
+        self._maybe_snapshot(journal)
+
+    def _sync_journal(self, journal: IndexJournal) -> None:
+        journal.sync()
+        self._maybe_snapshot(journal)
+
+    def _maybe_snapshot(self, journal: IndexJournal) -> None:
+        if journal.entries >= self.snapshot_threshold:
+            self._start_snapshot()
+
+    def _sync_active_journal(self) -> None:
+        self._sync_journal(self._journal)
+
+    def snapshot_index(self) -> None:
+        """Write the current index as a snapshot and start a new journal."""
+        with self._snapshot_lock:
+            with self._index_lock:
+                old_journal = self._journal
+                self._journal = IndexJournal(self._index_dir, old_journal.generation + 1)
+                # Changes logged but not yet made are not in the snapshot;
+                # the new journal names them so replay still re-reads them.
+                for block_id, index in self._pending:
+                    self._journal.append(OP_CHECK, block_id, index)
+                for digest, (stored, size) in self._pending_objects.items():
+                    self._journal.append_object(OP_OBJECT_CHECK, digest, stored, size)
+                pending = bool(self._pending or self._pending_objects)
+                snapshot = Snapshot(
+                    self._journal.generation,
+                    {block_id: dict(infos) for block_id, infos in self._index.items()},
+                    self._legacy_count,
+                    dataclasses.replace(self._objects),
+                )
+            old_journal.close()
+            if pending:
+                self._journal.sync()
+            write_snapshot(self._index_dir, snapshot)
+
+    def _start_snapshot(self) -> None:
+        with self._index_lock:
+            if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+                return
+            self._snapshot_thread = threading.Thread(
+                target=self.snapshot_index, name="veri-store-index-snapshot", daemon=True
+            )
+            self._snapshot_thread.start()
+
+    def close(self) -> None:
+        """Snapshot the index so the next startup has nothing to replay."""
+        self._flusher.close()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        self.snapshot_index()
+        self._journal.close()
 
     def put(self, record: FragmentRecord) -> None:
-        block_dir = self.base_dir / record.block_id
-        block_dir.mkdir(parents=True, exist_ok=True)
+        self.block_dir(record.block_id).mkdir(parents=True, exist_ok=True)
 
         final_path = self._fragment_path(record.block_id, record.index)
+        previous = self._referenced_digest(final_path) if self._has_objects else None
+        digest: bytes | None = None
+        linked = False
+        if self.dedup:
+            # data_sha256 is usually already known (the server takes it from
+            # the verified fpcc), so finding a duplicate costs no hashing.
+            digest = record.content_hash()
+            linked = self._link_object(record, digest)
+            raw = record.to_reference_bytes()
+        else:
+            raw = record.to_bytes()
+        info = FragmentInfo(len(record.data), len(raw), record.verification_status)
+        journal = self._journal_change(record.block_id, record.index, info)
 
-        payload = record.to_dict()
-        data = json.dumps(payload, sort_keys=True).encode("utf-8")
+        def on_publish() -> None:
+            # An overwrite supersedes any legacy JSON copy of the same fragment.
+            try:
+                self._legacy_path(record.block_id, record.index).unlink()
+            except FileNotFoundError:
+                pass
+            with self._index_lock:
+                self._index_set(record.block_id, record.index, info)
 
+        try:
+            self._write_atomic(final_path, raw, on_publish, record.durability, journal)
+        except BaseException:
+            if linked:
+                self._drop_reference(record.block_id, record.index, digest)
+            raise
+        finally:
+            self._finish_change(record.block_id, record.index, journal)
+        if previous is not None and previous != digest:
+            self._drop_reference(record.block_id, record.index, previous)
+
+    def _write_atomic(
+        self,
+        final_path: Path,
+        data: bytes,
+        on_publish: Callable[[], None] | None = None,
+        durability: Durability = Durability.FSYNC,
+        journal: IndexJournal | None = None,
+    ) -> None:
+        # `journal` holds the entry logged for this write; with FSYNC it is
+        # synced before the rename, so a durable file is never unindexed.
+        block_dir = final_path.parent
         tmp_path: Path | None = None
         try:
             # Give each writer its own temp file so concurrent writes to the same fragment do not contend on a shared *.tmp pathname.
@@ -52,12 +392,32 @@ class FragmentStore:
                 suffix=".tmp",
                 delete=False,
             ) as f:
+                tmp_path = Path(f.name)
                 f.write(data)
                 f.flush()
-                os.fsync(f.fileno())
-                tmp_path = Path(f.name)
 
-            os.replace(tmp_path, final_path)
+                def publish() -> None:
+                    os.replace(tmp_path, final_path)
+                    if on_publish is not None:
+                        on_publish()
+
+                if durability is not Durability.FSYNC:
+                    pass  # synced later (BATCH) or never (NONE)
+                elif self._group_commit is not None:
+                    # The fsync, journal fsync, rename and directory fsync
+                    # are shared with every other put in the same batch.
+                    self._group_commit.commit(f.fileno(), publish, block_dir)
+                    return
+                else:
+                    os.fsync(f.fileno())
+                    if journal is not None:
+                        journal.sync()
+
+            publish()
+            if durability is Durability.BATCH:
+                self._flusher.add(final_path)
+            if journal is not None:
+                self._maybe_snapshot(journal)
         finally:
             if tmp_path is not None:
                 try:
@@ -66,67 +426,434 @@ class FragmentStore:
                 except OSError:
                     pass
 
-        self._index.setdefault(record.block_id, set()).add(record.index)
-
     def get(self, block_id: str, index: int) -> FragmentRecord:
-        path = self._fragment_path(block_id, index)
-        if not path.exists():
-            raise FragmentNotFoundError((block_id, index))
         try:
-            raw = path.read_text(encoding="utf-8")
+            return FragmentRecord.from_bytes(self._with_data(self._fragment_path(block_id, index).read_bytes()))
+        except FileNotFoundError:
+            pass
+        try:
+            raw = self._legacy_path(block_id, index).read_text(encoding="utf-8")
             return FragmentRecord.from_dict(json.loads(raw))
         except FileNotFoundError:
             raise FragmentNotFoundError((block_id, index))
 
-    def delete(self, block_id: str, index: int) -> None:
+    def open_view(self, block_id: str, index: int) -> FragmentView:
+        """Memory-map a stored fragment; the caller must close() the view.
+
+        The mapping keeps the record that was current at open time even if the
+        fragment is replaced or deleted meanwhile (put() swaps in a new file).
+        set_verification() is the exception: it patches the status and
+        verified_at in the header of the same file, which shows through.
+        Legacy JSON records have no raw payload on disk and are decoded first;
+        reference records (dedup) are joined with their data in memory.  A
+        record that cannot be read (empty after a crash, or a corrupt header)
+        raises FragmentNotFoundError, as the fragment is unusable.
+        """
         path = self._fragment_path(block_id, index)
-        if not path.exists():
-            raise FragmentNotFoundError((block_id, index))
         try:
-            path.unlink()
+            with open(path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
         except FileNotFoundError:
+            return FragmentView(self.get(block_id, index).to_bytes())
+        except ValueError:
+            # An empty file cannot be mapped.
+            _log.warning("Unreadable fragment record %s (empty)", path)
+            raise FragmentNotFoundError((block_id, index))
+        try:
+            if is_reference_record(mapping):
+                try:
+                    return FragmentView(self._with_data(mapping))
+                except FileNotFoundError:
+                    raise FragmentNotFoundError((block_id, index))
+                finally:
+                    mapping.close()
+            return FragmentView(mapping, mapping=mapping)
+        except ValueError:
+            mapping.close()
+            _log.warning("Unreadable fragment record %s", path)
             raise FragmentNotFoundError((block_id, index))
 
-        indices = self._index.get(block_id)
-        if indices is not None:
-            indices.discard(index)
-            if not indices:
-                self._index.pop(block_id, None)
+    def get_metadata(self, block_id: str, index: int) -> RecordHeader:
+        """Return a fragment's metadata, reading only the record header."""
+        try:
+            fd = os.open(self._fragment_path(block_id, index), os.O_RDONLY)
+        except FileNotFoundError:
+            return RecordHeader.from_record(self.get(block_id, index))
+        try:
+            return RecordHeader.read(lambda offset, size: os.pread(fd, size, offset))
+        finally:
+            os.close(fd)
+
+    def list_metadata(self, block_id: str) -> list[RecordHeader]:
+        headers: list[RecordHeader] = []
+        for index in self.list_indices(block_id):
+            try:
+                headers.append(self.get_metadata(block_id, index))
+            except FragmentNotFoundError:
+                continue  # deleted since listing
+        return headers
+
+    def set_verification(
+        self,
+        block_id: str,
+        index: int,
+        status: VerificationStatus,
+        verified_at: datetime | None,
+    ) -> None:
+        """Record the outcome of re-verifying a stored fragment.
+
+        Status and time sit in the fixed record header, which is patched in
+        place.  Neither the patch nor its index journal entry is fsynced:
+        losing them in a crash only means the fragment is re-verified.
+        """
+        try:
+            fd = os.open(self._fragment_path(block_id, index), os.O_RDWR)
+        except FileNotFoundError:
+            # Legacy JSON record: rewrite it (in the binary format).
+            record = self.get(block_id, index)
+            record.verification_status = status
+            record.verified_at = verified_at
+            self.put(record)
+            return
+        try:
+            header = os.pread(fd, FIXED_HEADER_SIZE, 0)
+            _, data_length = peek_header(header)
+            info = FragmentInfo(data_length, os.fstat(fd).st_size, status)
+            journal = self._journal_change(block_id, index, info)
+            try:
+                os.pwrite(fd, patch_verification(header, status, verified_at), 0)
+                with self._index_lock:
+                    self._index_set(block_id, index, info)
+            finally:
+                self._finish_change(block_id, index, journal)
+        finally:
+            os.close(fd)
+        if journal is not None:
+            self._maybe_snapshot(journal)
+
+    def delete(self, block_id: str, index: int) -> None:
+        if not self.has(block_id, index):
+            raise FragmentNotFoundError((block_id, index))
+        fragment_path = self._fragment_path(block_id, index)
+        previous = self._referenced_digest(fragment_path) if self._has_objects else None
+        journal = self._journal_change(block_id, index, None)
+        try:
+            journal.sync()
+            removed = False
+            for path in (fragment_path, self._legacy_path(block_id, index)):
+                try:
+                    path.unlink()
+                    removed = True
+                except FileNotFoundError:
+                    pass
+            if not removed:
+                raise FragmentNotFoundError((block_id, index))
+            with self._index_lock:
+                self._index_pop(block_id, index)
+        finally:
+            self._finish_change(block_id, index, journal)
+        self._maybe_snapshot(journal)
+        if previous is not None:
+            self._drop_reference(block_id, index, previous)
 
-        block_dir = self.base_dir / block_id
+        block_path = self.block_dir(block_id)
         try:
-            if block_dir.exists() and not any(block_dir.iterdir()):
-                block_dir.rmdir()
+            if block_path.exists() and not any(block_path.iterdir()):
+                block_path.rmdir()
         except OSError:
             pass
 
     def list_fragments(self, block_id: str) -> list[FragmentRecord]:
-        block_dir = self.base_dir / block_id
-        if not block_dir.exists():
+        block_path = self.block_dir(block_id)
+        if not block_path.exists():
             return []
-        records: list[FragmentRecord] = []
-        for p in block_dir.glob("fragment_*.json"):
+        records: dict[int, FragmentRecord] = {}
+        for p in block_path.glob("fragment_*"):
             try:
-                raw = p.read_text(encoding="utf-8")
-                records.append(FragmentRecord.from_dict(json.loads(raw)))
+                if p.suffix == RECORD_SUFFIX:
+                    record = FragmentRecord.from_bytes(self._with_data(p.read_bytes()))
+                elif p.suffix == LEGACY_SUFFIX:
+                    record = FragmentRecord.from_dict(json.loads(p.read_text(encoding="utf-8")))
+                else:
+                    continue
             except Exception:
                 continue
-        records.sort(key=lambda r: r.index)
-        return records
+            # A binary record wins over a leftover legacy copy.
+            if record.index not in records or p.suffix == RECORD_SUFFIX:
+                records[record.index] = record
+        return [records[i] for i in sorted(records)]
 
     def has(self, block_id: str, index: int) -> bool:
-        return self._fragment_path(block_id, index).exists()
+        on_disk = self._fragment_path(block_id, index).exists() or self._legacy_path(block_id, index).exists()
+        with self._index_lock:
+            stale = (
+                on_disk != (index in self._index.get(block_id, ()))
+                and (block_id, index) not in self._pending
+            )
+        if stale:
+            # Only a crash leaves this: a BATCH or NONE put whose rename
+            # reached the disk before its (unsynced) journal entry, or the
+            # reverse.  Repair it so a retried PUT fixes the listing too.
+            self._reconcile(block_id, index)
+        return on_disk
+
+    def block_dir(self, block_id: str) -> Path:
+        """Return the directory holding a block's fragments.
+
+        Raises ValueError for a block id naming one of the store's own files.
+        """
+        validate_block_id(block_id)
+        return self.base_dir.joinpath(*shard_parts(block_id, self.shard_levels), block_id)
 
     def _fragment_path(self, block_id: str, index: int) -> Path:
-        return self.base_dir / block_id / f"fragment_{index}.json"
+        return self.block_dir(block_id) / f"fragment_{index}{RECORD_SUFFIX}"
+
+    def _legacy_path(self, block_id: str, index: int) -> Path:
+        return self.block_dir(block_id) / f"fragment_{index}{LEGACY_SUFFIX}"
+
+    # ------------------------------------------------------------------
+    # Deduplicated objects
+    # ------------------------------------------------------------------
+
+    def object_path(self, digest: bytes) -> Path:
+        """Return where the data with SHA-256 `digest` is stored in dedup mode."""
+        h = digest.hex()
+        return self.objects_dir / h[0:2] / h[2:4] / h
+
+    def _reference_path(self, block_id: str, index: int, digest: bytes) -> Path:
+        return self.block_dir(block_id) / f"fragment_{index}.{digest.hex()}{REFERENCE_SUFFIX}"
+
+    def _object_lock(self, digest: bytes) -> threading.Lock:
+        return self._object_locks[digest[0] % _OBJECT_LOCK_STRIPES]
+
+    def _with_data(self, raw: bytes | mmap.mmap) -> bytes:
+        # A complete record for `raw`, fetching its data if it is a reference.
+        if not is_reference_record(raw):
+            return raw
+        header = RecordHeader.unpack(raw)
+        return attach_data(raw, self.object_path(header.data_sha256).read_bytes())
+
+    def _referenced_digest(self, path: Path) -> bytes | None:
+        # The object a stored record references, if it is a reference record.
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            header = RecordHeader.read(lambda offset, size: os.pread(fd, size, offset))
+        except ValueError:
+            return None
+        finally:
+            os.close(fd)
+        return header.data_sha256 if header.is_reference else None
+
+    def _link_object(self, record: FragmentRecord, digest: bytes) -> bool:
+        # Take a reference to the object holding record.data, storing it
+        # first if it is new.  Returns False if the fragment already held one.
+        link = self._reference_path(record.block_id, record.index, digest)
+        path = self.object_path(digest)
+        fsync = record.durability is Durability.FSYNC
+        with self._object_lock(digest):
+            try:
+                os.link(path, link)
+                linked = True
+            except FileExistsError:
+                linked = False
+            except FileNotFoundError:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                size = len(record.data)
+                journal = self._journal_object(digest, True, size)
+                try:
+                    self._write_atomic(path, record.data, durability=record.durability, journal=journal)
+                except BaseException:
+                    self._journal_object(digest, False, size)
+                    raise
+                finally:
+                    self._settle_object(digest)
+                os.link(path, link)
+                if fsync:
+                    fsync_directory(link.parent)
+                return True
+            if fsync:
+                # The object may come from a BATCH or NONE put that never
+                # synced it; this put is only durable once it is.
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                fsync_directory(path.parent)
+                fsync_directory(link.parent)
+            return linked
+
+    def _drop_reference(self, block_id: str, index: int, digest: bytes) -> bool:
+        try:
+            self._reference_path(block_id, index, digest).unlink()
+        except FileNotFoundError:
+            pass
+        return self.release_object(digest)
+
+    def release_object(self, digest: bytes) -> bool:
+        """Delete an object no record references any more; returns True if it was deleted."""
+        path = self.object_path(digest)
+        with self._object_lock(digest):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                return False
+            if st.st_nlink > 1:
+                return False
+            self._journal_object(digest, False, st.st_size)
+            try:
+                path.unlink()
+            except BaseException:
+                self._journal_object(digest, True, st.st_size)
+                raise
+            finally:
+                self._settle_object(digest)
+        return True
+
+    def _journal_object(self, digest: bytes, stored: bool, size: int) -> IndexJournal:
+        # Log an object about to be stored or deleted and count it at once;
+        # replay checks every logged object against the disk.  Callers hold
+        # the object's lock, and log the reverse change if theirs fails.
+        with self._index_lock:
+            self._objects.count += 1 if stored else -1
+            self._objects.bytes += size if stored else -size
+            journal = self._journal
+            journal.append_object(OP_OBJECT, digest, stored, size)
+            self._pending_objects[digest] = (stored, size)
+        return journal
+
+    def _settle_object(self, digest: bytes) -> None:
+        with self._index_lock:
+            self._pending_objects.pop(digest, None)
+
+    def prune_references(self, block_id: str, index: int) -> int:
+        """Drop a fragment's links to objects its record no longer references.
+
+        Such links are left by a put interrupted between linking the object
+        and publishing the record.  Call with the fragment's lock held.
+        Returns the number of objects this released.
+        """
+        current = self._referenced_digest(self._fragment_path(block_id, index))
+        released = 0
+        for link in self.block_dir(block_id).glob(f"fragment_{index}.*{REFERENCE_SUFFIX}"):
+            try:
+                digest = bytes.fromhex(link.name.split(".")[1])
+            except (IndexError, ValueError):
+                continue
+            if digest != current and self._drop_reference(block_id, index, digest):
+                released += 1
+        return released
+
+    def _scan_objects(self) -> ObjectTotals:
+        # Only when the index is rebuilt, or its snapshot predates object totals.
+        totals = ObjectTotals()
+        for directory, _, files in os.walk(self.objects_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                try:
+                    totals.bytes += os.stat(os.path.join(directory, name)).st_size
+                except FileNotFoundError:
+                    continue
+                totals.count += 1
+        return totals
+
+    # ------------------------------------------------------------------
+    # Legacy JSON migration
+    # ------------------------------------------------------------------
+
+    def legacy_record_count(self) -> int:
+        """Number of fragment_*.json records seen at startup and not yet migrated."""
+        return self._legacy_count
+
+    def migrate_legacy_records(self, lock_for: LockFactory | None = None) -> int:
+        """Rewrite every fragment_*.json record in the binary format.
+
+        `lock_for(block_id, index)` should return the same per-fragment lock
+        the server holds around put/delete, so a migration never races a
+        concurrent delete.  Returns the number of records converted.
+        """
+        converted = 0
+        for legacy in list(self.base_dir.rglob(f"fragment_*{LEGACY_SUFFIX}")):
+            block_id = legacy.parent.name
+            try:
+                index = int(legacy.stem.removeprefix("fragment_"))
+            except ValueError:
+                continue
+
+            with lock_for(block_id, index) if lock_for is not None else nullcontext():
+                try:
+                    record = FragmentRecord.from_dict(json.loads(legacy.read_text(encoding="utf-8")))
+                except FileNotFoundError:
+                    continue  # deleted since the scan
+                except Exception:
+                    _log.warning("Skipping unreadable legacy record %s", legacy)
+                    continue
+
+                if not self._fragment_path(block_id, index).exists():
+                    self.put(record)
+                try:
+                    legacy.unlink()
+                except FileNotFoundError:
+                    pass
+                converted += 1
+                self._legacy_count = max(0, self._legacy_count - 1)
+        return converted
+
+    def start_legacy_migration(self, lock_for: LockFactory | None = None) -> threading.Thread | None:
+        """Run migrate_legacy_records() on a daemon thread if there is anything to do."""
+        if not self._legacy_count:
+            return None
+        thread = threading.Thread(
+            target=self.migrate_legacy_records,
+            args=(lock_for,),
+            name="veri-store-legacy-migration",
+            daemon=True,
+        )
+        thread.start()
+        return thread
 
     def fragment_count(self) -> int:
         """Return the number of stored fragments (fast path)."""
-        return sum(len(v) for v in self._index.values())
+        with self._index_lock:
+            return self._usage.fragments()
+
+    def stats(self) -> StoreStats:
+        """Return fragment, payload-byte and record-byte totals per status.
+
+        The totals are kept up to date by put, delete and set_verification
+        and rebuilt with the index, so this never touches the disk.
+        """
+        with self._index_lock:
+            return dataclasses.replace(
+                self._usage.snapshot(), dedup_objects=self._objects.count, dedup_bytes=self._objects.bytes
+            )
+
+    def list_blocks(self) -> list[str]:
+        """Return the ids of all blocks with at least one stored fragment."""
+        with self._index_lock:
+            return list(self._block_ids)
+
+    def list_blocks_page(
+        self, prefix: str = "", after: str | None = None, limit: int = 1000
+    ) -> list[tuple[str, list[int]]]:
+        """Return up to `limit` (block_id, indices) pairs in block_id order.
+
+        Only blocks whose id starts with `prefix` and sorts after `after` (the
+        last id of the previous page) are returned.  Served from memory.
+        """
+        with self._index_lock:
+            return [
+                (block_id, sorted(self._index[block_id]))
+                for block_id in self._block_ids.page(prefix, after, limit)
+            ]
 
     def list_indices(self, block_id: str) -> list[int]:
         """Return stored indices for a block from in-memory state."""
-        return sorted(self._index.get(block_id, set()))
+        return sorted(self._index.get(block_id, {}))
 
 
 class FragmentNotFoundError(KeyError):
@@ -1,9 +1,10 @@
 from __future__ import annotations
 import json
 from dataclasses import dataclass
+from typing import Sequence
 
 from ..fingerprint.field import GF256
-from ..fingerprint.fingerprint import fingerprint, random_point
+from ..fingerprint.fingerprint import fingerprint_block, fingerprint_many, random_point
 from ..erasure.encoder import Fragment
 from .oracle import RandomOracle
 
@@ -18,20 +19,48 @@ class FingerprintedCrossChecksum:
 
     @classmethod
     def generate(cls, fragments: list[Fragment]) -> FingerprintedCrossChecksum:
-        if not fragments:
-            raise ValueError("fragments cannot be empty")
-        for i, f in enumerate(fragments):
-            if f.index != i:
-                raise ValueError(f"fragments must be in index order with no gaps. Fragment at position {i} has index {f.index}.")
+        _check_fragment_order(fragments)
 
         hashes = [RandomOracle.hash_fragment(f.data) for f in fragments]
         r = RandomOracle.derive(hashes)
         n = len(fragments)
         m = fragments[0].threshold_m
-        fingerprints = [fingerprint(r, fragments[j].data) for j in range(0, m)]
+        fingerprints = fingerprint_block(r, [fragments[j].data for j in range(0, m)])
 
         return FingerprintedCrossChecksum(hashes, fingerprints, r, n, m)
-        
+
+    @classmethod
+    def generate_many(
+        cls, fragment_lists: Sequence[list[Fragment]]
+    ) -> list[FingerprintedCrossChecksum]:
+        # One fpcc per block, as generate() would produce, but the data-fragment
+        # fingerprints of every block are computed in a single vectorized pass.
+        for fragments in fragment_lists:
+            _check_fragment_order(fragments)
+
+        hash_lists = [
+            [RandomOracle.hash_fragment(f.data) for f in fragments]
+            for fragments in fragment_lists
+        ]
+        points = [RandomOracle.derive(hashes) for hashes in hash_lists]
+
+        fp_points: list[GF256] = []
+        fp_buffers: list[bytes | memoryview] = []
+        for fragments, r in zip(fragment_lists, points):
+            m = fragments[0].threshold_m
+            fp_points.extend([r] * m)
+            fp_buffers.extend(fragments[j].data for j in range(m))
+        all_fingerprints = fingerprint_many(fp_points, fp_buffers)
+
+        results: list[FingerprintedCrossChecksum] = []
+        offset = 0
+        for fragments, hashes, r in zip(fragment_lists, hash_lists, points):
+            m = fragments[0].threshold_m
+            fingerprints = all_fingerprints[offset : offset + m]
+            offset += m
+            results.append(cls(hashes, fingerprints, r, len(fragments), m))
+        return results
+
 
     # ------------------------------------------------------------------
     # Serialization
@@ -65,3 +94,11 @@ class FingerprintedCrossChecksum:
 
     def digest(self) -> str:
         return RandomOracle.hash_fragment(self.to_json().encode()).hex()
+
+
+def _check_fragment_order(fragments: list[Fragment]) -> None:
+    if not fragments:
+        raise ValueError("fragments cannot be empty")
+    for i, f in enumerate(fragments):
+        if f.index != i:
+            raise ValueError(f"fragments must be in index order with no gaps. Fragment at position {i} has index {f.index}.")
@@ -1,24 +1,33 @@
 from __future__ import annotations
 import hashlib
+from functools import lru_cache
 
 from ..fingerprint.field import GF256
 
+# r depends only on the fpcc's hash list, and a server or client verifies
+# many fragments against the same fpcc, so recently derived points are kept.
+ORACLE_CACHE_SIZE: int = 4096
+
+
 class RandomOracle:
     @staticmethod
     def derive(fragment_hashes: list[bytes]) -> GF256:
         if not fragment_hashes:
             raise ValueError("fragment_hashes cannot be empty")
 
-        counter = 0
-        concatenated = b''.join(fragment_hashes)
-        
-        while True:
-            digest = RandomOracle.hash_fragment(concatenated + counter.to_bytes(4, 'big'))
-            r = GF256(digest[0])  # Take the first byte as the candidate point
-            if r.value != 0: 
-                return r
-            counter += 1
+        return _derive_point(b''.join(fragment_hashes))
 
     @staticmethod
     def hash_fragment(fragment_data: bytes) -> bytes:
         return hashlib.sha256(fragment_data).digest()
+
+
+@lru_cache(maxsize=ORACLE_CACHE_SIZE)
+def _derive_point(concatenated: bytes) -> GF256:
+    counter = 0
+    while True:
+        digest = RandomOracle.hash_fragment(concatenated + counter.to_bytes(4, 'big'))
+        r = GF256(digest[0])  # Take the first byte as the candidate point
+        if r.value != 0: 
+            return r
+        counter += 1
@@ -4,7 +4,8 @@ from enum import Enum
 
 from .cross_checksum import FingerprintedCrossChecksum
 from .oracle import RandomOracle
-from ..fingerprint.fingerprint import fingerprint
+from ..fingerprint.field import GF256
+from ..fingerprint.fingerprint import fingerprint, fingerprint_block
 
 
 class VerificationResult(Enum):
@@ -31,6 +32,52 @@ class Verifier:
         fragment_data: bytes,
         fpcc: FingerprintedCrossChecksum,
     ) -> VerificationReport:
+        report = Verifier._check_index_and_hash(fragment_index, fragment_data, fpcc)
+        if report is not None:
+            return report
+
+        # For indices < m, do the fingerprints match?
+        fp_prime = None
+        if fragment_index < fpcc.m:
+            r_prime = RandomOracle.derive(fpcc.hashes)
+            fp_prime = fingerprint(r_prime, fragment_data)
+        return Verifier._check_fingerprint(fragment_index, fp_prime, fpcc)
+
+    @staticmethod
+    def batch_check(
+        fragments: list[tuple[int, bytes]],
+        fpcc: FingerprintedCrossChecksum,
+    ) -> list[VerificationReport]:
+        # Same reports as calling check() per fragment, but r is derived once
+        # and every data fragment that passes its hash check is fingerprinted
+        # in a single fingerprint_block() call.
+        early = [
+            Verifier._check_index_and_hash(index, data, fpcc) for index, data in fragments
+        ]
+        needs_fp = [
+            position
+            for position, (index, _) in enumerate(fragments)
+            if early[position] is None and index < fpcc.m
+        ]
+        fp_by_position: dict[int, GF256] = {}
+        if needs_fp:
+            r_prime = RandomOracle.derive(fpcc.hashes)
+            fps = fingerprint_block(r_prime, [fragments[p][1] for p in needs_fp])
+            fp_by_position = dict(zip(needs_fp, fps))
+
+        return [
+            report
+            if report is not None
+            else Verifier._check_fingerprint(index, fp_by_position.get(position), fpcc)
+            for position, ((index, _), report) in enumerate(zip(fragments, early))
+        ]
+
+    @staticmethod
+    def _check_index_and_hash(
+        fragment_index: int,
+        fragment_data: bytes,
+        fpcc: FingerprintedCrossChecksum,
+    ) -> VerificationReport | None:
         # Is the index out of bounds?
         if not (0 <= fragment_index < fpcc.n):
             return VerificationReport(
@@ -53,21 +100,23 @@ class Verifier:
                 fp_matched=None,
                 detail=f"Hash mismatch for fragment index {fragment_index}."
             )
+        return None
 
-        # For indices < m, do the fingerprints match?
-        if (fragment_index < fpcc.m):
-            r_prime = RandomOracle.derive(fpcc.hashes)
-            fp_prime = fingerprint(r_prime, fragment_data)
-
-            if fp_prime != fpcc.fingerprints[fragment_index]:
-                return VerificationReport(
-                    result=VerificationResult.FP_MISMATCH,
-                    fragment_index=fragment_index,
-                    hash_matched=True,
-                    fp_checked=True,
-                    fp_matched=False,
-                    detail=f"Fingerprint mismatch for fragment index {fragment_index}."
-                )
+    @staticmethod
+    def _check_fingerprint(
+        fragment_index: int,
+        fp_prime: GF256 | None,
+        fpcc: FingerprintedCrossChecksum,
+    ) -> VerificationReport:
+        if fragment_index < fpcc.m and fp_prime != fpcc.fingerprints[fragment_index]:
+            return VerificationReport(
+                result=VerificationResult.FP_MISMATCH,
+                fragment_index=fragment_index,
+                hash_matched=True,
+                fp_checked=True,
+                fp_matched=False,
+                detail=f"Fingerprint mismatch for fragment index {fragment_index}."
+            )
 
         # If we reach here, all checks passed.
         return VerificationReport(
@@ -78,10 +127,3 @@ class Verifier:
             fp_matched=True if fragment_index < fpcc.m else None,
             detail=f"Fragment index {fragment_index} is consistent with the fpcc."
         )
-
-    @staticmethod
-    def batch_check(
-        fragments: list[tuple[int, bytes]],
-        fpcc: FingerprintedCrossChecksum,
-    ) -> list[VerificationReport]:
-        return [Verifier.check(index, data, fpcc) for index, data in fragments]
@@ -2,7 +2,13 @@ import os
 import pytest
 from itertools import combinations
 from src.erasure.encoder import encode
-from src.erasure.decoder import decode, DecodingError
+from src.erasure.decoder import (
+    DecodingError,
+    decode,
+    decode_into,
+    decoding_matrix_for,
+    warm_decoding_cache,
+)
 
 
 class TestDecodeRoundTrip:
@@ -51,6 +57,89 @@ class TestDecodeRoundTrip:
         assert decode(frags[:3]) == data
 
 
+class TestSystematicFastPath:
+    """Decoding when some or all data fragments (indices < m) are present."""
+
+    @pytest.mark.parametrize("length", [1, 2, 3, 4, 5, 299, 300, 301])
+    def test_all_data_fragments_short_and_padded_lengths(self, length):
+        """Concatenating data fragments strips exactly the encoder's padding."""
+        data = os.urandom(length)
+        frags = encode(data, n=5, m=3)
+        assert decode(frags[:3]) == data
+
+    def test_extra_parity_fragments_are_ignored(self):
+        """When all data fragments are present, corrupted parity is never read."""
+        data = b"systematic fast path"
+        frags = encode(data, n=5, m=3)
+        frags[4].data = bytes(len(frags[4].data))
+        assert decode([frags[4], frags[2], frags[0], frags[1]]) == data
+
+    @pytest.mark.parametrize("missing", [0, 1, 2])
+    def test_one_missing_data_chunk(self, missing):
+        """A single missing data chunk is rebuilt from the fragments received."""
+        data = os.urandom(1000)
+        frags = encode(data, n=5, m=3)
+        subset = [f for f in frags if f.index != missing][:3]
+        assert decode(subset) == data
+
+
+class TestDecodeInto:
+    """decode_into() writes into a caller-provided buffer."""
+
+    @pytest.mark.parametrize("indices", [(0, 1, 2), (0, 3, 4), (2, 3, 4)])
+    def test_round_trip_into_bytearray(self, indices):
+        """The object is written in place for healthy and degraded reads."""
+        data = os.urandom(1001)
+        frags = encode(data, copy=False)
+        out = bytearray(len(data) + 10)
+        written = decode_into([frags[i] for i in indices], out)
+        assert written == len(data)
+        assert bytes(out[:written]) == data
+
+    def test_memoryview_target(self):
+        """A writable memoryview slice is a valid target."""
+        data = os.urandom(300)
+        frags = encode(data)
+        backing = bytearray(400)
+        decode_into(frags[2:], memoryview(backing)[50:350])
+        assert bytes(backing[50:350]) == data
+
+    def test_read_only_target_raises(self):
+        """bytes is not writable and is rejected."""
+        frags = encode(b"abc")
+        with pytest.raises(ValueError):
+            decode_into(frags[:3], bytes(3))
+
+    def test_small_target_raises(self):
+        """A buffer shorter than original_length is rejected."""
+        frags = encode(b"abcdef")
+        with pytest.raises(ValueError):
+            decode_into(frags[:3], bytearray(5))
+
+
+class TestDecodingMatrixCache:
+    """Tests for the cached inverse sub-matrices."""
+
+    def test_repeated_lookup_returns_cached_matrix(self):
+        """The same (m, n, indices) key returns the same inverted matrix object."""
+        first = decoding_matrix_for(3, 5, (0, 2, 4))
+        assert decoding_matrix_for(3, 5, (0, 2, 4)) is first
+
+    def test_warm_covers_every_subset(self):
+        """warm_decoding_cache() inverts all C(n, m) subsets for small n."""
+        assert warm_decoding_cache(3, 5) == 10
+
+    def test_warm_skips_when_too_many_subsets(self):
+        """warm_decoding_cache() does nothing if the subsets exceed the cache size."""
+        assert warm_decoding_cache(10, 30) == 0
+
+    def test_degraded_decode_large_data(self):
+        """Decoding from parity fragments recovers a multi-megabyte object."""
+        data = os.urandom(2 * 1024 * 1024 + 1)
+        frags = encode(data, n=5, m=3)
+        assert decode([frags[1], frags[3], frags[4]]) == data
+
+
 class TestDecodeErrors:
     """Error handling in decode()."""
 
@@ -1,6 +1,9 @@
+import array
+import mmap
 import pytest
 import hashlib
-from src.erasure.encoder import encode, Fragment
+from src.erasure.encoder import encode, encode_many, Fragment
+from src.erasure.matrix import CodingMatrix
 
 
 class TestEncodeBasic:
@@ -42,6 +45,24 @@ class TestEncodeBasic:
         assert all(f.block_id == expected_id for f in frags)
 
 
+class TestEncodeMatchesMatrix:
+    """encode() must produce the same bytes as the per-symbol matrix product."""
+
+    @pytest.mark.parametrize("n,m", [(5, 3), (3, 3), (7, 2), (10, 4)])
+    def test_fragments_match_symbolwise_encoding(self, n, m):
+        """Every fragment byte equals CodingMatrix.encode() of its stripe."""
+        data = bytes((i * 37 + 11) % 256 for i in range(1001))
+        frags = encode(data, n=n, m=m)
+        chunk_size = len(frags[0].data)
+        padded = data + b"\x00" * (chunk_size * m - len(data))
+        matrix = CodingMatrix(m=m, n=n)
+
+        for position in range(chunk_size):
+            stripe = [padded[j * chunk_size + position] for j in range(m)]
+            expected = matrix.encode(stripe)
+            assert [f.data[position] for f in frags] == expected
+
+
 class TestEncodeEdgeCases:
     """Edge cases for encode()."""
 
@@ -65,3 +86,92 @@ class TestEncodeEdgeCases:
         """encode() raises ValueError if m > n."""
         with pytest.raises(ValueError):
             encode(b"data", n=3, m=5)
+
+
+class TestEncodeBuffers:
+    """encode() accepts any buffer-protocol object and can avoid copies."""
+
+    def test_buffer_inputs_match_bytes(self):
+        """bytearray, memoryview and typed arrays encode like the equivalent bytes."""
+        data = bytes(range(256)) * 4
+        expected = [f.data for f in encode(data)]
+        words = array.array("I", data)
+        for buffer in (bytearray(data), memoryview(data), words):
+            assert [bytes(f.data) for f in encode(buffer)] == expected
+
+    def test_mmap_input(self):
+        """An anonymous mmap can be encoded directly."""
+        data = bytes(range(200))
+        with mmap.mmap(-1, len(data)) as mapped:
+            mapped.write(data)
+            assert [bytes(f.data) for f in encode(mapped)] == [f.data for f in encode(data)]
+
+    def test_copy_false_returns_views(self):
+        """copy=False yields memoryviews whose contents equal the copied fragments."""
+        data = b"zero-copy fragments!"
+        views = encode(data, copy=False)
+        assert all(isinstance(f.data, memoryview) for f in views)
+        assert [bytes(f.data) for f in views] == [f.data for f in encode(data)]
+
+    def test_copy_false_data_fragments_alias_input(self):
+        """Without padding, data fragments are views of the caller's buffer."""
+        data = bytearray(b"abcdefghi")  # length divisible by m=3
+        frags = encode(data, copy=False)
+        data[0] = ord("X")
+        assert bytes(frags[0].data) == b"Xbc"
+
+    def test_fragment_normalizes_typed_buffers(self):
+        """Fragment.data from a non-byte buffer is exposed as a flat byte view."""
+        frag = Fragment(
+            index=0,
+            data=array.array("H", [1, 2]),
+            block_id="b",
+            total_n=5,
+            threshold_m=3,
+            original_length=4,
+        )
+        assert len(frag.data) == 4
+
+
+class TestEncodeMany:
+    """Batch encoding of many objects in one call."""
+
+    def test_matches_individual_encode(self):
+        """Each object's fragments equal encode() of that object alone."""
+        objects = [b"x", b"ab", b"abc", b"abcd", bytes(range(256)) * 5, b"\x00" * 10]
+        batches = encode_many(objects, n=5, m=3)
+
+        assert len(batches) == len(objects)
+        for obj, frags in zip(objects, batches):
+            single = encode(obj, n=5, m=3)
+            assert [f.data for f in frags] == [f.data for f in single]
+            assert [f.block_id for f in frags] == [f.block_id for f in single]
+            assert all(f.original_length == len(obj) for f in frags)
+
+    def test_explicit_block_ids(self):
+        """Provided block_ids are attached to each object's fragments."""
+        batches = encode_many([b"one", b"two"], block_ids=["id-1", "id-2"])
+        assert {f.block_id for f in batches[0]} == {"id-1"}
+        assert {f.block_id for f in batches[1]} == {"id-2"}
+
+    def test_copy_false_views(self):
+        """copy=False returns memoryview fragments with the same contents."""
+        objects = [b"first object", b"second"]
+        views = encode_many(objects, copy=False)
+        copies = encode_many(objects)
+        assert all(isinstance(f.data, memoryview) for frags in views for f in frags)
+        assert [[bytes(f.data) for f in fs] for fs in views] == [[f.data for f in fs] for fs in copies]
+
+    def test_empty_batch(self):
+        """No objects yields no fragment lists."""
+        assert encode_many([]) == []
+
+    def test_empty_object_raises(self):
+        """An empty object in the batch raises ValueError like encode()."""
+        with pytest.raises(ValueError):
+            encode_many([b"ok", b""])
+
+    def test_block_ids_length_mismatch_raises(self):
+        """block_ids must line up with objects."""
+        with pytest.raises(ValueError):
+            encode_many([b"a", b"b"], block_ids=["only-one"])
@@ -1,5 +1,6 @@
 from itertools import combinations
 
+import numpy as np
 import pytest
 
 from src.erasure.matrix import CodingMatrix
@@ -175,3 +176,35 @@ class TestCodingMatrixEncode:
         coded_symbols = vector_values(matrix.encode(source_symbols))
 
         assert coded_symbols[:3] == source_symbols
+
+
+class TestCodingMatrixEncodeChunks:
+    """Tests for the whole-buffer encode_chunks() method."""
+
+    def test_matches_per_symbol_encode(self):
+        """Column k of encode_chunks() equals encode() of column k."""
+        matrix = CodingMatrix(m=3, n=5)
+        rng = np.random.default_rng(7)
+        chunks = rng.integers(0, 256, size=(3, 64), dtype=np.uint8)
+
+        coded = matrix.encode_chunks(chunks)
+
+        for column in range(chunks.shape[1]):
+            expected = matrix.encode([int(v) for v in chunks[:, column]])
+            assert coded[:, column].tolist() == expected
+
+    def test_identity_rows_copy_data(self):
+        """The first m output rows are the input chunks unchanged."""
+        matrix = CodingMatrix(m=3, n=5)
+        chunks = np.arange(30, dtype=np.uint8).reshape(3, 10)
+
+        coded = matrix.encode_chunks(chunks)
+
+        assert np.array_equal(coded[:3], chunks)
+
+    def test_wrong_row_count_raises(self):
+        """encode_chunks() rejects input that does not have m rows."""
+        matrix = CodingMatrix(m=3, n=5)
+
+        with pytest.raises(ValueError):
+            matrix.encode_chunks(np.zeros((2, 4), dtype=np.uint8))
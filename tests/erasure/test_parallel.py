@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pytest
+from src.erasure.decoder import decode
+from src.erasure.encoder import encode
+from src.erasure.matrix import CodingMatrix
+from src.erasure.parallel import _executors, parallel_encode_chunks, should_parallelize, shutdown_executors
+
+
+class TestParallelEncodeChunks:
+    """parallel_encode_chunks() must agree with the serial kernel."""
+
+    @pytest.mark.parametrize("use_processes", [False, True])
+    def test_matches_serial(self, use_processes):
+        """Splitting across workers gives the same output as encode_chunks()."""
+        matrix = CodingMatrix(m=3, n=5)
+        rng = np.random.default_rng(3)
+        chunks = rng.integers(0, 256, size=(3, 700_001), dtype=np.uint8)
+
+        parallel = parallel_encode_chunks(matrix, chunks, workers=2, use_processes=use_processes)
+
+        assert np.array_equal(parallel, matrix.encode_chunks(chunks))
+
+    def test_row_subset(self):
+        """The rows= argument restricts the output like encode_chunks()."""
+        matrix = CodingMatrix(m=3, n=5)
+        chunks = np.arange(3 * 600_000, dtype=np.uint64).astype(np.uint8).reshape(3, -1)
+
+        parallel = parallel_encode_chunks(matrix, chunks, rows=[3, 4], workers=3)
+
+        assert np.array_equal(parallel, matrix.encode_chunks(chunks)[3:])
+
+    def test_shutdown_executors(self):
+        """shutdown_executors() drops the pools; later calls start fresh ones."""
+        matrix = CodingMatrix(m=3, n=5)
+        chunks = np.ones((3, 600_000), dtype=np.uint8)
+        parallel_encode_chunks(matrix, chunks, workers=2)
+        assert _executors
+
+        shutdown_executors()
+        assert not _executors
+        assert np.array_equal(parallel_encode_chunks(matrix, chunks, workers=2), matrix.encode_chunks(chunks))
+
+
+class TestParallelEncodeDecode:
+    """encode()/decode() in parallel mode are byte-identical to serial mode."""
+
+    def test_threshold(self):
+        """Small objects and single-worker calls stay serial."""
+        assert not should_parallelize(10, workers=4, threshold=1024)
+        assert not should_parallelize(10_000, workers=1, threshold=1024)
+        assert should_parallelize(10_000, workers=2, threshold=1024)
+
+    @pytest.mark.parametrize("use_processes", [False, True])
+    def test_round_trip(self, use_processes):
+        """Parallel encode and degraded parallel decode round-trip."""
+        data = os.urandom(1_500_001)
+        serial = encode(data)
+        frags = encode(data, workers=2, use_processes=use_processes, parallel_threshold=1)
+
+        assert [f.data for f in frags] == [f.data for f in serial]
+        degraded = [frags[1], frags[3], frags[4]]
+        assert decode(degraded, workers=2, use_processes=use_processes, parallel_threshold=1) == data
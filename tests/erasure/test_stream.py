@@ -0,0 +1,123 @@
+import io
+import os
+import tracemalloc
+
+import pytest
+from src.erasure.encoder import encode
+from src.erasure.stream import chunk_size_for, decode_stream, encode_stream
+
+
+def collect_fragments(windows, n: int) -> list[bytes]:
+    """Concatenate streamed windows into one buffer per fragment index."""
+    buffers = [bytearray() for _ in range(n)]
+    for pieces in windows:
+        for index, piece in enumerate(pieces):
+            buffers[index] += piece
+    return [bytes(b) for b in buffers]
+
+
+class TestEncodeStream:
+    """encode_stream() must produce the same fragments as encode()."""
+
+    @pytest.mark.parametrize("length", [1, 2, 3, 1000, 4097])
+    @pytest.mark.parametrize("window_size", [1, 7, 64, 1 << 20])
+    def test_matches_encode(self, length, window_size):
+        """Streamed fragments equal encode() output for any window size."""
+        data = os.urandom(length)
+        streamed = collect_fragments(encode_stream(data, window_size=window_size), 5)
+        assert streamed == [f.data for f in encode(data, n=5, m=3)]
+
+    def test_seekable_file_source(self):
+        """A seekable file-like object is read in place."""
+        data = os.urandom(5000)
+        streamed = collect_fragments(encode_stream(io.BytesIO(data), window_size=100), 5)
+        assert streamed == [f.data for f in encode(data)]
+
+    def test_iterable_source(self):
+        """A non-seekable iterable of bytes is spooled and encoded."""
+        data = os.urandom(3000)
+        pieces = (data[i : i + 333] for i in range(0, len(data), 333))
+        streamed = collect_fragments(encode_stream(pieces, window_size=256), 5)
+        assert streamed == [f.data for f in encode(data)]
+
+    def test_empty_source_raises(self):
+        """Empty input is rejected like encode()."""
+        with pytest.raises(ValueError):
+            list(encode_stream(b""))
+
+
+class TestDecodeStream:
+    """decode_stream() reconstructs the object from any m fragments."""
+
+    @pytest.mark.parametrize("indices", [(0, 1, 2), (0, 2, 4), (2, 3, 4), (1, 3, 4)])
+    def test_round_trip(self, indices):
+        """Streamed output equals the original for data and parity subsets."""
+        data = os.urandom(10_001)
+        frags = encode(data)
+        sources = {i: io.BytesIO(frags[i].data) for i in indices}
+        out = b"".join(decode_stream(sources, n=5, m=3, original_length=len(data), window_size=512))
+        assert out == data
+
+    def test_buffer_sources(self):
+        """Plain bytes buffers work as fragment sources."""
+        data = os.urandom(777)
+        frags = encode(data)
+        sources = {f.index: f.data for f in frags[1:4]}
+        assert b"".join(decode_stream(sources, 5, 3, len(data), window_size=50)) == data
+
+    def test_pieces_bounded_by_window(self):
+        """No yielded piece exceeds window_size bytes."""
+        data = os.urandom(2000)
+        frags = encode(data)
+        sources = {f.index: f.data for f in frags[2:]}
+        assert all(len(p) <= 64 for p in decode_stream(sources, 5, 3, len(data), window_size=64))
+
+    def test_too_few_sources_raises(self):
+        """Fewer than m fragment sources is a ValueError."""
+        frags = encode(b"abcdef")
+        with pytest.raises(ValueError):
+            list(decode_stream({0: frags[0].data}, 5, 3, 6))
+
+    def test_wrong_fragment_length_raises(self):
+        """Sources whose length disagrees with original_length are rejected."""
+        frags = encode(b"abcdef")
+        sources = {f.index: f.data for f in frags[:3]}
+        with pytest.raises(ValueError):
+            list(decode_stream(sources, 5, 3, 600))
+
+
+class TestStreamMemory:
+    """Peak memory is bounded by the window, not the object size."""
+
+    def test_encode_decode_peak_memory(self, tmp_path):
+        """An 8 MB round trip through files stays well under the object size."""
+        length = 8 * 1024 * 1024
+        window = 64 * 1024
+        source_path = tmp_path / "object.bin"
+        with open(source_path, "wb") as f:
+            for _ in range(length // (1 << 20)):
+                f.write(os.urandom(1 << 20))
+
+        tracemalloc.start()
+        try:
+            paths = [tmp_path / f"fragment_{i}" for i in range(5)]
+            handles = [open(p, "wb") for p in paths]
+            with open(source_path, "rb") as src:
+                for pieces in encode_stream(src, window_size=window):
+                    for handle, piece in zip(handles, pieces):
+                        handle.write(piece)
+            for handle in handles:
+                handle.close()
+
+            readers = {i: open(paths[i], "rb") for i in (0, 3, 4)}
+            with open(source_path, "rb") as original:
+                for piece in decode_stream(readers, 5, 3, length, window_size=window):
+                    assert piece == original.read(len(piece))
+            for reader in readers.values():
+                reader.close()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert os.path.getsize(paths[0]) == chunk_size_for(length, 3)
+        assert peak < length // 4
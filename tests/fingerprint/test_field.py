@@ -1,5 +1,10 @@
 import pytest
-from src.fingerprint.field import GF256, build_exp_log_tables
+from src.fingerprint.field import (
+    GF256,
+    MUL_TABLE,
+    build_exp_log_tables,
+    gf_power_vector,
+)
 
 
 class TestGF256Addition:
@@ -94,3 +99,35 @@ class TestExpLogTables:
         """exp_table has at least 256 entries."""
         assert len(build_exp_log_tables()[0]) >= 256
 
+
+
+class TestVectorTables:
+    """Tests for the NumPy lookup tables used by bulk operations."""
+
+    def test_mul_table_matches_gf256(self):
+        """MUL_TABLE[a, b] agrees with GF256 multiplication for every pair."""
+        for a in range(256):
+            for b in range(0, 256, 7):
+                assert MUL_TABLE[a, b] == (GF256(a) * GF256(b)).value
+
+    def test_power_vector_matches_pow(self):
+        """gf_power_vector(r, n)[i] == r ** i, including across the 255 period."""
+        for r in (0, 1, 2, 3, 200):
+            powers = gf_power_vector(r, 600)
+            for i in (0, 1, 2, 254, 255, 256, 599):
+                assert powers[i] == (GF256(r) ** i).value
+
+    def test_power_vector_empty(self):
+        """A zero-length power vector is empty."""
+        assert gf_power_vector(5, 0).size == 0
+
+    def test_power_vector_is_cached_and_read_only(self):
+        """Repeated lookups share one read-only array."""
+        first = gf_power_vector(9, 100)
+        assert gf_power_vector(9, 100) is first
+        assert not first.flags.writeable
+
+    def test_long_power_vector_tiles_cached_period(self):
+        """Vectors longer than the cache limit still match r ** i."""
+        powers = gf_power_vector(3, 10_000)
+        assert powers[9_999] == (GF256(3) ** 9_999).value
@@ -1,7 +1,11 @@
+import os
 import pytest
 from src.fingerprint.field import GF256
+from src.fingerprint.polynomial import Polynomial
 from src.fingerprint.fingerprint import (
     fingerprint,
+    fingerprint_block,
+    fingerprint_many,
     random_point,
     verify_homomorphic_property,
 )
@@ -99,6 +103,68 @@ class TestFingerprint:
         assert verify_homomorphic_property(r, d1, d2, (GF256(0), GF256(0)))
 
 
+class TestFingerprintBuffers:
+    """The vectorized fingerprint must match polynomial evaluation exactly."""
+
+    @pytest.mark.parametrize("length", [1, 2, 254, 255, 256, 510, 511, 4097])
+    @pytest.mark.parametrize("r", [0, 1, 3, 42, 255])
+    def test_matches_polynomial_evaluation(self, length, r):
+        """fingerprint() is bit-identical to Polynomial.evaluate() across period boundaries."""
+        data = os.urandom(length)
+        expected = Polynomial.from_bytes(data).evaluate(GF256(r))
+        assert fingerprint(GF256(r), data) == expected
+
+    def test_accepts_buffer_protocol_objects(self):
+        """bytearray and memoryview inputs give the same result as bytes."""
+        r = GF256(29)
+        data = os.urandom(1000)
+        expected = fingerprint(r, data)
+        assert fingerprint(r, bytearray(data)) == expected
+        assert fingerprint(r, memoryview(data)) == expected
+
+    def test_memoryview_slice(self):
+        """A memoryview slice is fingerprinted as its own byte range."""
+        r = GF256(11)
+        data = os.urandom(600)
+        assert fingerprint(r, memoryview(data)[100:400]) == fingerprint(r, data[100:400])
+
+
+class TestFingerprintBlock:
+    """Fingerprints of several buffers under one shared point."""
+
+    @pytest.mark.parametrize("r", [0, 5, 255])
+    def test_matches_individual_fingerprints(self, r):
+        """fingerprint_block() equals fingerprint() for every buffer."""
+        buffers = [os.urandom(n) for n in (0, 1, 254, 255, 256, 3000)]
+        assert fingerprint_block(GF256(r), buffers) == [fingerprint(GF256(r), b) for b in buffers]
+
+    def test_empty_block(self):
+        """No buffers yields no fingerprints."""
+        assert fingerprint_block(GF256(3), []) == []
+
+
+class TestFingerprintMany:
+    """Batch fingerprints with one evaluation point per buffer."""
+
+    def test_matches_individual_fingerprints(self):
+        """fingerprint_many() equals fingerprint() applied pairwise."""
+        lengths = [0, 1, 2, 255, 256, 1000, 0, 7]
+        buffers = [os.urandom(n) for n in lengths]
+        points = [GF256(v) for v in (3, 0, 0, 7, 255, 1, 9, 2)]
+        assert fingerprint_many(points, buffers) == [
+            fingerprint(r, b) for r, b in zip(points, buffers)
+        ]
+
+    def test_empty_batch(self):
+        """No buffers yields no fingerprints."""
+        assert fingerprint_many([], []) == []
+
+    def test_length_mismatch_raises(self):
+        """points and buffers must pair up."""
+        with pytest.raises(ValueError):
+            fingerprint_many([GF256(1)], [b"a", b"b"])
+
+
 class TestRandomPoint:
     """Tests for the random_point() oracle function."""
 
@@ -0,0 +1,86 @@
+import pytest
+
+from src.network.cache import FragmentCache
+
+
+class TestFragmentCache:
+    """Byte-budgeted LRU behaviour of FragmentCache."""
+
+    def test_get_after_put_hits(self):
+        """A stored value is returned and counted as a hit."""
+        cache = FragmentCache(max_bytes=100)
+        cache.put(("a", 0), b"value", cache.generation)
+
+        assert cache.get(("a", 0)) == b"value"
+        assert cache.get(("a", 1)) is None
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries, stats.bytes) == (1, 1, 1, 5)
+
+    def test_evicts_least_recently_used(self):
+        """Going over budget evicts the entry used longest ago."""
+        cache = FragmentCache(max_bytes=10)
+        cache.put(("a", 0), b"1111", cache.generation)
+        cache.put(("a", 1), b"2222", cache.generation)
+        cache.get(("a", 0))
+        cache.put(("a", 2), b"3333", cache.generation)
+
+        assert cache.get(("a", 1)) is None
+        assert cache.get(("a", 0)) == b"1111"
+        assert cache.stats().evictions == 1
+        assert cache.stats().bytes == 8
+
+    def test_oversized_value_is_not_cached(self):
+        """Values larger than the whole budget are skipped."""
+        cache = FragmentCache(max_bytes=4)
+        assert not cache.put(("a", 0), b"too large", cache.generation)
+        assert cache.stats().entries == 0
+
+    def test_zero_budget_disables_cache(self):
+        """max_bytes=0 never stores anything."""
+        cache = FragmentCache(max_bytes=0)
+        cache.put(("a", 0), b"x", cache.generation)
+        assert cache.get(("a", 0)) is None
+
+    def test_invalidate_removes_entry(self):
+        """invalidate() drops the entry and its bytes."""
+        cache = FragmentCache(max_bytes=100)
+        cache.put(("a", 0), b"value", cache.generation)
+        cache.invalidate(("a", 0))
+
+        assert cache.get(("a", 0)) is None
+        assert cache.stats().bytes == 0
+
+    def test_stale_read_is_not_cached(self):
+        """A value read before an invalidation is not stored afterwards."""
+        cache = FragmentCache(max_bytes=100)
+        generation = cache.generation
+        cache.invalidate(("a", 0))
+
+        assert not cache.put(("a", 0), b"stale", generation)
+        assert cache.get(("a", 0)) is None
+
+    def test_other_keys_invalidation_does_not_block_fill(self):
+        """Invalidating one fragment does not stop a concurrent read of another being cached."""
+        cache = FragmentCache(max_bytes=100)
+        generation = cache.generation
+        cache.invalidate(("a", 1))
+
+        assert cache.put(("a", 0), b"fresh", generation)
+        assert cache.get(("a", 0)) == b"fresh"
+
+    def test_invalidation_tracking_is_bounded(self, monkeypatch):
+        """Past the tracking limit older reads are refused for every key."""
+        monkeypatch.setattr("src.network.cache._MAX_TRACKED_INVALIDATIONS", 2)
+        cache = FragmentCache(max_bytes=100)
+        generation = cache.generation
+        for index in range(3):
+            cache.invalidate(("a", index))
+
+        assert len(cache._invalidated) == 1
+        assert not cache.put(("b", 0), b"old", generation)
+        assert cache.put(("b", 0), b"new", cache.generation)
+
+    def test_negative_budget_raises(self):
+        """A negative max_bytes is rejected."""
+        with pytest.raises(ValueError):
+            FragmentCache(max_bytes=-1)
@@ -0,0 +1,170 @@
+from collections.abc import Iterator
+import pytest
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from src.erasure.encoder import encode
+from src.network.scrubber import Scrubber
+from src.storage.fragment import FragmentRecord, VerificationStatus
+from src.storage.memory_store import MemoryStore
+from src.storage.store import FragmentStore
+from src.verification.cross_checksum import FingerprintedCrossChecksum
+
+
+@pytest.fixture
+def store() -> Iterator[FragmentStore]:
+    """Provide a fresh FragmentStore in a temporary directory."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+
+    try:
+        yield FragmentStore(test_root / "fragments")
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def store_block(store, block_id: str = "blk", payload: bytes = b"scrub me" * 64) -> list[FragmentRecord]:
+    """Store all n fragments of a block as VALID, the way PUT would."""
+    frags = encode(payload, n=5, m=3, block_id=block_id)
+    fpcc = FingerprintedCrossChecksum.generate(frags)
+    records = [
+        FragmentRecord(
+            index=frag.index,
+            data=frag.data,
+            block_id=block_id,
+            total_n=5,
+            threshold_m=3,
+            original_length=len(payload),
+            verification_status=VerificationStatus.VALID,
+            fpcc_digest=fpcc.digest(),
+            fpcc_json=fpcc.to_json(),
+            verified_at=datetime(2020, 1, 1),
+        )
+        for frag in frags
+    ]
+    for record in records:
+        store.put(record)
+    return records
+
+
+def corrupt(store: FragmentStore, block_id: str, index: int) -> None:
+    """Flip the last payload byte of a stored record on disk (bit rot)."""
+    path = store.block_dir(block_id) / f"fragment_{index}.bin"
+    raw = bytearray(path.read_bytes())
+    raw[-1] ^= 0xFF
+    path.write_bytes(bytes(raw))
+
+
+class TestScrubber:
+    """Background re-verification of stored fragments."""
+
+    def test_pass_refreshes_verified_at(self, store: FragmentStore):
+        """A clean pass keeps fragments VALID and stamps a new verified_at."""
+        store_block(store)
+        scrubber = Scrubber(store, max_bytes_per_second=1e12, cpu_share=1.0)
+        assert scrubber.scrub_pass() == 5
+
+        for index in range(5):
+            header = store.get_metadata("blk", index)
+            assert header.verification_status is VerificationStatus.VALID
+            assert header.verified_at > datetime(2020, 1, 1)
+        assert scrubber.stats().passes == 1
+        assert scrubber.stats().invalid == 0
+
+    def test_bit_rot_is_marked_invalid(self, store: FragmentStore):
+        """A fragment whose bytes changed on disk is marked INVALID."""
+        records = store_block(store)
+        corrupt(store, "blk", 1)
+        updated: list[tuple[str, int, VerificationStatus, datetime]] = []
+        scrubber = Scrubber(
+            store, max_bytes_per_second=1e12, cpu_share=1.0, on_update=lambda *args: updated.append(args)
+        )
+        scrubber.scrub_pass()
+
+        assert store.get_metadata("blk", 1).verification_status is VerificationStatus.INVALID
+        assert store.get_metadata("blk", 0).verification_status is VerificationStatus.VALID
+        assert scrubber.stats().invalid == 1
+        assert len(updated) == 5
+        invalid_at = store.get_metadata("blk", 1).verified_at
+        assert ("blk", 1, VerificationStatus.INVALID, invalid_at) in updated
+        # Only the header was patched; the payload is untouched.
+        assert store.get("blk", 0).data == records[0].data
+
+    def test_still_invalid_fragment_keeps_its_timestamp(self, store: FragmentStore):
+        """A fragment that stays INVALID is not rewritten, so GC retention is not reset."""
+        store_block(store)
+        corrupt(store, "blk", 1)
+        scrubber = Scrubber(store, max_bytes_per_second=1e12, cpu_share=1.0)
+        scrubber.scrub_pass()
+        found_at = store.get_metadata("blk", 1).verified_at
+
+        scrubber.scrub_pass()
+        assert store.get_metadata("blk", 1).verified_at == found_at
+        assert store.get_metadata("blk", 0).verified_at > found_at
+
+    def test_works_with_other_backends(self):
+        """Backends without in-place header updates rewrite the record."""
+        store = MemoryStore()
+        store_block(store)
+        Scrubber(store, max_bytes_per_second=1e12, cpu_share=1.0).scrub_pass()
+        assert all(
+            h.verified_at > datetime(2020, 1, 1) for h in store.list_metadata("blk")
+        )
+
+    def test_byte_budget_is_respected(self, store: FragmentStore):
+        """A pass takes at least bytes / max_bytes_per_second seconds."""
+        records = store_block(store, payload=bytes(range(256)) * 60)
+        total = sum(len(r.data) for r in records)
+        scrubber = Scrubber(store, max_bytes_per_second=total / 0.3, cpu_share=1.0)
+        started = time.monotonic()
+        scrubber.scrub_pass()
+        assert time.monotonic() - started >= 0.25
+
+    def test_holds_fragment_lock(self, store: FragmentStore):
+        """Every fragment is verified, and on_update runs, under the lock from lock_for."""
+        store_block(store)
+        locked: list[tuple[str, int]] = []
+        held: set[tuple[str, int]] = set()
+        updated_under_lock: list[bool] = []
+
+        class Lock:
+            def __init__(self, key):
+                self.key = key
+
+            def __enter__(self):
+                locked.append(self.key)
+                held.add(self.key)
+
+            def __exit__(self, *exc_info):
+                held.discard(self.key)
+                return False
+
+        Scrubber(
+            store,
+            lock_for=lambda b, i: Lock((b, i)),
+            max_bytes_per_second=1e12,
+            cpu_share=1.0,
+            on_update=lambda b, i, status, verified_at: updated_under_lock.append((b, i) in held),
+        ).scrub_pass()
+        assert locked == [("blk", i) for i in range(5)]
+        assert updated_under_lock == [True] * 5
+
+    def test_background_thread_stops(self, store: FragmentStore):
+        """start() runs passes on a thread that stop() ends promptly."""
+        store_block(store)
+        scrubber = Scrubber(store, max_bytes_per_second=1e12, cpu_share=1.0, interval=60)
+        scrubber.start()
+        deadline = time.monotonic() + 5
+        while scrubber.stats().passes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scrubber.stop()
+        assert scrubber.stats().passes == 1
+
+    def test_invalid_budgets_raise(self, store: FragmentStore):
+        """Budgets must be positive; cpu_share at most 1."""
+        with pytest.raises(ValueError):
+            Scrubber(store, max_bytes_per_second=0)
+        with pytest.raises(ValueError):
+            Scrubber(store, cpu_share=1.5)
@@ -2,14 +2,17 @@ import pytest
 import base64
 import json
 import shutil
+import time
 import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from fastapi.testclient import TestClient
 from pathlib import Path
 
-from src.network.server import create_app
+from src.network.server import _create_default_fastapi_app, create_app
 from src.erasure.encoder import encode
 from src.verification.cross_checksum import FingerprintedCrossChecksum
+from src.storage.store import FragmentStore
 
 _TOKEN = "test-token"
 
@@ -72,6 +75,95 @@ def test_create_app_without_token_raises():
         create_app(server_id=1, data_dir="/tmp", token="")
 
 
+def test_create_app_unknown_storage_backend_raises():
+    """create_app() rejects storage backends it does not know."""
+    with pytest.raises(ValueError):
+        create_app(server_id=1, data_dir="data/test_runs/unused", token=_TOKEN, storage_backend="tape")
+
+
+def test_default_app_runs_gc_only_when_configured(monkeypatch):
+    """The environment-configured app, like create_app(), leaves GC off unless asked."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+    monkeypatch.setenv("VERI_STORE_TOKEN", _TOKEN)
+    monkeypatch.setenv("DATA_DIR", str(test_root))
+    monkeypatch.delenv("GC_INTERVAL_SECONDS", raising=False)
+    monkeypatch.delenv("SCRUB_INTERVAL_SECONDS", raising=False)
+    try:
+        assert _create_default_fastapi_app().state.gc is None
+
+        monkeypatch.setenv("GC_INTERVAL_SECONDS", "600")
+        gc = _create_default_fastapi_app().state.gc
+        assert gc is not None
+        gc.stop()
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def test_default_app_runs_scrubber_only_when_configured(monkeypatch):
+    """The environment-configured app, like create_app(), leaves scrubbing off unless asked."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+    monkeypatch.setenv("VERI_STORE_TOKEN", _TOKEN)
+    monkeypatch.setenv("DATA_DIR", str(test_root))
+    monkeypatch.delenv("SCRUB_INTERVAL_SECONDS", raising=False)
+    try:
+        assert _create_default_fastapi_app().state.scrubber is None
+
+        monkeypatch.setenv("SCRUB_INTERVAL_SECONDS", "86400")
+        scrubber = _create_default_fastapi_app().state.scrubber
+        assert scrubber is not None
+        scrubber.stop()
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+@pytest.mark.parametrize("backend", ["segment", "sqlite", "memory"])
+def test_storage_backend_round_trip(backend):
+    """Every storage backend serves PUT/GET/DELETE like the default."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+    try:
+        app = create_app(server_id=1, data_dir=str(test_root), token=_TOKEN, storage_backend=backend)
+        client = TestClient(app, headers={"Authorization": f"Bearer {_TOKEN}"})
+        frags = encode(b"segment backend", n=5, m=3, block_id="seg")
+        body = {
+            "fragment_data": base64.b64encode(frags[0].data).decode(),
+            "total_n": 5,
+            "threshold_m": 3,
+            "original_length": len(b"segment backend"),
+            "fpcc_json": FingerprintedCrossChecksum.generate(frags).to_json(),
+        }
+
+        assert client.put("/fragments/seg/0", json=body).status_code == 200
+        assert client.put("/fragments/seg/0", json=body).status_code == 200  # idempotent
+        assert client.get("/fragments/seg/0").json()["fragment_data"] == body["fragment_data"]
+        assert client.get("/fragments/seg/0/raw").content == frags[0].data
+        assert client.delete("/fragments/seg/0").status_code == 200
+        assert client.get("/fragments/seg/0").status_code == 404
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def test_dedup_shares_identical_fragments(valid_store_body):
+    """With dedup on, identical fragments under two blocks are stored once."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+    try:
+        app = create_app(server_id=1, data_dir=str(test_root), token=_TOKEN, dedup=True)
+        client = TestClient(app, headers={"Authorization": f"Bearer {_TOKEN}"})
+        assert client.put("/fragments/a/0", json=valid_store_body).status_code == 200
+        assert client.put("/fragments/b/0", json=valid_store_body).status_code == 200
+
+        data = base64.b64decode(valid_store_body["fragment_data"])
+        assert client.get("/fragments/b/0/raw").content == data
+        storage = client.get("/health").json()["storage"]
+        assert storage["payload_bytes"] == 2 * len(data)
+        assert (storage["dedup_objects"], storage["dedup_bytes"]) == (1, len(data))
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
 class TestPutFragment:
     """Tests for PUT /fragments/{block_id}/{index}."""
 
@@ -99,6 +191,19 @@ class TestPutFragment:
 
         assert resp.status_code == 422
 
+    def test_put_reserved_block_id_returns_422(self, client, valid_store_body):
+        """A block id naming one of the store's own directories is rejected."""
+        resp = client.put("/fragments/.index/0", json=valid_store_body)
+        assert resp.status_code == 422
+        assert client.get("/health").json()["fragment_count"] == 0
+
+    def test_get_and_delete_reserved_block_id_return_422(self, client):
+        """A percent-encoded ".." or a reserved name never reaches the store."""
+        for block_id in ("%2E%2E", ".index"):
+            assert client.get(f"/fragments/{block_id}/0").status_code == 422
+            assert client.get(f"/fragments/{block_id}/0/raw").status_code == 422
+            assert client.delete(f"/fragments/{block_id}/0").status_code == 422
+
     def test_put_extra_field_returns_422(self, client, valid_store_body):
         """A PUT with unexpected fields is rejected when extra='forbid'."""
         invalid_body = {**valid_store_body, "unexpected_field": "should not be allowed"}
@@ -177,6 +282,23 @@ class TestPutFragment:
         resp = client.put("/fragments/block1/0", json=valid_store_body)
         assert resp.status_code == 200
 
+    def test_put_idempotent_reads_only_metadata(self, client, valid_store_body, monkeypatch):
+        """The idempotency check compares stored hashes, not stored data."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+
+        def fail_get(*args, **kwargs):
+            raise AssertionError("idempotent PUT loaded the stored fragment")
+
+        monkeypatch.setattr(FragmentStore, "get", fail_get)
+        resp = client.put("/fragments/block1/0", json=valid_store_body)
+        assert resp.status_code == 200
+
+        changed = {
+            **valid_store_body,
+            "fragment_data": base64.b64encode(b"other bytes").decode(),
+        }
+        assert client.put("/fragments/block1/0", json=changed).status_code == 409
+
     def test_put_duplicate_different_data_returns_409(self, client, valid_store_body):
         """Re-sending a different fragment for the same (block_id, index) returns 409."""
         client.put("/fragments/block1/0", json=valid_store_body)
@@ -243,6 +365,46 @@ class TestPutFragment:
             shutil.rmtree(test_root, ignore_errors=True)
 
 
+class TestDurability:
+    """Per-server and per-request durability levels."""
+
+    def test_default_durability_is_fsync(self, client, valid_store_body):
+        """Without a header, fragments are stored with the server default."""
+        resp = client.put("/fragments/block1/0", json=valid_store_body)
+        assert resp.json()["durability"] == "fsync"
+        assert client.get("/fragments/block1/0").json()["durability"] == "fsync"
+
+    def test_header_overrides_durability(self, client, valid_store_body):
+        """X-Durability selects the level for one PUT and is recorded."""
+        resp = client.put(
+            "/fragments/block1/0", json=valid_store_body, headers={"X-Durability": "batch"}
+        )
+        assert resp.status_code == 200
+        assert resp.json()["durability"] == "batch"
+        assert client.get("/fragments/block1/0").json()["durability"] == "batch"
+        assert client.get("/fragments/block1/0/raw").headers["x-durability"] == "batch"
+
+    def test_unknown_durability_returns_422(self, client, valid_store_body):
+        """An unrecognised X-Durability value is rejected before storing."""
+        resp = client.put(
+            "/fragments/block1/0", json=valid_store_body, headers={"X-Durability": "eventually"}
+        )
+        assert resp.status_code == 422
+        assert client.get("/fragments/block1/0").status_code == 404
+
+    def test_server_default_durability(self, valid_store_body):
+        """create_app(durability=...) sets the level for PUTs without a header."""
+        test_root = Path("data/test_runs") / str(uuid.uuid4())
+        test_root.mkdir(parents=True, exist_ok=False)
+        try:
+            app = create_app(server_id=1, data_dir=str(test_root), token=_TOKEN, durability="none")
+            client = TestClient(app, headers={"Authorization": f"Bearer {_TOKEN}"})
+            resp = client.put("/fragments/block1/0", json=valid_store_body)
+            assert resp.json()["durability"] == "none"
+        finally:
+            shutil.rmtree(test_root, ignore_errors=True)
+
+
 class TestGetFragment:
     """Tests for GET /fragments/{block_id}/{index}."""
 
@@ -282,6 +444,129 @@ class TestGetFragment:
         assert resp.json()["verification_status"] == "valid"
 
 
+class TestGetFragmentRaw:
+    """Tests for GET /fragments/{block_id}/{index}/raw."""
+
+    def test_raw_returns_fragment_bytes(self, client, valid_store_body):
+        """The body is the stored fragment bytes, without base64."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+
+        resp = client.get("/fragments/block1/0/raw")
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/octet-stream"
+        assert resp.content == base64.b64decode(valid_store_body["fragment_data"])
+
+    def test_raw_metadata_in_headers(self, client, valid_store_body):
+        """Coding parameters, status and fpcc travel as response headers."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+
+        resp = client.get("/fragments/block1/0/raw")
+
+        assert resp.headers["x-total-n"] == str(valid_store_body["total_n"])
+        assert resp.headers["x-threshold-m"] == str(valid_store_body["threshold_m"])
+        assert resp.headers["x-original-length"] == str(valid_store_body["original_length"])
+        assert resp.headers["x-verification-status"] == "valid"
+        assert base64.b64decode(resp.headers["x-fpcc-json"]).decode() == valid_store_body["fpcc_json"]
+
+    def test_raw_large_fragment_streams_in_slices(self, client):
+        """Fragments larger than one slice arrive complete and in order."""
+        data = bytes(range(256)) * (3 * 4096 + 7)
+        frags = encode(data, n=5, m=3, block_id="big")
+        fpcc = FingerprintedCrossChecksum.generate(frags)
+        client.put(
+            "/fragments/big/1",
+            json={
+                "fragment_data": base64.b64encode(frags[1].data).decode(),
+                "total_n": 5,
+                "threshold_m": 3,
+                "original_length": len(data),
+                "fpcc_json": fpcc.to_json(),
+            },
+        )
+
+        resp = client.get("/fragments/big/1/raw")
+
+        assert resp.status_code == 200
+        assert resp.content == frags[1].data
+
+    def test_raw_missing_fragment_returns_404(self, client):
+        """GET /raw for an unknown fragment returns 404."""
+        resp = client.get("/fragments/missing_block/0/raw")
+        assert resp.status_code == 404
+
+    def test_raw_unauthenticated_returns_401(self, client):
+        """A GET /raw without a valid token returns 401."""
+        resp = client.get(
+            "/fragments/block1/0/raw", headers={"Authorization": "Bearer wrong-token"}
+        )
+        assert resp.status_code == 401
+
+
+class TestFragmentCache:
+    """GET responses served from the server's fragment cache."""
+
+    def test_repeated_get_hits_cache(self, client, valid_store_body):
+        """The second GET for a fragment is a cache hit with the same body."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+
+        first = client.get("/fragments/block1/0")
+        second = client.get("/fragments/block1/0")
+
+        assert first.json() == second.json()
+        cache = client.get("/metrics").json()["cache"]
+        assert cache["hits"] == 1
+        assert cache["misses"] == 1
+        assert cache["entries"] == 1
+
+    def test_delete_invalidates_cache(self, client, valid_store_body):
+        """A GET after DELETE does not return the cached fragment."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+        client.get("/fragments/block1/0")
+
+        client.delete("/fragments/block1/0")
+
+        assert client.get("/fragments/block1/0").status_code == 404
+        assert client.get("/metrics").json()["cache"]["entries"] == 0
+
+    def test_replacement_after_delete_is_served(self, client, valid_store_body):
+        """A fragment stored again after a delete is not shadowed by the cache."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+        client.get("/fragments/block1/0")
+        client.delete("/fragments/block1/0")
+
+        client.put("/fragments/block1/0", json=valid_store_body, headers={"X-Durability": "none"})
+
+        assert client.get("/fragments/block1/0").json()["durability"] == "none"
+
+    def test_metrics_requires_token(self, client):
+        """GET /metrics without a valid token returns 401."""
+        resp = client.get("/metrics", headers={"Authorization": "Bearer wrong-token"})
+        assert resp.status_code == 401
+
+    def test_metrics_report_scrubber(self, client, valid_store_body):
+        """Scrubber counters appear in /metrics only when scrubbing is enabled."""
+        assert client.get("/metrics").json()["scrubber"] is None
+
+        test_root = Path("data/test_runs") / str(uuid.uuid4())
+        test_root.mkdir(parents=True, exist_ok=False)
+        try:
+            app = create_app(server_id=1, data_dir=str(test_root), token=_TOKEN, scrub_interval=0.01)
+            scrubbing = TestClient(app, headers={"Authorization": f"Bearer {_TOKEN}"})
+            scrubbing.put("/fragments/block1/0", json=valid_store_body)
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                scrubber = scrubbing.get("/metrics").json()["scrubber"]
+                if scrubber["fragments"]:
+                    break
+                time.sleep(0.01)
+            assert scrubber["fragments"] >= 1
+            assert scrubber["invalid"] == 0
+            app.state.scrubber.stop()
+        finally:
+            shutil.rmtree(test_root, ignore_errors=True)
+
+
 class TestDeleteFragment:
     """Tests for DELETE /fragments/{block_id}/{index}."""
 
@@ -305,6 +590,76 @@ class TestDeleteFragment:
         assert resp.status_code == 401
 
 
+class TestListBlocks:
+    """Tests for GET /blocks."""
+
+    def test_pages_follow_cursor(self, client, valid_store_body):
+        """next_after walks every block once and is null on the last page."""
+        for block_id in ("b1", "a1", "b2"):
+            client.put(f"/fragments/{block_id}/0", json=valid_store_body)
+
+        first = client.get("/blocks", params={"limit": 2}).json()
+        assert first["blocks"] == [{"block_id": "a1", "indices": [0]}, {"block_id": "b1", "indices": [0]}]
+        assert first["next_after"] == "b1"
+
+        second = client.get("/blocks", params={"limit": 2, "after": first["next_after"]}).json()
+        assert second == {"blocks": [{"block_id": "b2", "indices": [0]}], "next_after": None}
+
+    def test_prefix_filter(self, client, valid_store_body):
+        """Only blocks whose id starts with prefix are listed."""
+        for block_id in ("b1", "a1", "b2"):
+            client.put(f"/fragments/{block_id}/0", json=valid_store_body)
+        resp = client.get("/blocks", params={"prefix": "b"})
+        assert [b["block_id"] for b in resp.json()["blocks"]] == ["b1", "b2"]
+
+    def test_limit_is_bounded(self, client):
+        """A limit outside 1..MAX_BLOCK_PAGE_SIZE is rejected with 422."""
+        assert client.get("/blocks", params={"limit": 0}).status_code == 422
+        assert client.get("/blocks", params={"limit": 10_001}).status_code == 422
+
+    def test_requires_token(self, client):
+        """GET /blocks without a valid token returns 401."""
+        resp = client.get("/blocks", headers={"Authorization": "Bearer wrong-token"})
+        assert resp.status_code == 401
+
+
+class TestBlockCatalog:
+    """The per-block metadata catalog follows PUT and DELETE."""
+
+    def test_put_and_delete_update_catalog(self, client, valid_store_body):
+        """A stored fragment is catalogued; deleting the last one drops the block."""
+        catalog = client.app.state.catalog
+        client.put("/fragments/block1/0", json=valid_store_body)
+
+        meta = catalog.get("block1")
+        assert meta.stored_indices == [0]
+        assert (meta.total_n, meta.threshold_m) == (5, 3)
+        assert meta.fpcc == valid_store_body["fpcc_json"]
+
+        client.delete("/fragments/block1/0")
+        assert catalog.block_count() == 0
+
+    def test_rejected_put_leaves_catalog_alone(self, client, valid_store_body):
+        """A conflicting PUT (409) does not touch the catalog."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+        conflicting = dict(valid_store_body, original_length=valid_store_body["original_length"] + 1)
+        assert client.put("/fragments/block1/0", json=conflicting).status_code == 409
+        assert client.app.state.catalog.get("block1").original_length == valid_store_body["original_length"]
+
+    def test_invalid_put_is_catalogued_as_unverified(self, client, valid_store_body):
+        """A fragment stored INVALID (422) is catalogued, and its block never counts as verified."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+        tampered = dict(valid_store_body, fragment_data=base64.b64encode(b"garbage").decode())
+        assert client.put("/fragments/block1/1", json=tampered).status_code == 422
+
+        catalog = client.app.state.catalog
+        meta = catalog.get("block1")
+        assert meta.stored_indices == [0, 1]
+        assert meta.last_verified_at is None
+        assert catalog.fragment_count() == client.get("/health").json()["fragment_count"]
+        assert [m.block_id for m in catalog.verified_before(datetime.utcnow())] == ["block1"]
+
+
 class TestHealthEndpoint:
     """Tests for GET /health."""
 
@@ -320,6 +675,19 @@ class TestHealthEndpoint:
         resp = client.get("/health", headers={"Authorization": ""})
         assert resp.status_code == 200
 
+    def test_health_reports_storage_usage(self, client, valid_store_body):
+        """GET /health reports byte totals per status and free disk space."""
+        client.put("/fragments/block1/0", json=valid_store_body)
+        storage = client.get("/health").json()["storage"]
+
+        payload = len(base64.b64decode(valid_store_body["fragment_data"]))
+        assert storage["fragments"] == 1
+        assert storage["payload_bytes"] == payload
+        assert storage["disk_bytes"] > payload
+        assert storage["invalid_fragments"] == 0
+        assert storage["by_status"]["valid"]["fragments"] == 1
+        assert storage["disk_free_bytes"] > 0
+
 
 class TestRateLimiting:
     """Tests for per-client request rate limiting."""
@@ -0,0 +1,123 @@
+from collections.abc import Iterator
+import pytest
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from src.storage.backend import StorageBackend
+from src.storage.fragment import FragmentRecord, VerificationStatus
+from src.storage.memory_store import MemoryStore
+from src.storage.segment_store import SegmentStore
+from src.storage.sqlite_store import SQLiteStore
+from src.storage.store import FragmentNotFoundError, FragmentStore
+
+BACKENDS = {
+    "filesystem": FragmentStore,
+    "segment": SegmentStore,
+    "sqlite": SQLiteStore,
+    "memory": lambda path: MemoryStore(),
+}
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request) -> Iterator[StorageBackend]:
+    """Provide each storage backend in a fresh temporary directory."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+    store = BACKENDS[request.param](test_root / "store")
+    try:
+        yield store
+    finally:
+        store.close()
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def make_record(block_id: str, index: int, data: bytes = b"payload") -> FragmentRecord:
+    return FragmentRecord(
+        index=index,
+        data=data,
+        block_id=block_id,
+        total_n=5,
+        threshold_m=3,
+        original_length=3 * len(data),
+    )
+
+
+class TestStorageBackendContract:
+    """Behaviour every StorageBackend shares."""
+
+    def test_implements_protocol(self, backend: StorageBackend):
+        """Each backend satisfies the StorageBackend protocol."""
+        assert isinstance(backend, StorageBackend)
+
+    def test_put_get_round_trip(self, backend: StorageBackend):
+        """get(), open_view() and get_metadata() agree with what was put()."""
+        record = make_record("blk", 1, b"\x00\x01" * 50)
+        backend.put(record)
+        assert backend.get("blk", 1) == record
+        with backend.open_view("blk", 1) as view:
+            assert bytes(view.data) == record.data
+        header = backend.get_metadata("blk", 1)
+        assert header.data_length == 100
+        assert header.data_sha256 == record.content_hash()
+
+    def test_overwrite_keeps_one_copy(self, backend: StorageBackend):
+        """A second put() for the same key replaces the first."""
+        backend.put(make_record("blk", 0, b"old"))
+        backend.put(make_record("blk", 0, b"new"))
+        assert backend.get("blk", 0).data == b"new"
+        assert backend.fragment_count() == 1
+
+    def test_listing(self, backend: StorageBackend):
+        """list_indices(), list_fragments() and list_metadata() are sorted by index."""
+        for i in (2, 0, 1):
+            backend.put(make_record("blk", i))
+        backend.put(make_record("other", 0))
+        assert backend.list_indices("blk") == [0, 1, 2]
+        assert [r.index for r in backend.list_fragments("blk")] == [0, 1, 2]
+        assert [h.index for h in backend.list_metadata("blk")] == [0, 1, 2]
+        assert backend.fragment_count() == 4
+        assert backend.list_indices("missing") == []
+
+    def test_list_blocks_page(self, backend: StorageBackend):
+        """Block pages follow block_id order, honour prefix and resume after the cursor."""
+        for block_id in ("b-2", "a-1", "b-1", "c-1", "b-3"):
+            backend.put(make_record(block_id, 0))
+        backend.put(make_record("b-1", 4))
+        backend.delete("b-3", 0)
+
+        assert backend.list_blocks() == ["a-1", "b-1", "b-2", "c-1"]
+        assert backend.list_blocks_page(prefix="b-") == [("b-1", [0, 4]), ("b-2", [0])]
+        assert backend.list_blocks_page(after="a-1", limit=2) == [("b-1", [0, 4]), ("b-2", [0])]
+        assert backend.list_blocks_page(prefix="b-", after="b-1") == [("b-2", [0])]
+        assert backend.list_blocks_page(after="c-1") == []
+
+    def test_delete(self, backend: StorageBackend):
+        """delete() removes the fragment; deleting it again raises."""
+        backend.put(make_record("blk", 0))
+        backend.delete("blk", 0)
+        assert not backend.has("blk", 0)
+        assert backend.list_indices("blk") == []
+        with pytest.raises(FragmentNotFoundError):
+            backend.delete("blk", 0)
+
+    def test_set_verification_patches_header_only(self, backend: StorageBackend):
+        """set_verification() updates status and verified_at and leaves the rest alone."""
+        record = make_record("blk", 0, b"\x07" * 64)
+        backend.put(record)
+        verified_at = datetime(2026, 1, 2, 3, 4, 5)
+        backend.set_verification("blk", 0, VerificationStatus.INVALID, verified_at)
+
+        header = backend.get_metadata("blk", 0)
+        assert header.verification_status is VerificationStatus.INVALID
+        assert header.verified_at == verified_at
+        assert backend.get("blk", 0).data == record.data
+        assert backend.fragment_count() == 1
+        with pytest.raises(FragmentNotFoundError):
+            backend.set_verification("blk", 9, VerificationStatus.VALID, verified_at)
+
+    def test_missing_fragment_raises(self, backend: StorageBackend):
+        """Reads of unknown keys raise FragmentNotFoundError."""
+        for read in (backend.get, backend.open_view, backend.get_metadata):
+            with pytest.raises(FragmentNotFoundError):
+                read("blk", 9)
@@ -0,0 +1,210 @@
+from collections.abc import Iterator
+import pytest
+import shutil
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+from src.storage.catalog import CATALOG_NAME, BlockCatalog
+from src.storage.fragment import FragmentRecord, RecordHeader, VerificationStatus
+from src.storage.store import FragmentNotFoundError, FragmentStore
+
+
+@pytest.fixture
+def store() -> Iterator[FragmentStore]:
+    """Provide a fresh FragmentStore in a temporary directory."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+
+    try:
+        yield FragmentStore(test_root / "fragments")
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def make_record(
+    block_id: str,
+    index: int,
+    received_at: datetime = datetime(2024, 1, 1),
+    verified_at: datetime | None = None,
+    status: VerificationStatus = VerificationStatus.VALID,
+) -> FragmentRecord:
+    return FragmentRecord(
+        index=index,
+        data=b"catalogued",
+        block_id=block_id,
+        total_n=5,
+        threshold_m=3,
+        original_length=30,
+        received_at=received_at,
+        verification_status=status,
+        fpcc_json='{"hashes": []}',
+        verified_at=verified_at,
+    )
+
+
+def put(store: FragmentStore, catalog: BlockCatalog, record: FragmentRecord) -> None:
+    store.put(record)
+    catalog.record_fragment(store.get_metadata(record.block_id, record.index))
+
+
+class TestBlockCatalogUpdates:
+    """Keeping ObjectMetadata in step with fragment writes."""
+
+    def test_fragments_build_up_block_metadata(self, store: FragmentStore):
+        """Each stored fragment adds its index; n, m and fpcc come from the record."""
+        catalog = BlockCatalog(":memory:")
+        put(store, catalog, make_record("blk", 2))
+        put(store, catalog, make_record("blk", 0))
+
+        meta = catalog.get("blk")
+        assert meta.stored_indices == [0, 2]
+        assert (meta.total_n, meta.threshold_m, meta.original_length) == (5, 3, 30)
+        assert meta.fpcc == '{"hashes": []}'
+        assert meta.created_at == datetime(2024, 1, 1)
+
+    def test_last_fragment_removed_drops_block(self):
+        """A block disappears from the catalog with its last fragment."""
+        catalog = BlockCatalog(":memory:")
+        catalog.record_fragment(RecordHeader.from_record(make_record("blk", 0)))
+        catalog.record_fragment(RecordHeader.from_record(make_record("blk", 1)))
+        catalog.remove_fragment("blk", 0)
+        assert catalog.get("blk").stored_indices == [1]
+        catalog.remove_fragment("blk", 1)
+
+        with pytest.raises(FragmentNotFoundError):
+            catalog.get("blk")
+        assert catalog.block_count() == 0
+
+    def test_last_verified_is_the_oldest_fragment(self):
+        """A block counts as verified when its least recently verified fragment was."""
+        catalog = BlockCatalog(":memory:")
+        catalog.record_fragment(RecordHeader.from_record(make_record("blk", 0, verified_at=datetime(2024, 3, 1))))
+        catalog.record_fragment(RecordHeader.from_record(make_record("blk", 1)))
+        assert catalog.get("blk").last_verified_at is None
+
+        catalog.set_verification("blk", 1, VerificationStatus.VALID, datetime(2024, 2, 1))
+        assert catalog.get("blk").last_verified_at == datetime(2024, 2, 1)
+
+    def test_invalid_fragment_leaves_block_unverified(self):
+        """A fragment found INVALID, on PUT or by a scrub, counts as never verified."""
+        catalog = BlockCatalog(":memory:")
+        catalog.record_fragment(RecordHeader.from_record(make_record("blk", 0, verified_at=datetime(2024, 3, 1))))
+        bad = make_record("blk", 1, verified_at=datetime(2024, 3, 1), status=VerificationStatus.INVALID)
+        catalog.record_fragment(RecordHeader.from_record(bad))
+        assert catalog.get("blk").last_verified_at is None
+
+        catalog.set_verification("blk", 1, VerificationStatus.VALID, datetime(2024, 4, 1))
+        assert catalog.get("blk").last_verified_at == datetime(2024, 3, 1)
+        catalog.set_verification("blk", 0, VerificationStatus.INVALID, datetime(2024, 5, 1))
+        assert catalog.get("blk").last_verified_at is None
+        assert [m.block_id for m in catalog.verified_before(datetime(2024, 1, 1))] == ["blk"]
+
+    def test_set_verification_ignores_unknown_fragments(self):
+        """set_verification() never adds a fragment the catalog does not hold."""
+        catalog = BlockCatalog(":memory:")
+        catalog.set_verification("gone", 0, VerificationStatus.VALID)
+        assert catalog.fragment_count() == 0
+
+
+class TestBlockCatalogQueries:
+    """Range queries served by the created_at and last_verified_at indexes."""
+
+    def test_created_between(self):
+        """Blocks come back oldest first, within [start, end)."""
+        catalog = BlockCatalog(":memory:")
+        for day in (1, 5, 3, 9):
+            catalog.record_fragment(RecordHeader.from_record(make_record(f"b{day}", 0, datetime(2024, 1, day))))
+
+        found = catalog.created_between(datetime(2024, 1, 2), datetime(2024, 1, 9))
+        assert [m.block_id for m in found] == ["b3", "b5"]
+
+    def test_verified_before(self):
+        """Never-verified blocks first, then the least recently verified."""
+        catalog = BlockCatalog(":memory:")
+        catalog.record_fragment(RecordHeader.from_record(make_record("new", 0, verified_at=datetime(2024, 6, 1))))
+        catalog.record_fragment(RecordHeader.from_record(make_record("old", 0, verified_at=datetime(2024, 1, 1))))
+        catalog.record_fragment(RecordHeader.from_record(make_record("older", 0, verified_at=datetime(2023, 1, 1))))
+        catalog.record_fragment(RecordHeader.from_record(make_record("never", 0)))
+
+        found = catalog.verified_before(datetime(2024, 3, 1))
+        assert [m.block_id for m in found] == ["never", "older", "old"]
+        assert len(catalog.verified_before(datetime(2024, 3, 1), limit=1)) == 1
+
+
+class TestBlockCatalogPersistence:
+    """Reopening and recovering from a catalog that fell behind."""
+
+    def test_reopen_keeps_contents(self, store: FragmentStore):
+        """A catalog that matches the store is reused as is."""
+        path = store.base_dir / CATALOG_NAME
+        catalog = BlockCatalog(path, store)
+        put(store, catalog, make_record("blk", 0))
+        catalog.close()
+
+        reopened = BlockCatalog(path, store)
+        assert reopened.get("blk").stored_indices == [0]
+
+    def test_stale_catalog_is_rebuilt_from_store(self, store: FragmentStore):
+        """Fragments written while the catalog was not updated are picked up on open."""
+        path = store.base_dir / CATALOG_NAME
+        BlockCatalog(path, store).close()
+        store.put(make_record("missed", 0, verified_at=datetime(2024, 2, 1)))
+        store.put(make_record("missed", 3, verified_at=datetime(2024, 4, 1)))
+
+        catalog = BlockCatalog(path, store)
+        meta = catalog.get("missed")
+        assert meta.stored_indices == [0, 3]
+        assert meta.last_verified_at == datetime(2024, 2, 1)
+        assert catalog.created_between(datetime(2023, 1, 1), datetime(2025, 1, 1)) == [meta]
+
+    def test_interrupted_write_is_refreshed_on_open(self, store: FragmentStore):
+        """A fragment marked pending when the server stopped is re-read from the store."""
+        path = store.base_dir / CATALOG_NAME
+        catalog = BlockCatalog(path, store)
+        put(store, catalog, make_record("blk", 0))
+        catalog.begin_update("blk", 0)
+        # Crash after the fragment write, before the catalog update; counts still match.
+        store.put(make_record("blk", 0, verified_at=datetime(2024, 5, 1)))
+        catalog.begin_update("blk", 1)  # crash before the fragment was written
+        catalog.close()
+
+        reopened = BlockCatalog(path, store)
+        assert reopened.get("blk").stored_indices == [0]
+        assert reopened.get("blk").last_verified_at == datetime(2024, 5, 1)
+        with reopened._lock:
+            assert reopened._conn.execute("SELECT COUNT(*) FROM pending_fragments").fetchone()[0] == 0
+
+    def test_status_divergence_triggers_rebuild(self, store: FragmentStore):
+        """A scrub result the catalog missed is caught by the per-status counts."""
+        path = store.base_dir / CATALOG_NAME
+        catalog = BlockCatalog(path, store)
+        put(store, catalog, make_record("blk", 0, verified_at=datetime(2024, 2, 1)))
+        catalog.close()
+        store.set_verification("blk", 0, VerificationStatus.INVALID, datetime(2024, 3, 1))
+
+        reopened = BlockCatalog(path, store)
+        assert reopened.get("blk").last_verified_at is None
+        assert reopened.verified_before(datetime(2024, 1, 1))[0].block_id == "blk"
+
+    def test_catalog_file_is_not_a_block(self, store: FragmentStore):
+        """The catalog sitting in the store directory does not show up as a block."""
+        BlockCatalog(store.base_dir / CATALOG_NAME, store)
+        store.put(make_record("blk", 0))
+        assert FragmentStore(store.base_dir, shard_levels=0).list_blocks() == ["blk"]
+
+    def test_older_schema_is_rebuilt(self, store: FragmentStore):
+        """A catalog written with an older schema is dropped and rebuilt from the store."""
+        path = store.base_dir / CATALOG_NAME
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            "CREATE TABLE block_fragments (block_id TEXT, idx INTEGER, verified_at INTEGER, "
+            "PRIMARY KEY (block_id, idx)) WITHOUT ROWID;"
+            "INSERT INTO block_fragments VALUES ('blk', 0, NULL);"
+        )
+        conn.close()
+        store.put(make_record("blk", 0, status=VerificationStatus.INVALID))
+
+        catalog = BlockCatalog(path, store)
+        assert catalog.get("blk").stored_indices == [0]
+        assert catalog.get("blk").last_verified_at is None
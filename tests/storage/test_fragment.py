@@ -1,6 +1,18 @@
 import base64
+import hashlib
+import json
 from datetime import datetime
-from src.storage.fragment import FragmentRecord, VerificationStatus
+
+import pytest
+
+from src.storage.fragment import (
+    Durability,
+    FragmentRecord,
+    RecordHeader,
+    VerificationStatus,
+    attach_data,
+    is_reference_record,
+)
 
 
 class TestFragmentRecordRoundTrip:
@@ -59,3 +71,193 @@ class TestFragmentRecordRoundTrip:
         )
         restored = FragmentRecord.from_dict(record.to_dict())
         assert restored.received_at == record.received_at
+
+
+class TestFragmentRecordBinary:
+    """Binary on-disk format (to_bytes / from_bytes)."""
+
+    def test_to_bytes_and_back(self):
+        """from_bytes(to_bytes(r)) == r for a fully populated record."""
+        record = FragmentRecord(
+            index=3,
+            data=b"\x00\x01\xfe\xff" * 8,
+            block_id="binary-block",
+            total_n=5,
+            threshold_m=3,
+            original_length=90,
+            received_at=datetime(2025, 1, 1, 12, 0, 0, 123456),
+            verification_status=VerificationStatus.VALID,
+            fpcc_digest="ab" * 32,
+            fpcc_json='{"hashes": []}',
+            verified_at=datetime(2025, 1, 2, 8, 30),
+        )
+        assert FragmentRecord.from_bytes(record.to_bytes()) == record
+
+    def test_optional_fields_round_trip_as_none(self):
+        """Missing fpcc_digest, fpcc_json and verified_at stay None."""
+        record = FragmentRecord(
+            index=0,
+            data=b"payload",
+            block_id="id",
+            total_n=5,
+            threshold_m=3,
+            original_length=7,
+        )
+        restored = FragmentRecord.from_bytes(record.to_bytes())
+        assert restored.fpcc_digest is None
+        assert restored.fpcc_json is None
+        assert restored.verified_at is None
+
+    def test_binary_is_smaller_than_json(self):
+        """The binary record avoids base64 and JSON key overhead."""
+        record = FragmentRecord(
+            index=0,
+            data=bytes(range(256)) * 16,
+            block_id="size-block",
+            total_n=5,
+            threshold_m=3,
+            original_length=10000,
+        )
+        assert len(record.to_bytes()) < len(json.dumps(record.to_dict()))
+
+    def test_bad_magic_raises(self):
+        """from_bytes() rejects data that is not a fragment record."""
+        with pytest.raises(ValueError):
+            FragmentRecord.from_bytes(b"not a fragment record at all, really")
+
+    def test_truncated_record_raises(self):
+        """from_bytes() rejects a record cut short."""
+        record = FragmentRecord(
+            index=0,
+            data=b"payload",
+            block_id="id",
+            total_n=5,
+            threshold_m=3,
+            original_length=7,
+        )
+        with pytest.raises(ValueError):
+            FragmentRecord.from_bytes(record.to_bytes()[:-1])
+
+    def test_verified_at_in_dict(self):
+        """verified_at survives to_dict / from_dict too."""
+        record = FragmentRecord(
+            index=1,
+            data=b"x",
+            block_id="id",
+            total_n=5,
+            threshold_m=3,
+            original_length=1,
+            verified_at=datetime(2025, 3, 1),
+        )
+        assert FragmentRecord.from_dict(record.to_dict()).verified_at == record.verified_at
+
+
+class TestFragmentRecordDurability:
+    """The durability level a record was written with."""
+
+    def test_defaults_to_fsync(self):
+        """Records are FSYNC unless stated otherwise."""
+        record = FragmentRecord(
+            index=0, data=b"x", block_id="id", total_n=5, threshold_m=3, original_length=1
+        )
+        assert record.durability == Durability.FSYNC
+
+    def test_round_trips_in_both_formats(self):
+        """durability survives to_bytes/from_bytes and to_dict/from_dict."""
+        for level in Durability:
+            record = FragmentRecord(
+                index=0,
+                data=b"x",
+                block_id="id",
+                total_n=5,
+                threshold_m=3,
+                original_length=1,
+                durability=level,
+            )
+            assert FragmentRecord.from_bytes(record.to_bytes()).durability == level
+            assert FragmentRecord.from_dict(record.to_dict()).durability == level
+
+    def test_legacy_dict_reads_as_fsync(self):
+        """Dicts written before durability existed read back as FSYNC."""
+        record = FragmentRecord(
+            index=0, data=b"x", block_id="id", total_n=5, threshold_m=3, original_length=1
+        )
+        data = record.to_dict()
+        del data["durability"]
+        assert FragmentRecord.from_dict(data).durability == Durability.FSYNC
+
+
+class TestFragmentRecordContentHash:
+    """The SHA-256 of the fragment bytes stored alongside them."""
+
+    def _record(self) -> FragmentRecord:
+        return FragmentRecord(
+            index=1, data=b"hash me" * 100, block_id="id", total_n=5, threshold_m=3, original_length=700
+        )
+
+    def test_hash_is_written_and_read_back(self):
+        """to_bytes() stores the data hash and from_bytes() restores it."""
+        record = self._record()
+        restored = FragmentRecord.from_bytes(record.to_bytes())
+        assert restored.data_sha256 == hashlib.sha256(record.data).digest()
+        assert FragmentRecord.from_dict(record.to_dict()).data_sha256 == restored.data_sha256
+
+    def test_header_read_skips_the_payload(self):
+        """RecordHeader.read() decodes metadata without touching the data bytes."""
+        record = self._record()
+        raw = record.to_bytes()
+        reads: list[tuple[int, int]] = []
+
+        def read_at(offset: int, size: int) -> bytes:
+            reads.append((offset, size))
+            return raw[offset : offset + size]
+
+        header = RecordHeader.read(read_at)
+        assert header.block_id == record.block_id
+        assert header.data_sha256 == record.content_hash()
+        assert header.data_length == len(record.data)
+        assert sum(size for _, size in reads) == len(raw) - len(record.data)
+
+    def test_records_without_hash_are_readable(self):
+        """Records written before the hash existed read back with no hash."""
+        record = self._record()
+        raw = bytearray(record.to_bytes())
+        header = RecordHeader.unpack(raw)
+        # Drop the flag and the 32 hash bytes in front of the data.
+        raw[7] &= ~0x20  # low byte of the big-endian flags field
+        del raw[header.payload_offset - 32 : header.payload_offset]
+
+        restored = FragmentRecord.from_bytes(bytes(raw))
+        assert restored == record
+        assert RecordHeader.unpack(bytes(raw)).data_sha256 is None
+
+
+class TestFragmentRecordReference:
+    """Records whose data is stored elsewhere, keyed by its hash (dedup)."""
+
+    def _record(self) -> FragmentRecord:
+        return FragmentRecord(
+            index=2, data=b"shared" * 50, block_id="id", total_n=5, threshold_m=3, original_length=900
+        )
+
+    def test_reference_round_trip(self):
+        """A reference record plus its data gives back the full record."""
+        record = self._record()
+        reference = record.to_reference_bytes()
+        assert is_reference_record(reference)
+        assert not is_reference_record(record.to_bytes())
+        assert len(reference) == len(record.to_bytes()) - len(record.data)
+
+        header = RecordHeader.unpack(reference)
+        assert header.is_reference
+        assert header.data_length == len(record.data)
+        assert header.data_sha256 == record.content_hash()
+        assert FragmentRecord.from_bytes(attach_data(reference, record.data)) == record
+
+    def test_reference_needs_its_data(self):
+        """from_bytes() rejects a bare reference; attach_data() rejects the wrong data."""
+        reference = self._record().to_reference_bytes()
+        with pytest.raises(ValueError):
+            FragmentRecord.from_bytes(reference)
+        with pytest.raises(ValueError):
+            attach_data(reference, b"short")
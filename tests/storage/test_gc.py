@@ -0,0 +1,210 @@
+from collections.abc import Iterator
+import os
+import pytest
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from src.storage.fragment import FragmentRecord, VerificationStatus
+from src.storage.gc import GarbageCollector
+from src.storage.memory_store import MemoryStore
+from src.storage.store import FragmentStore
+
+
+@pytest.fixture
+def store() -> Iterator[FragmentStore]:
+    """Provide a fresh FragmentStore in a temporary directory."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+
+    try:
+        yield FragmentStore(test_root / "fragments")
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def make_record(
+    block_id: str,
+    index: int = 0,
+    status: VerificationStatus = VerificationStatus.VALID,
+    age: timedelta = timedelta(0),
+) -> FragmentRecord:
+    return FragmentRecord(
+        index=index,
+        data=b"payload",
+        block_id=block_id,
+        total_n=5,
+        threshold_m=3,
+        original_length=21,
+        verification_status=status,
+        verified_at=datetime.utcnow() - age,
+    )
+
+
+def backdate(path: Path, seconds: float) -> None:
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+class TestInvalidRetention:
+    """INVALID fragments expire after the retention period."""
+
+    def test_only_expired_invalid_fragments_are_deleted(self, store: FragmentStore):
+        """Old INVALID records go; recent INVALID and all VALID records stay."""
+        store.put(make_record("old-bad", status=VerificationStatus.INVALID, age=timedelta(days=8)))
+        store.put(make_record("new-bad", status=VerificationStatus.INVALID, age=timedelta(hours=1)))
+        store.put(make_record("old-good", age=timedelta(days=30)))
+        deleted: list[tuple[str, int]] = []
+
+        gc = GarbageCollector(
+            store, invalid_retention=timedelta(days=7).total_seconds(), on_delete=lambda b, i: deleted.append((b, i))
+        )
+        gc.run_pass()
+
+        assert not store.has("old-bad", 0)
+        assert store.has("new-bad", 0)
+        assert store.has("old-good", 0)
+        assert deleted == [("old-bad", 0)]
+        assert gc.stats().invalid_removed == 1
+
+    def test_deletes_under_fragment_lock(self, store: FragmentStore):
+        """Expired fragments are deleted while holding lock_for(block_id, index)."""
+        store.put(make_record("bad", index=2, status=VerificationStatus.INVALID, age=timedelta(days=1)))
+        locked: list[tuple[str, int]] = []
+
+        class Lock:
+            def __init__(self, key):
+                self.key = key
+
+            def __enter__(self):
+                locked.append(self.key)
+
+            def __exit__(self, *exc_info):
+                return False
+
+        GarbageCollector(store, lock_for=lambda b, i: Lock((b, i)), invalid_retention=60).run_pass()
+        assert locked == [("bad", 2)]
+        assert not store.has("bad", 2)
+
+    def test_other_backends(self):
+        """Backends without block directories are collected too."""
+        store = MemoryStore()
+        store.put(make_record("bad", status=VerificationStatus.INVALID, age=timedelta(days=1)))
+        store.put(make_record("good"))
+        GarbageCollector(store, invalid_retention=60).run_pass()
+        assert store.list_blocks() == ["good"]
+
+
+class TestTempFilesAndDirectories:
+    """Leftovers of interrupted writes."""
+
+    def test_stale_temp_files_are_removed(self, store: FragmentStore):
+        """Temp files from before the collector started go; a fresh one stays."""
+        store.put(make_record("blk"))
+        block_dir = store.block_dir("blk")
+        stale = block_dir / "fragment_1.bin.deadbeef.tmp"
+        stale.write_bytes(b"partial")
+        backdate(stale, 5)
+        stale_snapshot = store.base_dir / ".index" / "index.snapshot.x.tmp"
+        stale_snapshot.write_bytes(b"partial")
+        backdate(stale_snapshot, 5)
+
+        gc = GarbageCollector(store)
+        fresh = block_dir / "fragment_2.bin.cafe.tmp"
+        fresh.write_bytes(b"in flight")
+        gc.run_pass()
+
+        assert not stale.exists()
+        assert not stale_snapshot.exists()
+        assert fresh.exists()
+        assert (block_dir / "fragment_0.bin").exists()
+        assert gc.stats().temp_files_removed == 2
+
+    def test_temp_files_older_than_max_age_are_removed(self, store: FragmentStore):
+        """A temp file created after startup still goes once it exceeds tmp_max_age."""
+        gc = GarbageCollector(store, tmp_max_age=60)
+        store.put(make_record("blk"))
+        tmp = store.block_dir("blk") / "fragment_0.bin.abc.tmp"
+        tmp.write_bytes(b"partial")
+        os.utime(tmp, (time.time() + 10 - 120, time.time() + 10 - 120))
+        gc._started_at = time.time() - 3600  # started long ago
+        gc.run_pass()
+        assert not tmp.exists()
+
+    def test_idle_empty_block_directory_is_removed(self, store: FragmentStore):
+        """An empty block directory nobody touched since startup is removed."""
+        orphan = store.block_dir("orphan")
+        orphan.mkdir(parents=True)
+        backdate(orphan, 5)
+        recent = store.block_dir("recent")
+
+        gc = GarbageCollector(store)
+        recent.mkdir(parents=True)
+        gc.run_pass()
+
+        assert not orphan.exists()
+        assert recent.exists()
+        assert gc.stats().block_dirs_removed == 1
+
+    def test_unreferenced_dedup_objects_are_removed(self, store: FragmentStore):
+        """Objects and links left by interrupted dedup puts go; shared data stays."""
+        dedup = FragmentStore(store.base_dir, dedup=True)
+        record = make_record("blk")
+        dedup.put(record)
+        kept = dedup.object_path(record.content_hash())
+
+        orphan = dedup.object_path(b"\x01" * 32)
+        orphan.parent.mkdir(parents=True)
+        orphan.write_bytes(b"never referenced")
+        backdate(orphan, 5)
+        stale = dedup.object_path(b"\x02" * 32)
+        stale.parent.mkdir(parents=True)
+        stale.write_bytes(b"linked, record never written")
+        link = dedup.block_dir("blk") / f"fragment_0.{'02' * 32}.ref"
+        os.link(stale, link)
+
+        gc = GarbageCollector(dedup)
+        gc.run_pass()
+
+        assert not orphan.exists()
+        assert not stale.exists()
+        assert not link.exists()
+        assert kept.exists()
+        assert dedup.get("blk", 0) == record
+        assert gc.stats().objects_removed == 2
+
+
+class TestIncrementalWork:
+    """Passes are split into bounded ticks."""
+
+    def test_ticks_are_bounded(self, store: FragmentStore):
+        """With max_work_per_tick=3, a 10-fragment pass takes several ticks."""
+        for i in range(10):
+            store.put(make_record(f"blk-{i}", status=VerificationStatus.INVALID, age=timedelta(days=1)))
+        gc = GarbageCollector(store, invalid_retention=60, max_work_per_tick=3)
+
+        ticks = 1
+        while not gc.run_tick():
+            ticks += 1
+        assert ticks >= 4
+        assert store.fragment_count() == 0
+        assert gc.stats().passes == 1
+
+    def test_background_thread_stops(self, store: FragmentStore):
+        """start() runs ticks on a thread that stop() ends promptly."""
+        store.put(make_record("bad", status=VerificationStatus.INVALID, age=timedelta(days=1)))
+        gc = GarbageCollector(store, invalid_retention=60, interval=60)
+        gc.start()
+        deadline = time.monotonic() + 5
+        while gc.stats().passes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        gc.stop()
+        assert not store.has("bad", 0)
+
+    def test_invalid_settings_raise(self, store: FragmentStore):
+        """Negative retention or a zero work budget is rejected."""
+        with pytest.raises(ValueError):
+            GarbageCollector(store, invalid_retention=-1)
+        with pytest.raises(ValueError):
+            GarbageCollector(store, max_work_per_tick=0)
@@ -0,0 +1,235 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from src.storage.fragment import Durability, FragmentRecord
+from src.storage.group_commit import BackgroundFlusher, GroupCommitter
+from src.storage.store import FragmentStore
+
+
+@pytest.fixture
+def test_dir() -> Iterator[Path]:
+    """Provide a fresh temporary directory."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+
+    try:
+        yield test_root
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def commit_file(committer: GroupCommitter, directory: Path, name: str) -> None:
+    """Write a temp file and publish it under `name` through the committer."""
+    tmp_path = directory / f"{name}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(name.encode())
+        f.flush()
+        committer.commit(f.fileno(), lambda: os.replace(tmp_path, directory / name), directory)
+
+
+class TestGroupCommitter:
+    """Batching of fsyncs across concurrent writers."""
+
+    def test_commit_publishes_before_returning(self, test_dir: Path):
+        """The published file exists once commit() returns."""
+        committer = GroupCommitter(window=0.0)
+        commit_file(committer, test_dir, "single")
+        assert (test_dir / "single").read_bytes() == b"single"
+        assert not (test_dir / "single.tmp").exists()
+
+    def test_concurrent_writers_share_batches(self, test_dir: Path):
+        """Writers arriving within one window are synced together."""
+        synced: list[int] = []
+        committer = GroupCommitter(window=0.05, on_batch_synced=lambda: synced.append(1))
+        threads = [
+            threading.Thread(target=commit_file, args=(committer, test_dir, f"file-{i}"))
+            for i in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert committer.writes == 16
+        assert committer.batches < 16
+        assert len(synced) == committer.batches
+        assert all((test_dir / f"file-{i}").exists() for i in range(16))
+
+    def test_max_batch_bounds_batch_size(self, test_dir: Path):
+        """No batch holds more than max_batch writes."""
+        committer = GroupCommitter(window=0.05, max_batch=4)
+        threads = [
+            threading.Thread(target=commit_file, args=(committer, test_dir, f"file-{i}"))
+            for i in range(12)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert committer.writes == 12
+        assert committer.batches >= 3
+
+    def test_publish_error_reaches_only_its_writer(self, test_dir: Path):
+        """A failing publish step raises in its own writer, not in the others."""
+        committer = GroupCommitter(window=0.05)
+        errors: list[BaseException] = []
+
+        def failing() -> None:
+            with open(test_dir / "bad.tmp", "wb") as f:
+                f.write(b"x")
+                f.flush()
+
+                def publish() -> None:
+                    raise OSError("rename failed")
+
+                try:
+                    committer.commit(f.fileno(), publish, test_dir)
+                except OSError as error:
+                    errors.append(error)
+
+        threads = [
+            threading.Thread(target=failing),
+            threading.Thread(target=commit_file, args=(committer, test_dir, "good")),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 1
+        assert (test_dir / "good").exists()
+
+    def test_invalid_parameters_raise(self):
+        """Negative windows and empty batches are rejected."""
+        with pytest.raises(ValueError):
+            GroupCommitter(window=-1.0)
+        with pytest.raises(ValueError):
+            GroupCommitter(max_batch=0)
+        with pytest.raises(ValueError):
+            GroupCommitter(sync_workers=0)
+
+    def test_batch_fsyncs_run_concurrently(self, test_dir: Path, monkeypatch):
+        """A batch's fsyncs overlap instead of running one after another."""
+        guard = threading.Lock()
+        active = [0]
+        peak = [0]
+        real_fsync = os.fsync
+
+        def slow_fsync(fd: int) -> None:
+            with guard:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            real_fsync(fd)
+            with guard:
+                active[0] -= 1
+
+        monkeypatch.setattr(os, "fsync", slow_fsync)
+        committer = GroupCommitter(window=0.1)
+        threads = [
+            threading.Thread(target=commit_file, args=(committer, test_dir, f"file-{i}"))
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert committer.batches < 4
+        assert peak[0] > 1
+
+
+class TestFragmentStoreGroupCommit:
+    """FragmentStore with group commit enabled."""
+
+    def test_concurrent_puts_are_stored_and_indexed(self, test_dir: Path):
+        """Every put is readable afterwards and survives a reopen."""
+        store = FragmentStore(test_dir / "fragments", group_commit_window=0.01)
+        records = [
+            FragmentRecord(
+                index=i % 5,
+                data=bytes([i % 256]) * 32,
+                block_id=f"block-{i // 5}",
+                total_n=5,
+                threshold_m=3,
+                original_length=96,
+            )
+            for i in range(40)
+        ]
+        threads = [threading.Thread(target=store.put, args=(r,)) for r in records]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(store.get(r.block_id, r.index) == r for r in records)
+        assert FragmentStore(test_dir / "fragments").fragment_count() == 40
+
+
+class TestBackgroundFlusher:
+    """Deferred fsyncs for Durability.BATCH writes."""
+
+    def test_flush_syncs_registered_files(self, test_dir: Path):
+        """flush() syncs each pending file once and calls on_flushed."""
+        flushed: list[int] = []
+        flusher = BackgroundFlusher(interval=60.0, on_flushed=lambda: flushed.append(1))
+        for name in ("a", "b"):
+            (test_dir / name).write_bytes(b"data")
+            flusher.add(test_dir / name)
+        flusher.add(test_dir / "a")
+
+        assert flusher.pending() == 2
+        assert flusher.flush() == 2
+        assert flusher.pending() == 0
+        assert flushed == [1]
+        flusher.close()
+
+    def test_flush_skips_deleted_files(self, test_dir: Path):
+        """Files removed before the flush are ignored."""
+        flusher = BackgroundFlusher(interval=60.0)
+        flusher.add(test_dir / "gone")
+        assert flusher.flush() == 0
+        flusher.close()
+
+
+class TestFragmentStoreDurability:
+    """Durability levels on FragmentStore.put."""
+
+    def _record(self, index: int, durability: Durability) -> FragmentRecord:
+        return FragmentRecord(
+            index=index,
+            data=b"payload",
+            block_id="durable",
+            total_n=5,
+            threshold_m=3,
+            original_length=21,
+            durability=durability,
+        )
+
+    def test_batch_put_is_flushed_later(self, test_dir: Path):
+        """A BATCH put is readable at once and queued for the background flush."""
+        store = FragmentStore(test_dir / "fragments", batch_flush_interval=60.0)
+        store.put(self._record(0, Durability.BATCH))
+
+        assert store.get("durable", 0).durability == Durability.BATCH
+        assert store._flusher.pending() == 1
+        store.close()
+        assert store._flusher.pending() == 0
+
+    def test_none_and_fsync_puts_are_not_queued(self, test_dir: Path):
+        """NONE and FSYNC puts leave nothing for the background flush."""
+        store = FragmentStore(test_dir / "fragments")
+        store.put(self._record(0, Durability.NONE))
+        store.put(self._record(1, Durability.FSYNC))
+
+        assert store._flusher.pending() == 0
+        assert store.get("durable", 0).durability == Durability.NONE
+        assert FragmentStore(test_dir / "fragments").list_indices("durable") == [0, 1]
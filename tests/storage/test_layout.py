@@ -0,0 +1,137 @@
+from collections.abc import Iterator
+import os
+import pytest
+import shutil
+import uuid
+from pathlib import Path
+from src.storage.fragment import FragmentRecord
+from src.storage.layout import (
+    LAYOUT_FILE_NAME,
+    STAGING_DIR_NAME,
+    list_block_dirs,
+    read_layout,
+    shard_parts,
+)
+from src.storage.store import FragmentStore
+
+
+@pytest.fixture
+def base_dir() -> Iterator[Path]:
+    """Provide a fresh temporary store directory."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+
+    try:
+        yield test_root / "fragments"
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def make_record(block_id: str, index: int = 0) -> FragmentRecord:
+    return FragmentRecord(
+        index=index,
+        data=f"{block_id}/{index}".encode(),
+        block_id=block_id,
+        total_n=5,
+        threshold_m=3,
+        original_length=30,
+    )
+
+
+# "ab" and "00" look like shard directory names in a flat store.
+BLOCK_IDS = ["ab", "00", "block-1", "block-2", "c0ffee"]
+
+
+class TestShardedLayout:
+    """Where block directories live."""
+
+    def test_shard_parts_are_stable_hex_prefixes(self):
+        """Each level is two hex characters of the block_id's SHA-256."""
+        parts = shard_parts("block-1", 2)
+        assert parts == shard_parts("block-1", 2)
+        assert len(parts) == 2
+        assert all(len(p) == 2 and int(p, 16) >= 0 for p in parts)
+        assert shard_parts("block-1", 0) == ()
+
+    def test_put_uses_sharded_directory(self, base_dir: Path):
+        """Fragments land under <h0>/<h1>/<block_id>/ by default."""
+        store = FragmentStore(base_dir)
+        store.put(make_record("block-1"))
+        expected = base_dir.joinpath(*shard_parts("block-1", 2), "block-1", "fragment_0.bin")
+        assert expected.is_file()
+        assert store.block_dir("block-1") == expected.parent
+        assert read_layout(base_dir) == 2
+
+    def test_rescan_finds_sharded_blocks(self, base_dir: Path):
+        """A store without its index is rebuilt by walking the shard tree."""
+        store = FragmentStore(base_dir)
+        for block_id in BLOCK_IDS:
+            store.put(make_record(block_id))
+        shutil.rmtree(base_dir / ".index")
+
+        reopened = FragmentStore(base_dir)
+        assert reopened.fragment_count() == len(BLOCK_IDS)
+        assert all(reopened.has(block_id, 0) for block_id in BLOCK_IDS)
+
+    def test_invalid_shard_levels_raise(self, base_dir: Path):
+        """shard_levels outside 0..4 is rejected."""
+        with pytest.raises(ValueError):
+            FragmentStore(base_dir, shard_levels=5)
+
+
+class TestLayoutMigration:
+    """Opening a store with a different layout moves its blocks."""
+
+    def _populate(self, base_dir: Path, shard_levels: int) -> list[FragmentRecord]:
+        store = FragmentStore(base_dir, shard_levels=shard_levels)
+        records = [make_record(block_id, i) for block_id in BLOCK_IDS for i in range(2)]
+        for record in records:
+            store.put(record)
+        store.close()
+        return records
+
+    def test_flat_store_keeps_its_layout_by_default(self, base_dir: Path):
+        """A flat store (no layout file) opened without shard_levels is left flat."""
+        records = self._populate(base_dir, 0)
+        (base_dir / LAYOUT_FILE_NAME).unlink()
+
+        store = FragmentStore(base_dir)
+        assert store.shard_levels == 0
+        assert sorted(name for name in os.listdir(base_dir) if not name.startswith(".")) == sorted(BLOCK_IDS)
+        for record in records:
+            assert store.get(record.block_id, record.index) == record
+        assert FragmentStore(base_dir).shard_levels == 0
+
+    def test_flat_store_is_migrated(self, base_dir: Path):
+        """A flat store (no layout file) is sharded when opened with shard_levels; nothing is lost."""
+        records = self._populate(base_dir, 0)
+        (base_dir / LAYOUT_FILE_NAME).unlink()
+
+        store = FragmentStore(base_dir, shard_levels=2)
+        for record in records:
+            assert store.get(record.block_id, record.index) == record
+        assert sorted(os.path.basename(p) for p in list_block_dirs(base_dir, 2)) == sorted(BLOCK_IDS)
+        assert all(len(name) == 2 for name in os.listdir(base_dir) if not name.startswith("."))
+        assert not (base_dir / STAGING_DIR_NAME).exists()
+
+    def test_sharded_store_can_be_flattened(self, base_dir: Path):
+        """shard_levels=0 moves blocks back to the top level."""
+        records = self._populate(base_dir, 2)
+
+        store = FragmentStore(base_dir, shard_levels=0)
+        assert sorted(os.listdir(base_dir)) == sorted(BLOCK_IDS + [".index", LAYOUT_FILE_NAME])
+        for record in records:
+            assert store.get(record.block_id, record.index) == record
+
+    def test_interrupted_migration_is_finished(self, base_dir: Path):
+        """Blocks left in the staging directory by a crash are moved on the next open."""
+        records = self._populate(base_dir, 0)
+        staging = base_dir / STAGING_DIR_NAME
+        staging.mkdir()
+        for block_id in BLOCK_IDS[:2]:
+            os.rename(base_dir / block_id, staging / block_id)
+
+        store = FragmentStore(base_dir)
+        for record in records:
+            assert store.get(record.block_id, record.index) == record
+        assert not staging.exists()
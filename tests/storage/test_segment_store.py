@@ -0,0 +1,220 @@
+from collections.abc import Iterator
+import pytest
+import shutil
+import uuid
+from pathlib import Path
+from src.storage.segment_store import SegmentStore
+from src.storage.store import FragmentNotFoundError
+from src.storage.fragment import FragmentRecord
+
+
+@pytest.fixture
+def segment_dir() -> Iterator[Path]:
+    """Provide a fresh temporary directory for segment files."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+
+    try:
+        yield test_root / "segments"
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def make_record(block: int, index: int, size: int = 200) -> FragmentRecord:
+    """Return a small record with distinguishable payload bytes."""
+    return FragmentRecord(
+        index=index,
+        data=bytes([block % 256, index]) * (size // 2),
+        block_id=f"block-{block}",
+        total_n=5,
+        threshold_m=3,
+        original_length=3 * size,
+    )
+
+
+class TestSegmentStoreCRUD:
+    """Same put/get/delete/has semantics as FragmentStore."""
+
+    def test_put_and_get_round_trip(self, segment_dir: Path):
+        """get() after put() returns an equal FragmentRecord."""
+        store = SegmentStore(segment_dir)
+        record = make_record(1, 0)
+        store.put(record)
+        assert store.get(record.block_id, record.index) == record
+        assert store.has(record.block_id, record.index)
+
+    def test_overwrite_returns_latest(self, segment_dir: Path):
+        """A second put() for the same key supersedes the first."""
+        store = SegmentStore(segment_dir)
+        store.put(make_record(1, 0, size=10))
+        newer = make_record(1, 0, size=20)
+        store.put(newer)
+        assert store.get("block-1", 0) == newer
+        assert store.fragment_count() == 1
+
+    def test_delete_removes_fragment(self, segment_dir: Path):
+        """delete() makes the fragment unreadable and updates listings."""
+        store = SegmentStore(segment_dir)
+        store.put(make_record(1, 0))
+        store.put(make_record(1, 1))
+        store.delete("block-1", 0)
+        assert not store.has("block-1", 0)
+        assert store.list_indices("block-1") == [1]
+        with pytest.raises(FragmentNotFoundError):
+            store.get("block-1", 0)
+
+    def test_delete_missing_raises(self, segment_dir: Path):
+        """delete() raises FragmentNotFoundError for unknown keys."""
+        store = SegmentStore(segment_dir)
+        with pytest.raises(FragmentNotFoundError):
+            store.delete("no_block", 0)
+
+    def test_list_fragments_sorted(self, segment_dir: Path):
+        """list_fragments() returns a block's records in index order."""
+        store = SegmentStore(segment_dir)
+        records = [make_record(7, i) for i in (2, 0, 1)]
+        for record in records:
+            store.put(record)
+        assert [r.index for r in store.list_fragments("block-7")] == [0, 1, 2]
+
+    def test_open_view(self, segment_dir: Path):
+        """open_view() exposes the payload and metadata."""
+        store = SegmentStore(segment_dir)
+        record = make_record(3, 4)
+        store.put(record)
+        with store.open_view("block-3", 4) as view:
+            assert view.data == record.data
+            assert view.total_n == 5
+
+
+class TestSegmentStoreRecovery:
+    """Restarting from segments and checkpoints."""
+
+    def test_reopen_replays_segments(self, segment_dir: Path):
+        """Without a checkpoint, startup rebuilds the index from the log."""
+        store = SegmentStore(segment_dir, segment_size=2048)
+        records = [make_record(b, i) for b in range(10) for i in range(5)]
+        for record in records:
+            store.put(record)
+        store.delete("block-0", 0)
+
+        reopened = SegmentStore(segment_dir, segment_size=2048)
+        assert reopened.fragment_count() == len(records) - 1
+        assert not reopened.has("block-0", 0)
+        assert reopened.get("block-9", 4) == records[-1]
+
+    def test_reopen_from_checkpoint_and_tail(self, segment_dir: Path):
+        """Entries written after the last checkpoint are replayed on top of it."""
+        store = SegmentStore(segment_dir)
+        store.put(make_record(1, 0))
+        store.checkpoint()
+        store.put(make_record(1, 1))
+        store.delete("block-1", 0)
+
+        reopened = SegmentStore(segment_dir)
+        assert reopened.list_indices("block-1") == [1]
+
+    def test_corrupt_checkpoint_falls_back_to_replay(self, segment_dir: Path):
+        """A damaged checkpoint is ignored rather than trusted."""
+        store = SegmentStore(segment_dir)
+        record = make_record(1, 0)
+        store.put(record)
+        store.close()
+        checkpoint = segment_dir / "index.checkpoint"
+        checkpoint.write_bytes(checkpoint.read_bytes()[:-1] + b"\x00")
+
+        reopened = SegmentStore(segment_dir)
+        assert reopened.get("block-1", 0) == record
+
+    def test_torn_tail_is_truncated(self, segment_dir: Path):
+        """A partially written last entry is dropped at startup."""
+        store = SegmentStore(segment_dir)
+        store.put(make_record(1, 0))
+        store.put(make_record(1, 1))
+        segment = next(segment_dir.glob("segment_*.log"))
+        with open(segment, "r+b") as f:
+            f.truncate(segment.stat().st_size - 5)
+
+        reopened = SegmentStore(segment_dir)
+        assert reopened.list_indices("block-1") == [0]
+        reopened.put(make_record(1, 1))
+        assert SegmentStore(segment_dir).list_indices("block-1") == [0, 1]
+
+    def test_damage_in_sealed_segment_is_skipped(self, segment_dir: Path):
+        """A flipped bit in an old segment loses only the damaged entry, and the file is kept."""
+        store = SegmentStore(segment_dir, segment_size=2048)
+        records = [make_record(1, i) for i in range(20)]
+        for record in records:
+            store.put(record)
+        store.close()
+        first = sorted(segment_dir.glob("segment_*.log"))[0]
+        size = first.stat().st_size
+        raw = bytearray(first.read_bytes())
+        raw[size // 2] ^= 0xFF
+        first.write_bytes(bytes(raw))
+        (segment_dir / "index.checkpoint").unlink()
+
+        reopened = SegmentStore(segment_dir, segment_size=2048)
+        assert first.stat().st_size == size
+        assert reopened.fragment_count() == len(records) - 1
+        assert reopened.get("block-1", 19) == records[-1]
+
+
+class TestSegmentStoreCompaction:
+    """Reclaiming space held by deleted and superseded records."""
+
+    def test_compaction_reclaims_dead_segments(self, segment_dir: Path):
+        """Mostly-dead sealed segments are rewritten and removed."""
+        store = SegmentStore(segment_dir, segment_size=2048)
+        records = [make_record(b, i) for b in range(20) for i in range(5)]
+        for record in records:
+            store.put(record)
+        for record in records[:80]:
+            store.delete(record.block_id, record.index)
+        before = sum(p.stat().st_size for p in segment_dir.glob("segment_*.log"))
+
+        assert store.compact() > 0
+
+        after = sum(p.stat().st_size for p in segment_dir.glob("segment_*.log"))
+        assert after < before
+        assert store.fragment_count() == 20
+        assert all(store.get(r.block_id, r.index) == r for r in records[80:])
+
+    def test_compacted_store_reopens(self, segment_dir: Path):
+        """The index survives compaction followed by a restart, with or without a checkpoint."""
+        store = SegmentStore(segment_dir, segment_size=2048)
+        records = [make_record(b, i) for b in range(20) for i in range(5)]
+        for record in records:
+            store.put(record)
+        for record in records[:80]:
+            store.delete(record.block_id, record.index)
+        store.compact()
+
+        assert SegmentStore(segment_dir, segment_size=2048).fragment_count() == 20
+        (segment_dir / "index.checkpoint").unlink()
+        replayed = SegmentStore(segment_dir, segment_size=2048)
+        assert replayed.fragment_count() == 20
+        assert not replayed.has(records[0].block_id, records[0].index)
+
+
+class TestSegmentStoreMetadata:
+    """Header-only metadata reads."""
+
+    def test_get_metadata_matches_record(self, segment_dir: Path):
+        """get_metadata() reads the header of the live record."""
+        store = SegmentStore(segment_dir)
+        store.put(make_record(1, 0, size=10))
+        newer = make_record(1, 0, size=20)
+        store.put(newer)
+        header = store.get_metadata("block-1", 0)
+        assert header.data_length == 20
+        assert header.data_sha256 == newer.content_hash()
+        with pytest.raises(FragmentNotFoundError):
+            store.get_metadata("block-1", 1)
+
+    def test_list_metadata(self, segment_dir: Path):
+        """list_metadata() returns one header per stored index."""
+        store = SegmentStore(segment_dir)
+        for i in range(3):
+            store.put(make_record(2, i))
+        assert [h.index for h in store.list_metadata("block-2")] == [0, 1, 2]
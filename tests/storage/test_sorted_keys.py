@@ -0,0 +1,54 @@
+import random
+import pytest
+from src.storage.sorted_keys import SortedKeySet
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """Use tiny chunks so splits and empty chunks are exercised."""
+    monkeypatch.setattr("src.storage.sorted_keys._CHUNK_SIZE", 4)
+
+
+class TestSortedKeySet:
+    """Sorted block ids for cursor-paginated listing."""
+
+    def test_matches_sorted_set_under_random_updates(self):
+        """After random adds and discards the set iterates like sorted(set)."""
+        rng = random.Random(7)
+        keys = SortedKeySet(f"k{rng.randrange(200):03d}" for _ in range(50))
+        expected = set(keys)
+        for _ in range(2000):
+            key = f"k{rng.randrange(200):03d}"
+            if rng.random() < 0.6:
+                keys.add(key)
+                expected.add(key)
+            else:
+                keys.discard(key)
+                expected.discard(key)
+            assert len(keys) == len(expected)
+        assert list(keys) == sorted(expected)
+        assert all(k in keys for k in expected)
+        assert "k999" not in keys
+
+    def test_paging_visits_every_key_once(self):
+        """Following the cursor page by page yields each key exactly once."""
+        keys = SortedKeySet(f"blk-{i:04d}" for i in range(0, 100, 3))
+        seen: list[str] = []
+        after = None
+        while True:
+            page = keys.page(after=after, limit=7)
+            if not page:
+                break
+            seen.extend(page)
+            after = page[-1]
+        assert seen == list(keys)
+
+    def test_prefix_and_cursor(self):
+        """A page stops at the end of the prefix; a cursor before the prefix is ignored."""
+        keys = SortedKeySet(["a1", "b1", "b2", "b3", "c1"])
+        assert keys.page(prefix="b") == ["b1", "b2", "b3"]
+        assert keys.page(prefix="b", after="a9") == ["b1", "b2", "b3"]
+        assert keys.page(prefix="b", after="b1", limit=1) == ["b2"]
+        assert keys.page(prefix="b", after="b3") == []
+        assert keys.page(prefix="z") == []
+        assert SortedKeySet().page() == []
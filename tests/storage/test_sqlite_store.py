@@ -0,0 +1,82 @@
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import shutil
+import uuid
+from pathlib import Path
+from src.storage.fragment import Durability, FragmentRecord
+from src.storage.sqlite_store import DATABASE_NAME, SQLiteStore
+
+
+@pytest.fixture
+def sqlite_dir() -> Iterator[Path]:
+    """Provide a fresh temporary directory for the database."""
+    test_root = Path("data/test_runs") / str(uuid.uuid4())
+    test_root.mkdir(parents=True, exist_ok=False)
+
+    try:
+        yield test_root / "sqlite"
+    finally:
+        shutil.rmtree(test_root, ignore_errors=True)
+
+
+def make_record(index: int, durability: Durability = Durability.FSYNC) -> FragmentRecord:
+    return FragmentRecord(
+        index=index,
+        data=bytes([index % 256]) * 64,
+        block_id="blk",
+        total_n=5,
+        threshold_m=3,
+        original_length=192,
+        durability=durability,
+    )
+
+
+class TestSQLiteStore:
+    """SQLite-specific behaviour."""
+
+    def test_single_database_file_in_wal_mode(self, sqlite_dir: Path):
+        """All fragments go into one database using write-ahead logging."""
+        store = SQLiteStore(sqlite_dir)
+        for i in range(10):
+            store.put(make_record(i))
+        mode = store._reader().execute("PRAGMA journal_mode").fetchone()[0]
+        store.close()
+        assert mode == "wal"
+        assert (sqlite_dir / DATABASE_NAME).is_file()
+        assert not list(sqlite_dir.glob("*.bin"))
+
+    def test_reopen_restores_contents(self, sqlite_dir: Path):
+        """A reopened store serves everything written before close()."""
+        store = SQLiteStore(sqlite_dir)
+        records = [make_record(i, level) for i, level in enumerate(Durability)]
+        for record in records:
+            store.put(record)
+        store.delete("blk", 0)
+        store.close()
+
+        reopened = SQLiteStore(sqlite_dir)
+        assert reopened.list_indices("blk") == [1, 2]
+        assert reopened.list_fragments("blk") == records[1:]
+        reopened.close()
+
+    def test_concurrent_puts_share_transactions(self, sqlite_dir: Path):
+        """Puts arriving together are committed in one transaction."""
+        store = SQLiteStore(sqlite_dir, batch_window=0.05)
+        batches: list[int] = []
+        apply = store._apply
+        store._apply = lambda batch: (batches.append(len(batch)), apply(batch))
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(store.put, [make_record(i) for i in range(32)]))
+        store.close()
+
+        assert sum(batches) == 32
+        assert len(batches) < 32
+
+    def test_put_after_close_raises(self, sqlite_dir: Path):
+        """The store refuses writes once closed."""
+        store = SQLiteStore(sqlite_dir)
+        store.close()
+        with pytest.raises(RuntimeError):
+            store.put(make_record(0))
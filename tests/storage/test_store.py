@@ -1,10 +1,14 @@
 from collections.abc import Iterator
+import dataclasses
+import hashlib
+import json
+import os
 import pytest
 import shutil
 import uuid
 from pathlib import Path
 from src.storage.store import FragmentStore, FragmentNotFoundError
-from src.storage.fragment import FragmentRecord
+from src.storage.fragment import Durability, FragmentRecord, VerificationStatus
 
 
 @pytest.fixture
@@ -35,6 +39,24 @@ class TestFragmentStoreCRUD:
         store.put(record)
         assert store.get(record.block_id, record.index) == record
 
+    def test_reserved_block_ids_are_rejected(self, store: FragmentStore):
+        """Block ids naming the store's own directories are refused, even in the flat layout."""
+        flat = FragmentStore(store.base_dir, shard_levels=0)
+        reserved = (".index", ".objects", ".layout", ".relayout", ".catalog.sqlite3", ".catalog.sqlite3-wal")
+        for block_id in (*reserved, ".", ".."):
+            record = FragmentRecord(
+                index=0, data=b"x", block_id=block_id, total_n=5, threshold_m=3, original_length=3
+            )
+            with pytest.raises(ValueError):
+                flat.put(record)
+        assert flat.fragment_count() == 0
+        assert not (store.base_dir / ".index" / "fragment_0.bin").exists()
+        for block_id in (".index", ".."):
+            with pytest.raises(ValueError):
+                flat.get(block_id, 0)
+            with pytest.raises(ValueError):
+                flat.delete(block_id, 0)
+
     def test_has_returns_false_before_put(self, store: FragmentStore):
         """has() returns False when no fragment is stored."""
         assert not store.has("missing_block", 0)
@@ -103,3 +125,529 @@ class TestFragmentStoreListing:
     def test_list_empty_for_unknown_block(self, store: FragmentStore):
         """list_fragments() returns [] for an unknown block_id."""
         assert store.list_fragments("unknown") == []
+
+
+class TestFragmentStoreFormat:
+    """Binary records on disk and compatibility with legacy JSON records."""
+
+    def _legacy_write(self, store: FragmentStore, record: FragmentRecord) -> Path:
+        path = store.base_dir / record.block_id / f"fragment_{record.index}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(record.to_dict(), sort_keys=True), encoding="utf-8")
+        # Stores written by older servers are flat and have no persisted
+        # index either.
+        shutil.rmtree(store.base_dir / ".index", ignore_errors=True)
+        (store.base_dir / ".layout").unlink(missing_ok=True)
+        return path
+
+    def _record(self, index: int = 0, block_id: str = "legacy-block") -> FragmentRecord:
+        return FragmentRecord(
+            index=index,
+            data=b"legacy" + bytes([index]),
+            block_id=block_id,
+            total_n=5,
+            threshold_m=3,
+            original_length=21,
+        )
+
+    def test_put_writes_binary_record(self, store: FragmentStore):
+        """put() writes fragment_<i>.bin and no JSON file."""
+        record = self._record()
+        store.put(record)
+        block_dir = store.block_dir(record.block_id)
+        assert (block_dir / "fragment_0.bin").is_file()
+        assert not (block_dir / "fragment_0.json").exists()
+
+    def test_legacy_json_is_readable(self, store: FragmentStore):
+        """Records written by older servers are still served."""
+        record = self._record()
+        self._legacy_write(store, record)
+        reopened = FragmentStore(store.base_dir)
+        assert reopened.has(record.block_id, 0)
+        assert reopened.get(record.block_id, 0) == record
+        assert reopened.list_fragments(record.block_id) == [record]
+        assert reopened.legacy_record_count() == 1
+
+    def test_migration_converts_json_to_binary(self, store: FragmentStore):
+        """migrate_legacy_records() rewrites every JSON record in place."""
+        records = [self._record(i) for i in range(3)]
+        paths = [self._legacy_write(store, r) for r in records]
+        reopened = FragmentStore(store.base_dir)
+
+        assert reopened.migrate_legacy_records() == 3
+        assert not any(p.exists() for p in paths)
+        assert reopened.list_fragments("legacy-block") == records
+        assert reopened.legacy_record_count() == 0
+
+    def test_background_migration(self, store: FragmentStore):
+        """start_legacy_migration() runs only when there is something to convert."""
+        assert store.start_legacy_migration() is None
+
+        record = self._record()
+        self._legacy_write(store, record)
+        reopened = FragmentStore(store.base_dir)
+        thread = reopened.start_legacy_migration()
+        assert thread is not None
+        thread.join(timeout=5)
+        assert (reopened.block_dir(record.block_id) / "fragment_0.bin").is_file()
+        assert reopened.get(record.block_id, 0) == record
+
+    def test_delete_removes_legacy_record(self, store: FragmentStore):
+        """delete() also removes a not-yet-migrated JSON record."""
+        record = self._record()
+        self._legacy_write(store, record)
+        reopened = FragmentStore(store.base_dir)
+        reopened.delete(record.block_id, 0)
+        assert not reopened.has(record.block_id, 0)
+
+
+class TestFragmentStoreOpenView:
+    """Memory-mapped zero-copy reads."""
+
+    def test_view_exposes_payload_and_metadata(self, store: FragmentStore):
+        """open_view() returns the stored bytes and the record's metadata."""
+        record = FragmentRecord(
+            index=2,
+            data=b"mapped payload",
+            block_id="view-block",
+            total_n=5,
+            threshold_m=3,
+            original_length=40,
+            fpcc_json="{}",
+        )
+        store.put(record)
+
+        with store.open_view("view-block", 2) as view:
+            assert isinstance(view.data, memoryview)
+            assert view.data == record.data
+            assert view.block_id == "view-block"
+            assert view.total_n == 5
+            assert view.fpcc_json == "{}"
+            assert view.to_record() == record
+
+    def test_view_survives_overwrite(self, store: FragmentStore):
+        """An open view keeps the bytes current when it was opened."""
+        record = FragmentRecord(
+            index=0, data=b"old", block_id="swap", total_n=5, threshold_m=3, original_length=9
+        )
+        store.put(record)
+        with store.open_view("swap", 0) as view:
+            store.put(FragmentRecord(
+                index=0, data=b"new", block_id="swap", total_n=5, threshold_m=3, original_length=9
+            ))
+            assert view.data == b"old"
+        assert store.get("swap", 0).data == b"new"
+
+    def test_view_of_legacy_record(self, store: FragmentStore):
+        """Legacy JSON records can be opened too."""
+        record = FragmentRecord(
+            index=1, data=b"json", block_id="old", total_n=5, threshold_m=3, original_length=12
+        )
+        path = store.block_dir("old") / "fragment_1.json"
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps(record.to_dict()), encoding="utf-8")
+
+        with store.open_view("old", 1) as view:
+            assert view.data == b"json"
+
+    def test_open_missing_raises(self, store: FragmentStore):
+        """open_view() raises FragmentNotFoundError for unknown keys."""
+        with pytest.raises(FragmentNotFoundError):
+            store.open_view("no_block", 0)
+
+    def test_unreadable_record_reads_as_missing(self, store: FragmentStore):
+        """An empty (torn) record or one with a corrupt header raises FragmentNotFoundError."""
+        record = FragmentRecord(
+            index=0, data=b"torn", block_id="torn", total_n=5, threshold_m=3, original_length=12
+        )
+        store.put(record)
+        path = store.block_dir("torn") / "fragment_0.bin"
+
+        path.write_bytes(b"")
+        with pytest.raises(FragmentNotFoundError):
+            store.open_view("torn", 0)
+        path.write_bytes(b"not a record" * 10)
+        with pytest.raises(FragmentNotFoundError):
+            store.open_view("torn", 0)
+
+    def test_view_sees_verification_patch(self, store: FragmentStore):
+        """set_verification() patches the mapped file in place, so an open view sees it."""
+        record = FragmentRecord(
+            index=0, data=b"scrubbed", block_id="patch", total_n=5, threshold_m=3, original_length=24
+        )
+        store.put(record)
+        with store.open_view("patch", 0) as view:
+            store.set_verification("patch", 0, VerificationStatus.INVALID, None)
+            assert view.to_record().verification_status is VerificationStatus.INVALID
+
+
+class TestFragmentStoreIndexPersistence:
+    """Startup from the index snapshot and journal instead of a full scan."""
+
+    def _record(self, block_id: str, index: int) -> FragmentRecord:
+        return FragmentRecord(
+            index=index, data=b"x", block_id=block_id, total_n=5, threshold_m=3, original_length=3
+        )
+
+    def test_reopen_uses_snapshot_and_journal(self, store: FragmentStore, monkeypatch):
+        """A reopened store recovers its index without scanning block directories."""
+        for i in range(3):
+            store.put(self._record("a", i))
+        store.snapshot_index()
+        store.put(self._record("b", 0))
+        store.delete("a", 1)
+
+        def fail_scan(*args, **kwargs):
+            raise AssertionError("store was rescanned")
+
+        monkeypatch.setattr("src.storage.store.scan_store", fail_scan)
+        reopened = FragmentStore(store.base_dir)
+        assert reopened.list_indices("a") == [0, 2]
+        assert reopened.list_indices("b") == [0]
+        assert reopened.fragment_count() == 3
+
+    def test_corrupt_snapshot_triggers_rescan(self, store: FragmentStore):
+        """A damaged snapshot is discarded and the index rebuilt from disk."""
+        store.put(self._record("a", 0))
+        store.put(self._record("a", 1))
+        store.close()
+        snapshot = store.base_dir / ".index" / "index.snapshot"
+        snapshot.write_bytes(b"garbage")
+
+        reopened = FragmentStore(store.base_dir)
+        assert reopened.list_indices("a") == [0, 1]
+
+    def test_torn_journal_tail_is_ignored(self, store: FragmentStore):
+        """A partially written journal entry does not break startup."""
+        store.put(self._record("a", 0))
+        journal = max((store.base_dir / ".index").glob("index.journal.*"))
+        with open(journal, "ab") as f:
+            f.write(b"\x00\x01\x02")
+
+        reopened = FragmentStore(store.base_dir)
+        assert reopened.list_indices("a") == [0]
+
+    def test_parallel_rescan_matches_store(self, store: FragmentStore):
+        """The scandir rescan finds every block across worker batches."""
+        for b in range(600):
+            store.put(self._record(f"block-{b}", b % 5))
+        shutil.rmtree(store.base_dir / ".index")
+
+        reopened = FragmentStore(store.base_dir, scan_workers=4)
+        assert reopened.fragment_count() == 600
+        assert reopened.list_indices("block-599") == [4]
+
+    def test_journal_is_folded_into_snapshot(self, store: FragmentStore):
+        """Crossing the snapshot threshold rotates the journal."""
+        small = FragmentStore(store.base_dir, snapshot_threshold=5)
+        for i in range(12):
+            small.put(self._record("c", i))
+        small.close()
+
+        journals = list((store.base_dir / ".index").glob("index.journal.*"))
+        assert len(journals) == 1
+        assert FragmentStore(store.base_dir).list_indices("c") == list(range(12))
+
+    def test_crash_after_publish_keeps_fragment_indexed(self, store: FragmentStore, monkeypatch):
+        """A crash between the rename and the in-memory index update loses nothing."""
+        store.put(self._record("a", 0))
+        store.snapshot_index()
+
+        def crash(*args, **kwargs):
+            raise RuntimeError("crashed")
+
+        monkeypatch.setattr(store, "_index_set", crash)
+        with pytest.raises(RuntimeError):
+            store.put(self._record("a", 1))
+
+        reopened = FragmentStore(store.base_dir)
+        assert reopened.list_indices("a") == [0, 1]
+        assert reopened.fragment_count() == 2
+        assert reopened.stats().fragments == 2
+
+    def test_crash_before_publish_leaves_no_entry(self, store: FragmentStore, monkeypatch):
+        """A journaled put whose file never reached its place is not indexed."""
+        store.put(self._record("a", 0))
+
+        def crash(*args, **kwargs):
+            raise RuntimeError("crashed")
+
+        monkeypatch.setattr("src.storage.store.os.replace", crash)
+        with pytest.raises(RuntimeError):
+            store.put(self._record("a", 1))
+        monkeypatch.undo()
+
+        reopened = FragmentStore(store.base_dir)
+        assert reopened.list_indices("a") == [0]
+        assert not reopened.has("a", 1)
+
+    def test_has_repairs_unjournaled_fragment(self, store: FragmentStore):
+        """A file the journal never recorded is indexed when a retry finds it."""
+        store.put(self._record("a", 0))
+        store.snapshot_index()
+        store.put(dataclasses.replace(self._record("a", 1), durability=Durability.NONE))
+        journal = max((store.base_dir / ".index").glob("index.journal.*"))
+        journal.write_bytes(b"")  # the unsynced entry was lost in a crash
+
+        reopened = FragmentStore(store.base_dir)
+        assert reopened.list_indices("a") == [0]
+        assert reopened.has("a", 1)
+        assert reopened.list_indices("a") == [0, 1]
+        assert FragmentStore(store.base_dir).list_indices("a") == [0, 1]
+
+
+class TestFragmentStoreMetadata:
+    """Header-only metadata reads."""
+
+    def _record(self, index: int) -> FragmentRecord:
+        return FragmentRecord(
+            index=index,
+            data=bytes([index]) * 4096,
+            block_id="meta-block",
+            total_n=5,
+            threshold_m=3,
+            original_length=12288,
+            fpcc_json='{"hashes": []}',
+        )
+
+    def test_get_metadata_matches_record(self, store: FragmentStore):
+        """get_metadata() returns the record's fields and data hash."""
+        record = self._record(2)
+        store.put(record)
+        header = store.get_metadata("meta-block", 2)
+        assert header.index == 2
+        assert header.total_n == 5
+        assert header.fpcc_json == record.fpcc_json
+        assert header.data_length == 4096
+        assert header.data_sha256 == hashlib.sha256(record.data).digest()
+
+    def test_list_metadata(self, store: FragmentStore):
+        """list_metadata() returns one header per stored index, in order."""
+        for i in (3, 0, 1):
+            store.put(self._record(i))
+        assert [h.index for h in store.list_metadata("meta-block")] == [0, 1, 3]
+        assert store.list_metadata("missing-block") == []
+
+    def test_legacy_record_metadata(self, store: FragmentStore):
+        """JSON records from older servers still report their metadata."""
+        record = self._record(0)
+        path = store.block_dir(record.block_id) / "fragment_0.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(record.to_dict()), encoding="utf-8")
+        shutil.rmtree(store.base_dir / ".index", ignore_errors=True)
+        reopened = FragmentStore(store.base_dir)
+        header = reopened.get_metadata("meta-block", 0)
+        assert header.data_sha256 == hashlib.sha256(record.data).digest()
+
+    def test_missing_fragment_raises(self, store: FragmentStore):
+        """get_metadata() raises FragmentNotFoundError like get()."""
+        with pytest.raises(FragmentNotFoundError):
+            store.get_metadata("meta-block", 9)
+
+
+class TestFragmentStoreStats:
+    """Capacity counters kept alongside the index."""
+
+    def _record(self, block_id: str, index: int, size: int, status=VerificationStatus.VALID) -> FragmentRecord:
+        return FragmentRecord(
+            index=index,
+            data=b"s" * size,
+            block_id=block_id,
+            total_n=5,
+            threshold_m=3,
+            original_length=3 * size,
+            verification_status=status,
+        )
+
+    def _disk_bytes(self, store: FragmentStore) -> int:
+        return sum(p.stat().st_size for p in store.base_dir.rglob("fragment_*.bin"))
+
+    def test_put_overwrite_and_delete_update_totals(self, store: FragmentStore):
+        """Totals follow puts, overwrites with a new size, and deletes."""
+        store.put(self._record("a", 0, 100))
+        store.put(self._record("a", 1, 50))
+        store.put(self._record("a", 1, 70))
+        store.delete("a", 0)
+
+        stats = store.stats()
+        assert stats.fragments == 1
+        assert stats.payload_bytes == 70
+        assert stats.disk_bytes == self._disk_bytes(store)
+        assert stats.by_status[VerificationStatus.VALID].fragments == 1
+
+    def test_set_verification_moves_between_statuses(self, store: FragmentStore):
+        """Marking a fragment INVALID moves its bytes to the INVALID totals."""
+        store.put(self._record("a", 0, 100))
+        store.set_verification("a", 0, VerificationStatus.INVALID, None)
+
+        stats = store.stats()
+        assert stats.invalid_fragments == 1
+        assert stats.by_status[VerificationStatus.INVALID].payload_bytes == 100
+        assert stats.by_status[VerificationStatus.VALID].fragments == 0
+
+    def test_totals_survive_reopen_and_rescan(self, store: FragmentStore):
+        """Snapshot, journal replay and a full rescan all restore the same totals."""
+        store.put(self._record("a", 0, 100))
+        store.snapshot_index()
+        store.put(self._record("b", 0, 30, VerificationStatus.INVALID))
+        store.set_verification("a", 0, VerificationStatus.UNVERIFIED, None)
+        expected = store.stats()
+
+        assert FragmentStore(store.base_dir).stats() == expected
+        shutil.rmtree(store.base_dir / ".index")
+        assert FragmentStore(store.base_dir).stats() == expected
+
+    def test_legacy_records_are_counted(self, store: FragmentStore):
+        """A rescan counts legacy JSON records by their decoded payload."""
+        record = self._record("old", 0, 40)
+        path = store.block_dir("old") / "fragment_0.json"
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps(record.to_dict()), encoding="utf-8")
+        shutil.rmtree(store.base_dir / ".index")
+
+        reopened = FragmentStore(store.base_dir)
+        assert reopened.stats().payload_bytes == 40
+        assert reopened.stats().disk_bytes == path.stat().st_size
+        reopened.migrate_legacy_records()
+        assert reopened.stats().disk_bytes == self._disk_bytes(reopened)
+
+
+class TestFragmentStoreDedup:
+    """Identical fragment data stored once in dedup mode."""
+
+    def _record(self, block_id: str, index: int = 0, data: bytes = b"same bytes" * 40) -> FragmentRecord:
+        return FragmentRecord(
+            index=index,
+            data=data,
+            block_id=block_id,
+            total_n=5,
+            threshold_m=3,
+            original_length=3 * len(data),
+            verification_status=VerificationStatus.VALID,
+        )
+
+    def test_identical_data_is_stored_once(self, store: FragmentStore):
+        """Two fragments with the same data share one object and read back whole."""
+        dedup = FragmentStore(store.base_dir, dedup=True)
+        first, second = self._record("a"), self._record("b", 3)
+        dedup.put(first)
+        dedup.put(second)
+
+        path = dedup.object_path(first.content_hash())
+        assert path.read_bytes() == first.data
+        assert path.stat().st_nlink == 3  # the object plus one link per fragment
+        assert dedup.get("b", 3) == second
+        assert dedup.open_view("a", 0).data == first.data
+        assert dedup.list_fragments("b") == [second]
+
+        stats = dedup.stats()
+        assert (stats.dedup_objects, stats.dedup_bytes) == (1, len(first.data))
+        assert stats.payload_bytes == 2 * len(first.data)
+
+    def test_object_tree_is_not_a_block(self, store: FragmentStore):
+        """In the flat layout .objects is neither writable as a block nor rescanned as one."""
+        dedup = FragmentStore(store.base_dir, shard_levels=0, dedup=True)
+        record = self._record("a")
+        dedup.put(record)
+        with pytest.raises(ValueError):
+            dedup.put(self._record(".objects"))
+        shutil.rmtree(store.base_dir / ".index")
+
+        reopened = FragmentStore(store.base_dir, shard_levels=0, dedup=True)
+        assert reopened.list_blocks() == ["a"]
+        assert reopened.get("a", 0) == record
+
+    def test_object_deleted_with_last_reference(self, store: FragmentStore):
+        """Deleting one fragment keeps the shared object; deleting the last one frees it."""
+        dedup = FragmentStore(store.base_dir, dedup=True)
+        record = self._record("a")
+        dedup.put(record)
+        dedup.put(self._record("b"))
+        path = dedup.object_path(record.content_hash())
+
+        dedup.delete("a", 0)
+        assert path.exists()
+        assert dedup.get("b", 0).data == record.data
+        dedup.delete("b", 0)
+        assert not path.exists()
+        assert dedup.stats().dedup_objects == 0
+
+    def test_object_totals_reload_without_walking_objects(self, store: FragmentStore, monkeypatch):
+        """Object totals come back from the index snapshot and journal, not a walk of .objects."""
+        dedup = FragmentStore(store.base_dir, dedup=True)
+        record = self._record("a")
+        dedup.put(record)
+        dedup.snapshot_index()
+        dedup.put(self._record("b", data=b"other"))
+        dedup.delete("a", 0)
+
+        def no_scan(self):
+            raise AssertionError("object tree walked")
+
+        monkeypatch.setattr(FragmentStore, "_scan_objects", no_scan)
+        reopened = FragmentStore(store.base_dir, dedup=True)
+        stats = reopened.stats()
+        assert (stats.dedup_objects, stats.dedup_bytes) == (1, len(b"other"))
+
+    def test_logged_object_missing_on_disk_is_not_counted(self, store: FragmentStore):
+        """An object logged as stored but never written, as after a crash, is dropped on reopen."""
+        dedup = FragmentStore(store.base_dir, dedup=True)
+        dedup.put(self._record("a"))
+        dedup._journal_object(b"\x01" * 32, True, 100)
+        assert dedup.stats().dedup_objects == 2
+
+        reopened = FragmentStore(store.base_dir, dedup=True)
+        stats = reopened.stats()
+        assert (stats.dedup_objects, stats.dedup_bytes) == (1, len(self._record("a").data))
+
+    def test_overwrite_releases_previous_object(self, store: FragmentStore):
+        """Replacing a fragment's data drops its reference to the old data."""
+        dedup = FragmentStore(store.base_dir, dedup=True)
+        old = self._record("a")
+        dedup.put(old)
+        dedup.put(old)
+        new = self._record("a", data=b"different")
+        dedup.put(new)
+
+        assert not dedup.object_path(old.content_hash()).exists()
+        assert dedup.get("a", 0) == new
+        assert list(dedup.block_dir("a").glob("*.ref")) == [
+            dedup.block_dir("a") / f"fragment_0.{new.content_hash().hex()}.ref"
+        ]
+        assert dedup.stats().dedup_bytes == len(new.data)
+
+    def test_fsync_put_syncs_existing_object(self, store: FragmentStore, monkeypatch):
+        """An FSYNC put sharing data first stored by a NONE put fsyncs that object."""
+        dedup = FragmentStore(store.base_dir, dedup=True)
+        first = dataclasses.replace(self._record("a"), durability=Durability.NONE)
+        dedup.put(first)
+        synced: list[int] = []
+        real_fsync = os.fsync
+
+        def fsync(fd: int) -> None:
+            synced.append(os.fstat(fd).st_ino)
+            real_fsync(fd)
+
+        monkeypatch.setattr(os, "fsync", fsync)
+        dedup.put(dataclasses.replace(self._record("b"), durability=Durability.FSYNC))
+
+        path = dedup.object_path(first.content_hash())
+        assert path.stat().st_ino in synced
+        assert path.parent.stat().st_ino in synced
+        assert dedup.block_dir("b").stat().st_ino in synced
+
+    def test_reopen_without_dedup(self, store: FragmentStore):
+        """Reference records stay readable, counted and deletable with dedup switched off."""
+        dedup = FragmentStore(store.base_dir, dedup=True)
+        record = self._record("a")
+        dedup.put(record)
+        expected = dedup.stats()
+
+        plain = FragmentStore(store.base_dir)
+        assert plain.stats() == expected
+        assert plain.get("a", 0) == record
+        plain.put(self._record("b"))
+        assert plain.stats().dedup_objects == 1
+        plain.delete("a", 0)
+        assert not plain.object_path(record.content_hash()).exists()
+        assert plain.list_blocks() == ["b"]
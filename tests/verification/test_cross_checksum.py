@@ -2,7 +2,7 @@ import hashlib
 
 import pytest
 
-from src.erasure.encoder import encode
+from src.erasure.encoder import encode, encode_many
 from src.verification.cross_checksum import FingerprintedCrossChecksum
 from src.verification.oracle import RandomOracle
 from src.fingerprint.fingerprint import fingerprint
@@ -66,6 +66,27 @@ class TestFPCCGenerate:
             FingerprintedCrossChecksum.generate(out_of_order)
 
 
+class TestFPCCGenerateMany:
+    """Tests for FingerprintedCrossChecksum.generate_many()."""
+
+    def test_matches_generate_per_block(self):
+        """generate_many() returns exactly what generate() returns for each block."""
+        objects = [b"a", b"bb", b"ccc", b"small record" * 7, bytes(range(256)) * 3]
+        fragment_lists = encode_many(objects, n=5, m=3)
+
+        expected = [FingerprintedCrossChecksum.generate(f) for f in fragment_lists]
+        assert FingerprintedCrossChecksum.generate_many(fragment_lists) == expected
+
+    def test_empty_batch(self):
+        """An empty batch yields no checksums."""
+        assert FingerprintedCrossChecksum.generate_many([]) == []
+
+    def test_rejects_out_of_order_block(self, fragments):
+        """Any block with misordered fragments is rejected like generate()."""
+        with pytest.raises(ValueError):
+            FingerprintedCrossChecksum.generate_many([fragments, fragments[::-1]])
+
+
 class TestFPCCSerialization:
     """Tests for to_json() / from_json() round-trip."""
 
@@ -75,6 +75,13 @@ class TestRandomOracleDerive:
         assert RandomOracle.derive(hashes) == expected
 
 
+    def test_repeated_derive_is_cached(self):
+        """Deriving r twice for the same hash list reuses the cached point."""
+        hashes = [bytes([i]) * 32 for i in range(5)]
+        first = RandomOracle.derive(hashes)
+        assert RandomOracle.derive(list(hashes)) is first
+
+
 class TestHashFragment:
     """Tests for RandomOracle.hash_fragment()."""
 
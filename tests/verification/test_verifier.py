@@ -1,6 +1,7 @@
 import pytest
 
 from src.erasure.encoder import encode
+from src.fingerprint.field import GF256
 from src.verification.cross_checksum import FingerprintedCrossChecksum
 from src.verification.verifier import Verifier, VerificationResult
 
@@ -236,6 +237,19 @@ class TestBatchCheck:
         assert [r.fragment_index for r in reports] == [3, 1, 99, 0]
         assert reports[2].result == VerificationResult.INDEX_ERROR
 
+    def test_batch_matches_individual_checks(self, encoded_block):
+        """batch_check() gives the same reports as check() for mixed outcomes."""
+        frags, fpcc = encoded_block
+        fpcc.fingerprints[1] = fpcc.fingerprints[1] + GF256(1)
+        pairs = [(f.index, f.data) for f in frags]
+        pairs.append((2, b"tampered"))
+        pairs.append((-1, b"negative"))
+
+        reports = Verifier.batch_check(pairs, fpcc)
+
+        assert reports == [Verifier.check(i, d, fpcc) for i, d in pairs]
+        assert reports[1].result == VerificationResult.FP_MISMATCH
+
 
 # ---------------------------------------------------------------------------
 # Byzantine fault detection